@@ -0,0 +1,89 @@
+"""
+Mide la latencia del dashboard por rol (alumno, docente, administrador).
+
+Toma un usuario activo de cada rol (o los indicados con --student/--teacher/--admin) y hace
+N GET al dashboard con un cliente ya logueado. Informa p50/p95/máx y consultas por pedido,
+separando pedidos en frío (paneles invalidados antes de cada pedido con bump_panels, sin
+vaciar el resto de la caché) y en caliente. No crea ni borra datos.
+
+Uso:
+  python manage.py benchmark_dashboard
+  python manage.py benchmark_dashboard --requests 200 --student alumno1
+"""
+
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.services.dashboard import PANEL_TIMEOUTS, bump_panels
+
+ROLES = (
+    ('student', 'Alumno'),
+    ('teacher', 'Docente'),
+    ('admin', 'Administrador'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Latencia del dashboard (p50/p95) por rol, en frío y en caliente.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Pedidos por rol y modo.')
+        for role, label in ROLES:
+            parser.add_argument(f'--{role}', help=f'Usuario ({label.lower()}) a medir.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests debe ser al menos 1.')
+        url = reverse('dashboard')
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for role, label in ROLES:
+                user = self._pick_user(role, options[role])
+                if user is None:
+                    self.stdout.write(self.style.WARNING(f'{label}: no hay usuarios activos, se omite.'))
+                    continue
+                client = Client(raise_request_exception=False)
+                client.force_login(user)
+                client.get(url)  # Descarta el primer pedido (sesión, imports, plantillas).
+                for mode, cold in (('frío', True), ('caliente', False)):
+                    results = [self._request(client, url, cold) for _ in range(options['requests'])]
+                    self._report(f'{label} ({user.username}) {mode}', results)
+        self.stdout.write(self.style.SUCCESS('Medición terminada.'))
+
+    def _pick_user(self, role, username):
+        User = get_user_model()
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'No existe el usuario {username}.')
+        return User.objects.filter(user_type=role, is_active=True).order_by('id').first()
+
+    def _request(self, client, url, cold):
+        if cold:
+            bump_panels(*PANEL_TIMEOUTS)
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+        return response.status_code, elapsed, len(ctx.captured_queries)
+
+    def _report(self, label, results):
+        latencies = sorted(r[1] * 1000 for r in results)
+        failures = sum(1 for r in results if r[0] != 200)
+        p95 = latencies[max(0, int(round(len(latencies) * 0.95)) - 1)]
+        queries = [r[2] for r in results]
+        line = (
+            f'{label}: p50 {statistics.median(latencies):.1f} ms | p95 {p95:.1f} ms | '
+            f'máx {latencies[-1]:.1f} ms | consultas {min(queries)}-{max(queries)}'
+        )
+        if failures:
+            self.stdout.write(self.style.ERROR(f'{line} | errores: {failures}'))
+        else:
+            self.stdout.write(line)
@@ -0,0 +1 @@
+"""Servicios de cuentas y del panel de inicio."""
@@ -0,0 +1,258 @@
+"""
+Paneles del dashboard, cada uno cacheado por separado con TTL corto.
+
+- Cada panel es una función independiente (sin estado compartido) que devuelve lo que
+  el template necesita; build_dashboard() lee todos los del rol con un get_many y arma
+  solo los que faltan.
+- Invalidación por eventos: las señales llaman a bump_panels() (nueva «generación» del
+  panel para todos los usuarios, p. ej. al publicar una tarea) o a forget_user_panels()
+  (solo un usuario, p. ej. al entregar una tarea o leer un post). La clave de cada panel
+  incluye la generación, así que no hace falta enumerar usuarios para invalidar.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Panel -> segundos de vida. Las ventanas de exámenes dependen de la hora: TTL más corto.
+PANEL_TIMEOUTS = {
+    'user_count': 300,
+    'student_assignments': 120,
+    'student_exams': 30,
+    'staff_enrollments': 120,
+    'staff_exams': 30,
+    'storage': 300,
+    'forum_unread': 60,
+}
+STUDENT_PANELS = ('student_assignments', 'student_exams', 'forum_unread')
+STAFF_PANELS = ('staff_enrollments', 'staff_exams', 'forum_unread')
+GENERATION_TIMEOUT = 60 * 60 * 24
+
+
+def _generation_key(panel):
+    return f'dashboard:gen:{panel}'
+
+
+def _panel_key(panel, generation, user_id):
+    return f'dashboard:{panel}:{generation}:{user_id}'
+
+
+def bump_panels(*panels):
+    """Invalida un panel para todos los usuarios (las claves viejas vencen solas)."""
+    for panel in panels:
+        key = _generation_key(panel)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, GENERATION_TIMEOUT)
+
+
+def forget_user_panels(user_id, *panels):
+    """Invalida los paneles de un usuario en la generación actual."""
+    panels = panels or tuple(PANEL_TIMEOUTS)
+    generations = _generations(panels)
+    cache.delete_many([_panel_key(p, generations[p], user_id) for p in panels])
+
+
+def _generations(panels):
+    found = cache.get_many([_generation_key(p) for p in panels])
+    return {p: found.get(_generation_key(p), 1) for p in panels}
+
+
+# --- Paneles ---
+
+def _user_count(user):
+    from accounts.models import CustomUser
+
+    return CustomUser.objects.count()
+
+
+def _student_assignments(user):
+    from assignments.models import Assignment, AssignmentSubmission
+    from courses.models import Enrollment
+
+    approved_enrollment_exists = Enrollment.objects.filter(
+        student=user,
+        status='approved',
+        course=OuterRef('course'),
+    )
+    student_submission_exists = AssignmentSubmission.objects.filter(
+        assignment=OuterRef('pk'),
+        student=user,
+    )
+    return list(
+        Assignment.objects.filter(
+            is_active=True,
+            is_published=True,
+            tema__is_paused=False,
+            tema__unit__is_paused=False,
+            course__is_active=True,
+            course__is_paused=False,
+        )
+        .annotate(
+            is_enrolled=Exists(approved_enrollment_exists),
+            has_submission=Exists(student_submission_exists),
+        )
+        .filter(is_enrolled=True, has_submission=False)
+        .select_related('course', 'tema', 'tema__unit')
+        .order_by('due_date')[:10]
+    )
+
+
+def _student_exams(user):
+    from courses.services.access import get_course_access
+    from quizzes.models import ThemeExam
+    from quizzes.utils import resolve_student_exams_access
+
+    now = timezone.now()
+    active_exams = list(
+        ThemeExam.objects.filter(
+            is_published=True,
+            available_from__lte=now,
+            available_until__gte=now,
+            course_id__in=get_course_access(user).enrolled,
+            tema__is_paused=False,
+            tema__unit__is_paused=False,
+            course__is_active=True,
+            course__is_paused=False,
+        )
+        .select_related('course', 'tema', 'tema__unit')
+        .order_by('available_until', 'title')[:12]
+    )
+    access = resolve_student_exams_access(user, active_exams)
+    return [
+        {
+            'exam': ex,
+            'can_take': access[ex.pk][0],
+            'block_message': access[ex.pk][1] or '',
+        }
+        for ex in active_exams
+    ]
+
+
+def _staff_enrollments(user):
+    from courses.models import Enrollment
+
+    qs = Enrollment.objects.filter(status='pending')
+    if user.user_type != 'admin':
+        qs = qs.filter(Q(course__instructor=user) | Q(course__collaborators=user)).distinct()
+    return list(qs.select_related('course', 'student').order_by('-enrolled_at')[:10])
+
+
+def _staff_exams(user):
+    from quizzes.models import ThemeExam
+
+    now = timezone.now()
+    qs = ThemeExam.objects.filter(
+        is_published=True,
+        available_from__lte=now,
+        available_until__gte=now,
+    ).select_related('course', 'tema', 'tema__unit')
+    if user.user_type != 'admin':
+        qs = qs.filter(Q(course__instructor=user) | Q(course__collaborators=user)).distinct()
+    return list(qs.order_by('available_until', 'title')[:12])
+
+
+def _storage(user):
+    from core.models import StorageConfig
+    from core.services.storage import get_storage_usage
+
+    try:
+        usage = get_storage_usage()
+    except Exception as e:
+        # El bucket montado puede no estar disponible: el dashboard se muestra sin el panel.
+        logger.warning(f"No se pudo leer el uso del almacenamiento: {e}")
+        return None
+    return {'usage': usage, 'config': StorageConfig.objects.first()}
+
+
+def _forum_unread(user):
+    """Total con los contadores por curso; la lista solo se arma si hay algo sin leer."""
+    from courses.services.access import get_course_access
+    from forums.models import ForumPost
+    from forums.services.unread import unread_counts, unread_posts
+
+    access = get_course_access(user)
+    counts = unread_counts(user, access.enrolled if user.is_student() else access.managed)
+    course_ids = [course_id for course_id, count in counts.items() if count]
+    if not course_ids:
+        return {'posts': [], 'count': 0}
+    accessible = ForumPost.objects.filter(course_id__in=course_ids)
+    if user.is_student():
+        accessible = accessible.filter(Q(is_private=False) | Q(student_participant=user))
+    posts = list(
+        unread_posts(accessible, user)
+        .select_related('course', 'author', 'student_participant')
+        .order_by('-last_activity_at')[:10]
+    )
+    return {'posts': posts, 'count': sum(counts.values())}
+
+
+PANEL_BUILDERS = {
+    'user_count': _user_count,
+    'student_assignments': _student_assignments,
+    'student_exams': _student_exams,
+    'staff_enrollments': _staff_enrollments,
+    'staff_exams': _staff_exams,
+    'storage': _storage,
+    'forum_unread': _forum_unread,
+}
+
+
+def panels_for(user, viewing_as_student=False):
+    panels = []
+    if user.can_manage_users():
+        panels.append('user_count')
+    if user.is_student() or viewing_as_student:
+        panels.extend(STUDENT_PANELS)
+    elif user.is_teacher() or user.user_type == 'admin':
+        panels.extend(STAFF_PANELS)
+    else:
+        panels.append('forum_unread')
+    if user.can_manage_users():
+        panels.append('storage')
+    return panels
+
+
+def get_panels(user, panels):
+    """{panel: datos}: una lectura de caché para todos y solo se arman los que faltan."""
+    generations = _generations(panels)
+    keys = {p: _panel_key(p, generations[p], user.pk) for p in panels}
+    found = cache.get_many(list(keys.values()))
+    result = {}
+    for panel in panels:
+        key = keys[panel]
+        if key in found:
+            result[panel] = found[key]
+            continue
+        data = PANEL_BUILDERS[panel](user)
+        if data is None:
+            # Panel no disponible por ahora (ver _storage): no se muestra ni se cachea.
+            continue
+        result[panel] = data
+        cache.set(key, data, PANEL_TIMEOUTS[panel])
+    return result
+
+
+def build_dashboard(user, viewing_as_student=False):
+    """Contexto del dashboard (mismas claves que usa dashboard.html)."""
+    panels = get_panels(user, panels_for(user, viewing_as_student))
+    context = {'user_count': panels.get('user_count')}
+    for panel, name in (
+        ('student_assignments', 'pending_assignments'),
+        ('student_exams', 'active_exams_student_rows'),
+        ('staff_enrollments', 'pending_enrollments'),
+        ('staff_exams', 'active_exams_teacher'),
+    ):
+        if panel in panels:
+            context[name] = panels[panel]
+    if 'storage' in panels:
+        context['storage_usage'] = panels['storage']['usage']
+        context['storage_config'] = panels['storage']['config']
+    if 'forum_unread' in panels:
+        context['unread_forum_posts'] = panels['forum_unread']['posts']
+        context['unread_forum_count'] = panels['forum_unread']['count']
+    return context
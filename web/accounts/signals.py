@@ -0,0 +1,73 @@
+"""Invalidación por eventos de los paneles del dashboard (accounts.services.dashboard)."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from forums.services.unread import post_marked_read
+
+from .services.dashboard import bump_panels, forget_user_panels
+
+
+@receiver(post_save, sender='accounts.CustomUser')
+@receiver(post_delete, sender='accounts.CustomUser')
+def refresh_user_count(sender, instance, created=True, **kwargs):
+    if created:
+        bump_panels('user_count')
+
+
+@receiver(post_save, sender='courses.Course')
+@receiver(post_save, sender='units.Unit')
+@receiver(post_delete, sender='units.Unit')
+@receiver(post_save, sender='units.Tema')
+@receiver(post_delete, sender='units.Tema')
+def refresh_student_content_panels(sender, instance, **kwargs):
+    # Pausas y publicaciones cambian qué tareas y exámenes ve cada alumno.
+    bump_panels('student_assignments', 'student_exams')
+
+
+@receiver(post_save, sender='assignments.Assignment')
+@receiver(post_delete, sender='assignments.Assignment')
+def refresh_assignment_panels(sender, instance, **kwargs):
+    bump_panels('student_assignments')
+
+
+@receiver(post_save, sender='assignments.AssignmentSubmission')
+@receiver(post_delete, sender='assignments.AssignmentSubmission')
+def refresh_student_assignments(sender, instance, **kwargs):
+    forget_user_panels(instance.student_id, 'student_assignments')
+
+
+@receiver(post_save, sender='quizzes.ThemeExam')
+@receiver(post_delete, sender='quizzes.ThemeExam')
+def refresh_exam_panels(sender, instance, **kwargs):
+    bump_panels('student_exams', 'staff_exams')
+
+
+@receiver(post_save, sender='attendance.AttendanceRecord')
+@receiver(post_delete, sender='attendance.AttendanceRecord')
+def refresh_student_exams(sender, instance, **kwargs):
+    # La asistencia habilita (o no) exámenes con fecha de asistencia requerida.
+    forget_user_panels(instance.student_id, 'student_exams')
+
+
+@receiver(post_save, sender='courses.Enrollment')
+@receiver(post_delete, sender='courses.Enrollment')
+def refresh_enrollment_panels(sender, instance, **kwargs):
+    bump_panels('staff_enrollments')
+    forget_user_panels(instance.student_id, 'student_assignments', 'student_exams', 'forum_unread')
+
+
+@receiver(post_save, sender='core.StorageConfig')
+def refresh_storage_panel(sender, instance, **kwargs):
+    bump_panels('storage')
+
+
+@receiver(post_save, sender='forums.ForumPost')
+@receiver(post_delete, sender='forums.ForumPost')
+@receiver(post_save, sender='forums.ForumReply')
+def refresh_forum_panels(sender, instance, **kwargs):
+    bump_panels('forum_unread')
+
+
+@receiver(post_marked_read)
+def refresh_user_forum_panel(sender, user, **kwargs):
+    forget_user_panels(user.pk, 'forum_unread')
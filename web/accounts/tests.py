@@ -1,7 +1,11 @@
 from datetime import timedelta
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -84,8 +88,9 @@ class NotificationsPolicyTests(TestCase):
         self.assertFalse(sent)
 
 
-class StudentDashboardPendingAssignmentsTests(TestCase):
+class DashboardTestMixin:
     def setUp(self):
+        cache.clear()
         self.teacher = User.objects.create_user(
             username='doc_dash',
             password='Pass1234!',
@@ -148,6 +153,8 @@ class StudentDashboardPendingAssignmentsTests(TestCase):
             status='submitted',
         )
 
+
+class StudentDashboardPendingAssignmentsTests(DashboardTestMixin, TestCase):
     def test_dashboard_shows_only_pending_assignments(self):
         self.client.login(username='alu_dash', password='Pass1234!')
         response = self.client.get(reverse('dashboard'))
@@ -155,3 +162,50 @@ class StudentDashboardPendingAssignmentsTests(TestCase):
         pending_assignments = list(response.context['pending_assignments'])
         self.assertEqual(len(pending_assignments), 1)
         self.assertEqual(pending_assignments[0].id, self.pending_assignment.id)
+
+
+class DashboardPanelCacheTests(DashboardTestMixin, TestCase):
+    def _pending_ids(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return [a.id for a in response.context['pending_assignments']]
+
+    def test_panels_are_cached_and_invalidated_by_events(self):
+        self.client.force_login(self.student)
+        with CaptureQueriesContext(connection) as cold:
+            self.assertEqual(self._pending_ids(), [self.pending_assignment.id])
+        with CaptureQueriesContext(connection) as warm:
+            self.assertEqual(self._pending_ids(), [self.pending_assignment.id])
+        self.assertLess(len(warm), len(cold))
+
+        # Entregar invalida solo el panel del alumno.
+        AssignmentSubmission.objects.create(
+            assignment=self.pending_assignment,
+            student=self.student,
+            version=1,
+            file='assignments/submissions/otra.txt',
+            status='submitted',
+        )
+        self.assertEqual(self._pending_ids(), [])
+
+        # Publicar una tarea nueva invalida el panel de todos los alumnos.
+        new = Assignment.objects.create(
+            title='Tarea nueva',
+            description='Nueva',
+            tema=self.tema,
+            course=self.course,
+            created_by=self.teacher,
+            due_date=timezone.now() + timedelta(days=5),
+            is_active=True,
+            is_published=True,
+        )
+        self.assertEqual(self._pending_ids(), [new.id])
+
+    def test_storage_failure_hides_only_that_panel(self):
+        admin = User.objects.create_user(username='adm_dash', password='Pass1234!', user_type='admin')
+        self.client.force_login(admin)
+        with mock.patch('core.services.storage.get_storage_usage', side_effect=OSError('sin bucket')):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context.get('storage_usage'))
+        self.assertIsNotNone(response.context['user_count'])
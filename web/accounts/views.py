@@ -14,7 +14,6 @@ from django.conf import settings
 from django.http import FileResponse, Http404
 from pathlib import Path
 from django.db import transaction
-from django.db.models import Exists, OuterRef, Q
 from urllib.parse import urlencode
 from django_otp.plugins.otp_totp.models import TOTPDevice
 from django_otp.util import random_hex # No usado directamente en el código provisto, pero útil para OTP
@@ -296,176 +295,13 @@ def logout_view(request):
 
 @login_required
 def dashboard(request):
-    context = {
-        'user': request.user,
-        'user_count': CustomUser.objects.count() if request.user.can_manage_users() else None,
-    }
-
-    viewing_as_student = getattr(request, 'viewing_as_student', False)
-
-    if request.user.is_student() or viewing_as_student:
-        from assignments.models import Assignment, AssignmentSubmission
-        from courses.models import Enrollment
-
-        approved_enrollment_exists = Enrollment.objects.filter(
-            student=request.user,
-            status='approved',
-            course=OuterRef('course'),
-        )
-        student_submission_exists = AssignmentSubmission.objects.filter(
-            assignment=OuterRef('pk'),
-            student=request.user,
-        )
-        pending_assignments = (
-            Assignment.objects.filter(
-                is_active=True,
-                is_published=True,
-                tema__is_paused=False,
-                tema__unit__is_paused=False,
-                course__is_active=True,
-                course__is_paused=False,
-            )
-            .annotate(
-                is_enrolled=Exists(approved_enrollment_exists),
-                has_submission=Exists(student_submission_exists),
-            )
-            .filter(is_enrolled=True, has_submission=False)
-            .select_related('course', 'tema', 'tema__unit')
-            .order_by('due_date')[:10]
-        )
-        context['pending_assignments'] = pending_assignments
-
-        from quizzes.models import ThemeExam
-        from quizzes.utils import resolve_student_exam_access
-
-        enrolled_course_ids = Enrollment.objects.filter(
-            student=request.user,
-            status='approved',
-        ).values_list('course_id', flat=True)
-        active_exams_qs = (
-            ThemeExam.objects.filter(
-                is_published=True,
-                available_from__lte=timezone.now(),
-                available_until__gte=timezone.now(),
-                course_id__in=enrolled_course_ids,
-                tema__is_paused=False,
-                tema__unit__is_paused=False,
-                course__is_active=True,
-                course__is_paused=False,
-            )
-            .select_related('course', 'tema', 'tema__unit')
-            .order_by('available_until', 'title')[:12]
-        )
-        context['active_exams_student_rows'] = []
-        for ex in active_exams_qs:
-            ok, msg = resolve_student_exam_access(
-                request.user,
-                ex.course,
-                ex.tema,
-                ex,
-            )
-            context['active_exams_student_rows'].append(
-                {
-                    'exam': ex,
-                    'can_take': ok,
-                    'block_message': msg or '',
-                }
-            )
-    elif (request.user.is_teacher() or request.user.user_type == 'admin') and not viewing_as_student:
-        from courses.models import Enrollment
-
-        if request.user.user_type == 'admin':
-            pending_enrollments = (
-                Enrollment.objects.filter(status='pending')
-                .select_related('course', 'student')
-                .order_by('-enrolled_at')[:10]
-            )
-        else:
-            pending_enrollments = (
-                Enrollment.objects.filter(status='pending')
-                .filter(Q(course__instructor=request.user) | Q(course__collaborators=request.user))
-                .select_related('course', 'student')
-                .distinct()
-                .order_by('-enrolled_at')[:10]
-            )
-        context['pending_enrollments'] = pending_enrollments
-
-        from quizzes.models import ThemeExam
-
-        now = timezone.now()
-        base_exam_qs = ThemeExam.objects.filter(
-            is_published=True,
-            available_from__lte=now,
-            available_until__gte=now,
-        ).select_related('course', 'tema', 'tema__unit')
-        if request.user.user_type == 'admin':
-            context['active_exams_teacher'] = base_exam_qs.order_by(
-                'available_until', 'title'
-            )[:12]
-        else:
-            context['active_exams_teacher'] = (
-                base_exam_qs.filter(
-                    Q(course__instructor=request.user)
-                    | Q(course__collaborators=request.user)
-                )
-                .distinct()
-                .order_by('available_until', 'title')[:12]
-            )
-
-    # Si el usuario es administrador, incluir información de almacenamiento
-    if request.user.can_manage_users():
-        try:
-            from core.services.storage import get_storage_usage
-            from core.models import StorageConfig
-
-            usage = get_storage_usage()
-            config = StorageConfig.objects.first()
-
-            context['storage_usage'] = usage
-            context['storage_config'] = config
-        except Exception:
-            pass
-
-    # Mensajes no leídos del foro
-    try:
-        from django.db.models import Subquery, F
-        from forums.models import ForumPost, ForumPostRead
-        from courses.models import Enrollment
-
-        user = request.user
-        last_read_sq = ForumPostRead.objects.filter(
-            user=user, post=OuterRef('pk')
-        ).values('last_read_at')[:1]
-
-        if user.is_student():
-            enrolled_course_ids = Enrollment.objects.filter(
-                student=user, status='approved'
-            ).values_list('course_id', flat=True)
-            accessible = ForumPost.objects.filter(
-                Q(is_private=False, course_id__in=enrolled_course_ids) |
-                Q(is_private=True, student_participant=user)
-            )
-        else:
-            accessible = ForumPost.objects.filter(
-                Q(course__instructor=user) | Q(course__collaborators=user)
-            ).distinct()
-
-        unread_posts = (
-            accessible
-            .exclude(author=user)
-            .annotate(last_read=Subquery(last_read_sq))
-            .filter(
-                Q(last_read__isnull=True) |
-                Q(last_activity_at__gt=F('last_read'))
-            )
-            .select_related('course', 'author', 'student_participant')
-            .order_by('-last_activity_at')[:10]
-        )
-        context['unread_forum_posts'] = unread_posts
-        context['unread_forum_count'] = unread_posts.count()
-    except Exception:
-        pass
+    from .services.dashboard import build_dashboard
 
+    context = {'user': request.user}
+    context.update(build_dashboard(
+        request.user,
+        viewing_as_student=getattr(request, 'viewing_as_student', False),
+    ))
     return render(request, 'dashboard.html', context)
 
 @login_required
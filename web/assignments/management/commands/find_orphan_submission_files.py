@@ -1,8 +1,12 @@
 """
 Archivos en assignments/submissions/ que ya no están referenciados en la BD.
 
+Por defecto consulta el índice core.MediaFile (ver reconcile_media_index);
+con --scan recorre el directorio en disco y compara contra la BD (recuperación).
+
 Uso:
   python manage.py find_orphan_submission_files
+  python manage.py find_orphan_submission_files --scan
   python manage.py find_orphan_submission_files --delete
   python manage.py find_orphan_submission_files --delete --noinput
 """
@@ -10,9 +14,11 @@ Uso:
 from pathlib import Path
 
 from django.conf import settings
+from django.core.files.storage import default_storage
 from django.core.management.base import BaseCommand
 
 from assignments.models import AssignmentSubmission, AssignmentSubmissionFile
+from core.services.media_index import orphan_files, referenced_paths
 
 
 SUBDIR = Path('assignments') / 'submissions'
@@ -35,32 +41,23 @@ class Command(BaseCommand):
             action='store_true',
             help='Con --delete, no pedir confirmación.',
         )
+        parser.add_argument(
+            '--scan',
+            action='store_true',
+            help='Recorrer el disco en lugar de usar el índice de archivos.',
+        )
 
     def handle(self, *args, **options):
-        media_root = Path(settings.MEDIA_ROOT)
-        target = media_root / SUBDIR
-
-        referenced = self._referenced_paths()
-
-        if not target.is_dir():
-            self.stdout.write(
-                self.style.WARNING(
-                    f'No existe el directorio {target}. MEDIA_ROOT={media_root}'
-                )
+        if options['scan']:
+            orphans = self._scan_orphans()
+            if orphans is None:
+                return
+        else:
+            orphans = list(
+                orphan_files(prefix=SUBDIR.as_posix() + '/').values_list('path', flat=True)
             )
-            return
-
-        on_disk = set()
-        for path in target.rglob('*'):
-            if path.is_file():
-                rel = path.relative_to(media_root).as_posix()
-                on_disk.add(rel)
+            self.stdout.write(f'Huérfanos según el índice de archivos: {len(orphans)}')
 
-        orphans = sorted(on_disk - referenced)
-
-        self.stdout.write(
-            f'Referenciados en BD: {len(referenced)} | Archivos en disco: {len(on_disk)}'
-        )
         if not orphans:
             self.stdout.write(self.style.SUCCESS('No hay archivos huérfanos.'))
             return
@@ -81,12 +78,19 @@ class Command(BaseCommand):
                 self.stdout.write('Cancelado.')
                 return
 
+        # Re-chequear contra la BD justo antes de borrar: el índice puede estar desfasado.
+        still_used = referenced_paths(orphans)
+        if still_used:
+            self.stdout.write(
+                self.style.WARNING(f'En uso según la BD (no se borran): {len(still_used)}')
+            )
         deleted = 0
         errors = 0
         for rel in orphans:
-            abs_path = media_root / rel
+            if rel in still_used:
+                continue
             try:
-                abs_path.unlink()
+                default_storage.delete(rel)
                 deleted += 1
             except OSError as e:
                 self.stdout.write(self.style.ERROR(f'Error borrando {rel}: {e}'))
@@ -94,6 +98,32 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS(f'Eliminados: {deleted} | Errores: {errors}'))
 
+    def _scan_orphans(self):
+        """Escanea MEDIA_ROOT/assignments/submissions/ y devuelve los huérfanos (o None)."""
+        media_root = Path(settings.MEDIA_ROOT)
+        target = media_root / SUBDIR
+
+        referenced = self._referenced_paths()
+
+        if not target.is_dir():
+            self.stdout.write(
+                self.style.WARNING(
+                    f'No existe el directorio {target}. MEDIA_ROOT={media_root}'
+                )
+            )
+            return None
+
+        on_disk = set()
+        for path in target.rglob('*'):
+            if path.is_file():
+                rel = path.relative_to(media_root).as_posix()
+                on_disk.add(rel)
+
+        self.stdout.write(
+            f'Referenciados en BD: {len(referenced)} | Archivos en disco: {len(on_disk)}'
+        )
+        return sorted(on_disk - referenced)
+
     def _referenced_paths(self):
         """Rutas relativas a MEDIA_ROOT tal como las guarda Django FileField."""
         s = set()
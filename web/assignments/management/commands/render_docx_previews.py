@@ -0,0 +1,32 @@
+"""
+Convierte a HTML los adjuntos .docx de entregas (y el archivo único de entregas
+anteriores) que todavía no tienen vista previa. Los que no se pueden leer quedan
+marcados como fallidos y no se reintentan.
+
+Uso:
+  python manage.py render_docx_previews              # hasta 50 archivos por corrida
+  python manage.py render_docx_previews --limit 0    # todos los pendientes
+"""
+
+from django.core.management.base import BaseCommand
+
+from assignments.services.docx_render import render_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Convierte a HTML (una sola vez por contenido) los adjuntos .docx pendientes, '
+        'para que el visor de entregas sirva el fragmento ya renderizado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=50,
+            help='Máximo de archivos a procesar en esta corrida (0 = sin límite).',
+        )
+
+    def handle(self, *args, **options):
+        done, failed = render_pending(limit=options['limit'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Convertidos: {done} | con error: {failed}'))
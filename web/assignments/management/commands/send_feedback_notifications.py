@@ -0,0 +1,74 @@
+"""
+Envía los avisos de devolución encolados por la devolución masiva de entregas.
+
+Cada fallo suma un intento; tras MAX_ATTEMPTS el aviso queda pendiente pero no se
+reintenta (hasta que se vuelva a dar la devolución), así no bloquea la cola.
+
+Uso:
+  python manage.py send_feedback_notifications
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from assignments.models import AssignmentSubmission
+from core.notifications import notify_submission_feedback
+from core.services.mailgun import MailgunClient
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+
+
+class Command(BaseCommand):
+    help = 'Envía por correo los avisos de devolución pendientes (feedback_notification_pending).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=200,
+            help='Máximo de avisos por corrida (0 = sin límite).',
+        )
+
+    def handle(self, *args, **options):
+        if not MailgunClient().enabled:
+            self.stdout.write('Mailgun no está configurado; los avisos quedan pendientes.')
+            return
+
+        qs = (
+            AssignmentSubmission.objects
+            .filter(
+                feedback_notification_pending=True,
+                feedback_notification_attempts__lt=MAX_ATTEMPTS,
+            )
+            .select_related('student', 'assignment__course', 'assignment__tema')
+            .order_by('feedback_notification_attempts', 'feedback_given_at', 'id')
+        )
+        if options['limit']:
+            qs = qs[:options['limit']]
+
+        sent_ids = []
+        failed_ids = []
+        for submission in qs:
+            try:
+                ok = notify_submission_feedback(submission)
+            except Exception as e:
+                logger.warning(f"No se pudo avisar la devolución de la entrega {submission.pk}: {e}")
+                ok = False
+            if ok:
+                sent_ids.append(submission.pk)
+            else:
+                failed_ids.append(submission.pk)
+
+        if sent_ids:
+            AssignmentSubmission.objects.filter(pk__in=sent_ids).update(feedback_notification_pending=False)
+        if failed_ids:
+            AssignmentSubmission.objects.filter(pk__in=failed_ids).update(
+                feedback_notification_attempts=F('feedback_notification_attempts') + 1,
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Avisos enviados: {len(sent_ids)} | fallidos: {len(failed_ids)}')
+        )
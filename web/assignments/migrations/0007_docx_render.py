@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0006_submission_multiple_files'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocxRender',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='Hash del contenido')),
+                ('html', models.TextField(blank=True, verbose_name='HTML')),
+                ('warnings', models.TextField(blank=True, verbose_name='Advertencias de conversión')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Convertido')),
+            ],
+            options={
+                'verbose_name': 'Vista previa .docx',
+                'verbose_name_plural': 'Vistas previas .docx',
+            },
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmissionfile',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 del archivo; lo completa el render de vistas previas .docx.', max_length=64, verbose_name='Hash del contenido'),
+        ),
+    ]
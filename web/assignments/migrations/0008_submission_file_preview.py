@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0007_docx_render'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentsubmissionfile',
+            name='preview',
+            field=models.FileField(blank=True, editable=False, upload_to='', verbose_name='Vista previa'),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmissionfile',
+            name='preview_generated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Vista previa generada'),
+        ),
+    ]
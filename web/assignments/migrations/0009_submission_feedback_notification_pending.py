@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0008_submission_file_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='feedback_notification_pending',
+            field=models.BooleanField(db_index=True, default=False, help_text='Lo envía el comando send_feedback_notifications (cron).', verbose_name='Aviso de devolución pendiente'),
+        ),
+    ]
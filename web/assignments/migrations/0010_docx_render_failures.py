@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0009_submission_feedback_notification_pending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 de `file`; lo completa el render de vistas previas .docx.', max_length=64, verbose_name='Hash del archivo'),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='docx_render_failed',
+            field=models.BooleanField(default=False, help_text='No se pudo leer `file`; render_docx_previews no lo vuelve a intentar.', verbose_name='Vista previa .docx fallida'),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmissionfile',
+            name='docx_render_failed',
+            field=models.BooleanField(default=False, help_text='No se pudo leer el archivo; render_docx_previews no lo vuelve a intentar.', verbose_name='Vista previa .docx fallida'),
+        ),
+    ]
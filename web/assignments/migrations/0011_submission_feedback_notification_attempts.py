@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0010_docx_render_failures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='feedback_notification_attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='send_feedback_notifications deja de reintentar el aviso tras varios fallos.', verbose_name='Intentos fallidos del aviso'),
+        ),
+    ]
@@ -132,11 +132,9 @@ class Assignment(models.Model):
 
     def can_be_managed_by(self, user):
         """Check if user can manage this assignment"""
-        return (
-            self.course.instructor == user or
-            user in self.course.collaborators.all() or
-            user.user_type == 'admin'
-        )
+        from courses.services.access import user_manages_course
+
+        return user.user_type == 'admin' or user_manages_course(user, self.course_id)
 
     def is_submission_allowed(self):
         """Check if submissions are still allowed"""
@@ -185,6 +183,17 @@ class AssignmentSubmission(models.Model):
         blank=True,
         verbose_name='Nombre Original del Archivo'
     )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='Hash del archivo',
+        help_text='SHA-256 de `file`; lo completa el render de vistas previas .docx.',
+    )
+    docx_render_failed = models.BooleanField(
+        default=False,
+        verbose_name='Vista previa .docx fallida',
+        help_text='No se pudo leer `file`; render_docx_previews no lo vuelve a intentar.',
+    )
     submitted_at = models.DateTimeField(auto_now_add=True, verbose_name='Entregado en')
     status = models.CharField(
         max_length=20,
@@ -214,6 +223,17 @@ class AssignmentSubmission(models.Model):
         related_name='given_feedbacks',
         verbose_name='Devolución dada por'
     )
+    feedback_notification_pending = models.BooleanField(
+        default=False,
+        db_index=True,
+        verbose_name='Aviso de devolución pendiente',
+        help_text='Lo envía el comando send_feedback_notifications (cron).',
+    )
+    feedback_notification_attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Intentos fallidos del aviso',
+        help_text='send_feedback_notifications deja de reintentar el aviso tras varios fallos.',
+    )
 
     class Meta:
         verbose_name = 'Entrega de Tarea'
@@ -294,6 +314,25 @@ class AssignmentSubmissionFile(models.Model):
         verbose_name='Nombre original',
     )
     order = models.PositiveSmallIntegerField(default=0, verbose_name='Orden')
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        verbose_name='Hash del contenido',
+        help_text='SHA-256 del archivo; lo completa el render de vistas previas .docx.',
+    )
+    docx_render_failed = models.BooleanField(
+        default=False,
+        verbose_name='Vista previa .docx fallida',
+        help_text='No se pudo leer el archivo; render_docx_previews no lo vuelve a intentar.',
+    )
+    preview = models.FileField(blank=True, editable=False, verbose_name='Vista previa')
+    preview_generated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Vista previa generada',
+    )
 
     class Meta:
         verbose_name = 'Archivo de entrega'
@@ -309,6 +348,22 @@ class AssignmentSubmissionFile(models.Model):
         super().save(*args, **kwargs)
 
 
+class DocxRender(models.Model):
+    """HTML ya convertido de un .docx, compartido por todos los archivos con el mismo contenido."""
+    content_hash = models.CharField(max_length=64, unique=True, verbose_name='Hash del contenido')
+    html = models.TextField(blank=True, verbose_name='HTML')
+    warnings = models.TextField(blank=True, verbose_name='Advertencias de conversión')
+    error = models.TextField(blank=True, verbose_name='Error')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Convertido')
+
+    class Meta:
+        verbose_name = 'Vista previa .docx'
+        verbose_name_plural = 'Vistas previas .docx'
+
+    def __str__(self):
+        return self.content_hash
+
+
 class AssignmentCollaborator(models.Model):
     """Model for group work collaborators in assignments"""
     submission = models.ForeignKey(
@@ -479,13 +534,32 @@ def check_storage_after_submission_file(sender, instance, created, **kwargs):
             logger.warning(f"Error al verificar umbral de almacenamiento: {e}")
 
 
+@receiver(post_save, sender=AssignmentSubmissionFile)
+@receiver(post_save, sender=AssignmentSubmission)
+def index_submission_file(sender, instance, **kwargs):
+    """Marcar el archivo de la entrega como en uso en el índice de MEDIA_ROOT."""
+    if instance.file:
+        from core.services.media_index import mark_referenced
+        mark_referenced(instance.file.name)
+
+
 @receiver(post_delete, sender=AssignmentSubmissionFile)
 def delete_submission_attachment_storage(sender, instance, **kwargs):
     if instance.file:
         instance.file.delete(save=False)
+    from core.services.previews import delete_preview
+    delete_preview(instance)
 
 
 @receiver(post_delete, sender=AssignmentSubmission)
 def delete_submission_file(sender, instance, **kwargs):
     if instance.file:
         instance.file.delete(save=False)
+
+
+@receiver(post_save, sender=Assignment)
+@receiver(post_delete, sender=Assignment)
+def invalidate_outline_on_assignment_change(sender, instance, **kwargs):
+    from units.services.outline import invalidate_course_outline
+
+    invalidate_course_outline(instance.course_id)
@@ -0,0 +1,212 @@
+"""
+Conversión de entregas .docx a HTML en el servidor (mammoth), con caché por hash de contenido.
+
+El comando `render_docx_previews` (cron) convierte los adjuntos pendientes una sola vez;
+el visor solo sirve el fragmento guardado en assignments.DocxRender.
+"""
+import hashlib
+import logging
+from html import escape
+from html.parser import HTMLParser
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+ALLOWED_TAGS = {
+    'p', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'b', 'em', 'i', 'u', 's', 'sub', 'sup', 'blockquote', 'pre', 'code',
+    'ul', 'ol', 'li', 'table', 'thead', 'tbody', 'tr', 'td', 'th',
+    'a', 'img', 'span',
+}
+VOID_TAGS = {'br', 'img'}
+# Etiquetas cuyo contenido se descarta completo (no solo la etiqueta).
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'noscript', 'template'}
+ALLOWED_ATTRS = {
+    'a': {'href', 'id'},
+    'img': {'src', 'alt'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan'},
+    'p': {'id'},
+    'li': {'id'},
+}
+LINK_SCHEMES = ('http://', 'https://', 'mailto:', '#')
+
+
+def is_docx_name(name):
+    return bool(name) and str(name).lower().endswith('.docx')
+
+
+def field_file_sha256(field_file):
+    """SHA-256 del archivo leyendo en bloques (storage local o remoto)."""
+    digest = hashlib.sha256()
+    with field_file.open('rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open_tags = []
+        self.skip_depth = 0
+
+    def _clean_attrs(self, tag, attrs):
+        allowed = ALLOWED_ATTRS.get(tag, set())
+        parts = []
+        kept = set()
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            value = value.strip()
+            if name == 'href' and not value.lower().startswith(LINK_SCHEMES):
+                continue
+            if name == 'src' and not value.lower().startswith('data:image/'):
+                continue
+            if name in ('colspan', 'rowspan') and not value.isdigit():
+                continue
+            parts.append(f' {name}="{escape(value, quote=True)}"')
+            kept.add(name)
+        if tag == 'a' and 'href' in kept:
+            parts.append(' rel="noopener noreferrer" target="_blank"')
+        return ''.join(parts)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth or tag not in ALLOWED_TAGS:
+            return
+        self.out.append(f'<{tag}{self._clean_attrs(tag, attrs)}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in DROP_CONTENT_TAGS:
+            self.skip_depth -= 1
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if self.skip_depth or tag not in self.open_tags:
+            return
+        while self.open_tags:
+            current = self.open_tags.pop()
+            self.out.append(f'</{current}>')
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.out.append(escape(data, quote=False))
+
+    def result(self):
+        while self.open_tags:
+            self.out.append(f'</{self.open_tags.pop()}>')
+        return ''.join(self.out)
+
+
+def sanitize_html(html):
+    """Deja solo etiquetas/atributos de formato; quita scripts, eventos y URLs no seguras."""
+    parser = _Sanitizer()
+    parser.feed(html or '')
+    parser.close()
+    return parser.result()
+
+
+def convert_docx(field_file):
+    """Devuelve (html saneado, advertencias) usando mammoth."""
+    import mammoth
+
+    with field_file.open('rb') as f:
+        result = mammoth.convert_to_html(f)
+    warnings = '; '.join(m.message for m in result.messages)
+    return sanitize_html(result.value), warnings
+
+
+def render_field_file(field_file, content_hash=None):
+    """
+    Devuelve el DocxRender del archivo, convirtiéndolo solo si ese contenido nunca se convirtió.
+    Si el archivo pertenece a una entrega o adjunto sin hash guardado, lo guarda.
+    """
+    from assignments.models import AssignmentSubmission, AssignmentSubmissionFile, DocxRender
+
+    instance = getattr(field_file, 'instance', None)
+    if not content_hash:
+        content_hash = getattr(instance, 'content_hash', '') or field_file_sha256(field_file)
+        if isinstance(instance, (AssignmentSubmission, AssignmentSubmissionFile)) and not instance.content_hash:
+            type(instance).objects.filter(pk=instance.pk).update(content_hash=content_hash)
+            instance.content_hash = content_hash
+
+    render = DocxRender.objects.filter(content_hash=content_hash).first()
+    if render is not None:
+        return render
+    try:
+        html, warnings = convert_docx(field_file)
+        error = ''
+    except Exception as e:
+        logger.warning(f"No se pudo convertir {field_file.name} a HTML: {e}")
+        html, warnings, error = '', '', str(e) or e.__class__.__name__
+    render, _ = DocxRender.objects.get_or_create(
+        content_hash=content_hash,
+        defaults={'html': html, 'warnings': warnings, 'error': error},
+    )
+    return render
+
+
+def _pending(model):
+    from django.db.models import Exists, OuterRef, Q
+
+    from assignments.models import DocxRender
+
+    rendered = DocxRender.objects.filter(content_hash=OuterRef('content_hash'))
+    return (
+        model.objects
+        .filter(file__iendswith='.docx', docx_render_failed=False)
+        .filter(Q(content_hash='') | ~Exists(rendered))
+        .order_by('id')
+    )
+
+
+def pending_attachments():
+    """Adjuntos .docx sin hash calculado o cuyo hash todavía no tiene HTML convertido."""
+    from assignments.models import AssignmentSubmissionFile
+
+    return _pending(AssignmentSubmissionFile)
+
+
+def pending_submissions():
+    """Lo mismo para el archivo único de entregas anteriores a los adjuntos múltiples."""
+    from assignments.models import AssignmentSubmission
+
+    return _pending(AssignmentSubmission)
+
+
+def render_pending(limit=None):
+    """
+    Convierte los adjuntos y entregas pendientes. Devuelve (convertidos, fallidos).
+    Si un archivo no se puede leer, se marca docx_render_failed y sale de la cola.
+    """
+    done = failed = 0
+    for qs in (pending_attachments(), pending_submissions()):
+        if limit:
+            qs = qs[:max(0, limit - done - failed)]
+        for obj in qs.iterator():
+            try:
+                render = render_field_file(obj.file)
+            except Exception as e:
+                logger.warning(
+                    f"No se pudo leer {obj._meta.model_name} {obj.pk} ({obj.file.name}): {e}"
+                )
+                type(obj).objects.filter(pk=obj.pk).update(docx_render_failed=True)
+                failed += 1
+                continue
+            if render.error:
+                failed += 1
+            else:
+                done += 1
+    return done, failed
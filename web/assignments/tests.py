@@ -1,10 +1,26 @@
+import io
+import shutil
+import tempfile
+import zipfile
 from datetime import timedelta
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
 from django.utils import timezone
 
-from assignments.models import Assignment
+from assignments.models import (
+    Assignment,
+    AssignmentComment,
+    AssignmentSubmission,
+    AssignmentSubmissionFile,
+    DocxRender,
+)
+from assignments.management.commands.send_feedback_notifications import MAX_ATTEMPTS
+from assignments.services.docx_render import render_pending, sanitize_html
 from core.notifications import notify_assignment_published
 from courses.models import Course, Enrollment
 from units.models import Unit, Tema
@@ -63,3 +79,310 @@ class AssignmentNotificationPolicyTests(TestCase):
         )
         sent_count = notify_assignment_published(assignment)
         self.assertEqual(sent_count, 0)
+
+
+def _docx_bytes(paragraph_xml):
+    """Genera un .docx mínimo (solo document.xml) para las pruebas de conversión."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        zf.writestr(
+            '[Content_Types].xml',
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>',
+        )
+        zf.writestr(
+            '_rels/.rels',
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="word/document.xml"/>'
+            '</Relationships>',
+        )
+        zf.writestr(
+            'word/document.xml',
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{paragraph_xml}</w:body></w:document>',
+        )
+    return buf.getvalue()
+
+
+class DocxRenderTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+
+        self.teacher = User.objects.create_user(
+            username='teacher_docx',
+            password='Pass1234!',
+            user_type='teacher',
+        )
+        self.student = User.objects.create_user(
+            username='student_docx',
+            password='Pass1234!',
+            user_type='student',
+        )
+        self.course = Course.objects.create(title='Curso', description='Desc', instructor=self.teacher)
+        Enrollment.objects.create(student=self.student, course=self.course, status='approved')
+        self.unit = Unit.objects.create(title='Unidad', course=self.course, created_by=self.teacher, order=1)
+        self.tema = Tema.objects.create(
+            title='Tema', description='Desc', unit=self.unit, created_by=self.teacher, order=1,
+        )
+        self.assignment = Assignment.objects.create(
+            title='Tarea',
+            description='Desc',
+            tema=self.tema,
+            course=self.course,
+            created_by=self.teacher,
+            due_date=timezone.now() + timedelta(days=1),
+        )
+        self.submission = AssignmentSubmission.objects.create(
+            assignment=self.assignment,
+            student=self.student,
+        )
+
+    def _attach(self, name, content):
+        return AssignmentSubmissionFile.objects.create(
+            submission=self.submission,
+            file=SimpleUploadedFile(name, content),
+            original_filename=name,
+        )
+
+    def test_sanitize_html_drops_scripts_and_unsafe_links(self):
+        html = sanitize_html(
+            '<p onclick="x()">Hola<script>alert(1)</script></p>'
+            '<a href="javascript:alert(1)">a</a><a href="https://ejemplo.com">b</a>'
+        )
+        self.assertEqual(
+            html,
+            '<p>Hola</p><a>a</a>'
+            '<a href="https://ejemplo.com" rel="noopener noreferrer" target="_blank">b</a>',
+        )
+
+    def test_identical_files_are_converted_once(self):
+        content = _docx_bytes('<w:p><w:r><w:t>Informe final</w:t></w:r></w:p>')
+        first = self._attach('informe.docx', content)
+        second = self._attach('copia.docx', content)
+
+        self.assertEqual(render_pending(), (2, 0))
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.content_hash, second.content_hash)
+        self.assertEqual(DocxRender.objects.count(), 1)
+        self.assertEqual(DocxRender.objects.get().html, '<p>Informe final</p>')
+        self.assertEqual(render_pending(), (0, 0))
+
+    def test_html_fragment_supports_conditional_get(self):
+        att = self._attach('informe.docx', _docx_bytes('<w:p><w:r><w:t>Hola</w:t></w:r></w:p>'))
+        render_pending()
+        url = reverse('assignments:submission_attachment_docx_html', kwargs={
+            'course_id': self.course.id,
+            'unit_id': self.unit.id,
+            'tema_id': self.tema.id,
+            'assignment_id': self.assignment.id,
+            'submission_id': self.submission.id,
+            'attachment_id': att.id,
+        })
+        self.client.force_login(self.teacher)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode(), '<p>Hola</p>')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_unreadable_files_leave_the_queue(self):
+        att = self._attach('perdido.docx', b'x')
+        att.file.storage.delete(att.file.name)
+
+        self.assertEqual(render_pending(), (0, 1))
+        att.refresh_from_db()
+        self.assertTrue(att.docx_render_failed)
+        self.assertEqual(render_pending(), (0, 0))
+
+    def test_legacy_submission_file_is_hashed_once_and_prerendered(self):
+        self.submission.file = SimpleUploadedFile(
+            'viejo.docx', _docx_bytes('<w:p><w:r><w:t>Entrega vieja</w:t></w:r></w:p>'),
+        )
+        self.submission.save()
+
+        self.assertEqual(render_pending(), (1, 0))
+        self.submission.refresh_from_db()
+        render = DocxRender.objects.get(content_hash=self.submission.content_hash)
+        self.assertEqual(render.html, '<p>Entrega vieja</p>')
+        self.assertEqual(render_pending(), (0, 0))
+
+        url = reverse('assignments:submission_docx_html', kwargs={
+            'course_id': self.course.id,
+            'unit_id': self.unit.id,
+            'tema_id': self.tema.id,
+            'assignment_id': self.assignment.id,
+            'submission_id': self.submission.id,
+        })
+        self.client.force_login(self.teacher)
+        with mock.patch('assignments.services.docx_render.field_file_sha256') as sha256:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        sha256.assert_not_called()
+
+
+class SubmissionThreadPaginationTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_thread',
+            password='Pass1234!',
+            user_type='teacher',
+        )
+        self.student = User.objects.create_user(
+            username='student_thread',
+            password='Pass1234!',
+            user_type='student',
+        )
+        course = Course.objects.create(title='Curso', description='Desc', instructor=self.teacher)
+        Enrollment.objects.create(student=self.student, course=course, status='approved')
+        unit = Unit.objects.create(title='Unidad', course=course, created_by=self.teacher, order=1)
+        tema = Tema.objects.create(
+            title='Tema', description='Desc', unit=unit, created_by=self.teacher, order=1,
+        )
+        assignment = Assignment.objects.create(
+            title='Tarea',
+            description='Desc',
+            tema=tema,
+            course=course,
+            created_by=self.teacher,
+            due_date=timezone.now() + timedelta(days=1),
+        )
+        for version in range(1, 13):
+            self.latest = AssignmentSubmission.objects.create(
+                assignment=assignment,
+                student=self.student,
+                version=version,
+            )
+        AssignmentComment.objects.bulk_create([
+            AssignmentComment(submission=self.latest, user=self.teacher, comment=f'Comentario {i}')
+            for i in range(25)
+        ])
+        self.kwargs = {
+            'course_id': course.id,
+            'unit_id': unit.id,
+            'tema_id': tema.id,
+            'assignment_id': assignment.id,
+            'submission_id': self.latest.id,
+        }
+
+    def test_detail_renders_first_page_and_endpoint_returns_the_rest(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse('assignments:submission_detail', kwargs=self.kwargs))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['versions']), 10)
+        self.assertEqual(response.context['versions_next_cursor'], 3)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 20)
+        self.assertEqual(comments[-1].comment, 'Comentario 24')
+
+        thread_url = reverse('assignments:submission_thread_page', kwargs=self.kwargs)
+        data = self.client.get(thread_url, {'kind': 'comments', 'before': comments[0].id}).json()
+        self.assertIsNone(data['next_cursor'])
+        self.assertIn('Comentario 0', data['html'])
+        self.assertNotIn('Comentario 5', data['html'])
+
+        data = self.client.get(thread_url, {'kind': 'versions', 'before': 3}).json()
+        self.assertIsNone(data['next_cursor'])
+        self.assertIn('v2', data['html'])
+        self.assertIn('v1', data['html'])
+
+
+class BulkFeedbackTests(TestCase):
+    def test_bulk_feedback_updates_only_changed_latest_submissions(self):
+        teacher = User.objects.create_user(username='teacher_bulk', password='Pass1234!', user_type='teacher')
+        course = Course.objects.create(title='Curso', description='Desc', instructor=teacher)
+        unit = Unit.objects.create(title='Unidad', course=course, created_by=teacher, order=1)
+        tema = Tema.objects.create(title='Tema', description='Desc', unit=unit, created_by=teacher, order=1)
+        assignment = Assignment.objects.create(
+            title='Tarea',
+            description='Desc',
+            tema=tema,
+            course=course,
+            created_by=teacher,
+            due_date=timezone.now() + timedelta(days=1),
+        )
+        latest = []
+        for i in range(3):
+            student = User.objects.create_user(username=f'student_bulk{i}', password='Pass1234!', user_type='student')
+            Enrollment.objects.create(student=student, course=course, status='approved')
+            AssignmentSubmission.objects.create(assignment=assignment, student=student, version=1)
+            latest.append(AssignmentSubmission.objects.create(assignment=assignment, student=student, version=2))
+
+        url = reverse('assignments:assignment_bulk_feedback', kwargs={
+            'course_id': course.id,
+            'unit_id': unit.id,
+            'tema_id': tema.id,
+            'assignment_id': assignment.id,
+        })
+        self.client.force_login(teacher)
+        response = self.client.get(url)
+        self.assertEqual([s.id for s in response.context['submissions']], [s.id for s in latest])
+
+        response = self.client.post(url, {
+            'submission_ids': [s.id for s in latest],
+            f'feedback_{latest[0].id}': 'Muy bien',
+            f'feedback_{latest[1].id}': 'Falta la conclusión',
+            f'resubmit_{latest[1].id}': '1',
+            f'feedback_{latest[2].id}': '',
+            'notify': '1',
+        })
+        self.assertEqual(response.status_code, 302)
+
+        first, second, third = AssignmentSubmission.objects.filter(pk__in=[s.id for s in latest]).order_by('pk')
+        self.assertEqual(first.feedback, 'Muy bien')
+        self.assertEqual(first.status, 'submitted')
+        self.assertEqual(first.feedback_given_by, teacher)
+        self.assertTrue(first.feedback_notification_pending)
+        self.assertTrue(second.needs_resubmission)
+        self.assertEqual(second.status, 'returned')
+        self.assertIsNone(third.feedback_given_at)
+        self.assertFalse(third.feedback_notification_pending)
+
+    def test_failing_notifications_stop_being_retried(self):
+        teacher = User.objects.create_user(username='teacher_notify', password='Pass1234!', user_type='teacher')
+        student = User.objects.create_user(username='student_notify', password='Pass1234!', user_type='student')
+        course = Course.objects.create(title='Curso', description='Desc', instructor=teacher)
+        Enrollment.objects.create(student=student, course=course, status='approved')
+        unit = Unit.objects.create(title='Unidad', course=course, created_by=teacher, order=1)
+        tema = Tema.objects.create(title='Tema', description='Desc', unit=unit, created_by=teacher, order=1)
+        assignment = Assignment.objects.create(
+            title='Tarea',
+            description='Desc',
+            tema=tema,
+            course=course,
+            created_by=teacher,
+            due_date=timezone.now() + timedelta(days=1),
+        )
+        submission = AssignmentSubmission.objects.create(
+            assignment=assignment,
+            student=student,
+            feedback='Bien',
+            feedback_given_at=timezone.now(),
+            feedback_notification_pending=True,
+        )
+
+        command = 'assignments.management.commands.send_feedback_notifications'
+        with mock.patch(f'{command}.MailgunClient') as client, \
+                mock.patch(f'{command}.notify_submission_feedback', return_value=False) as notify:
+            client.return_value.enabled = True
+            for _ in range(MAX_ATTEMPTS + 2):
+                call_command('send_feedback_notifications', stdout=io.StringIO())
+
+        self.assertEqual(notify.call_count, MAX_ATTEMPTS)
+        submission.refresh_from_db()
+        self.assertTrue(submission.feedback_notification_pending)
+        self.assertEqual(submission.feedback_notification_attempts, MAX_ATTEMPTS)
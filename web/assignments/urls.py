@@ -11,6 +11,11 @@ urlpatterns = [
     path('courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/', views.assignment_detail, name='assignment_detail'),
     path('courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/edit/', views.assignment_edit, name='assignment_edit'),
     path('courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/delete/', views.assignment_delete, name='assignment_delete'),
+    path(
+        'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/feedback/bulk/',
+        views.assignment_bulk_feedback,
+        name='assignment_bulk_feedback',
+    ),
     path(
         'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/materials/upload/',
         views.assignment_material_upload,
@@ -30,6 +35,11 @@ urlpatterns = [
     # Submissions
     path('courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/upload/', views.submission_upload, name='submission_upload'),
     path('courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/submissions/<int:submission_id>/', views.submission_detail, name='submission_detail'),
+    path(
+        'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/submissions/<int:submission_id>/thread/',
+        views.submission_thread_page,
+        name='submission_thread_page',
+    ),
     path(
         'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/submissions/<int:submission_id>/attachment/<int:attachment_id>/view/',
         views.submission_attachment_view,
@@ -40,6 +50,11 @@ urlpatterns = [
         views.submission_attachment_download,
         name='submission_attachment_download',
     ),
+    path(
+        'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/submissions/<int:submission_id>/attachment/<int:attachment_id>/preview/',
+        views.submission_attachment_preview,
+        name='submission_attachment_preview',
+    ),
     path('courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/submissions/<int:submission_id>/view/', views.submission_view, name='submission_view'),
     path(
         'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/submissions/<int:submission_id>/docx-viewer/',
@@ -51,6 +66,16 @@ urlpatterns = [
         views.submission_docx_viewer,
         name='submission_attachment_docx_viewer',
     ),
+    path(
+        'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/submissions/<int:submission_id>/docx-html/',
+        views.submission_docx_html,
+        name='submission_docx_html',
+    ),
+    path(
+        'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/submissions/<int:submission_id>/attachment/<int:attachment_id>/docx-html/',
+        views.submission_docx_html,
+        name='submission_attachment_docx_html',
+    ),
     path('courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/submissions/<int:submission_id>/feedback/', views.submission_feedback, name='submission_feedback'),
     path('courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/assignments/<int:assignment_id>/submissions/<int:submission_id>/download/', views.submission_download, name='submission_download'),
     
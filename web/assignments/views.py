@@ -3,10 +3,13 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
-from django.db.models import Q, Count, Exists, OuterRef
+from django.db.models import Q, Count, Exists, F, OuterRef, Subquery
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from django.http import HttpResponse, Http404
+from django.http import HttpResponse, HttpResponseForbidden, Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.urls import reverse
 from datetime import datetime, time
 import json
@@ -21,8 +24,11 @@ from .models import (
     AssignmentCollaborator,
     AssignmentComment,
 )
+from .services.docx_render import is_docx_name, render_field_file
+from core.services.previews import preview_response
 from .forms import AssignmentForm, SubmissionForm, FeedbackForm, CollaboratorForm, CommentForm
 from courses.models import Course, Enrollment
+from courses.services.access import user_enrolled_in_course
 from units.models import Unit, Tema
 from accounts.models import UserActivityLog
 from accounts.activity import log_user_activity
@@ -69,6 +75,47 @@ def _resolve_submission_file_field(submission, attachment_id=None):
     return None, None
 
 
+SUBMISSION_VERSIONS_PAGE_SIZE = 10
+SUBMISSION_COMMENTS_PAGE_SIZE = 20
+
+
+def _submission_versions_page(submission, before=None):
+    """
+    Versiones del mismo alumno/tarea de a una página, de la más nueva a la más vieja.
+    Cursor = número de versión (usa el índice único assignment+student+version).
+    Devuelve (versiones, cursor siguiente o None).
+    """
+    qs = AssignmentSubmission.objects.filter(
+        assignment_id=submission.assignment_id,
+        student_id=submission.student_id,
+    ).prefetch_related('attachment_files').order_by('-version')
+    if before is not None:
+        qs = qs.filter(version__lt=before)
+    rows = list(qs[:SUBMISSION_VERSIONS_PAGE_SIZE + 1])
+    has_more = len(rows) > SUBMISSION_VERSIONS_PAGE_SIZE
+    rows = rows[:SUBMISSION_VERSIONS_PAGE_SIZE]
+    return rows, (rows[-1].version if has_more else None)
+
+
+def _submission_comments_page(submission, before=None):
+    """
+    Los comentarios top-level más recientes (anteriores al id `before`), en orden cronológico.
+    Cursor = id del comentario más viejo mostrado. Devuelve (comentarios, cursor o None).
+    """
+    qs = AssignmentComment.objects.filter(
+        submission=submission,
+        parent_comment__isnull=True,
+    ).select_related('user').prefetch_related('replies__user').order_by('-id')
+    if before is not None:
+        qs = qs.filter(id__lt=before)
+    rows = list(qs[:SUBMISSION_COMMENTS_PAGE_SIZE + 1])
+    has_more = len(rows) > SUBMISSION_COMMENTS_PAGE_SIZE
+    rows = rows[:SUBMISSION_COMMENTS_PAGE_SIZE]
+    next_cursor = rows[-1].id if has_more else None
+    rows.reverse()
+    return rows, next_cursor
+
+
 def _http_response_from_uploaded_file(field_file, filename, *, inline):
     """Lee desde almacenamiento (local o remoto) y arma HttpResponse."""
     with field_file.open('rb') as f:
@@ -266,12 +313,7 @@ def assignment_list(request, course_id, unit_id, tema_id):
     if request.user.is_teacher() or request.user.user_type == 'admin':
         can_view = True
     elif request.user.is_student():
-        enrollment = Enrollment.objects.filter(
-            student=request.user,
-            course=course,
-            status='approved'
-        ).first()
-        can_view = enrollment is not None and tema.is_visible_to_students()
+        can_view = user_enrolled_in_course(request.user, course) and tema.is_visible_to_students()
     
     if not can_view:
         messages.error(request, 'No tienes permiso para ver las tareas de este tema.')
@@ -301,8 +343,7 @@ def assignment_list(request, course_id, unit_id, tema_id):
     
     # Check if user can manage assignments
     can_manage = (
-        course.instructor == request.user or
-        request.user in course.collaborators.all() or
+        course.is_instructor_or_collaborator(request.user) or
         request.user.user_type == 'admin'
     )
     
@@ -326,8 +367,7 @@ def assignment_create(request, course_id, unit_id, tema_id):
     
     # Check permissions
     can_manage = (
-        course.instructor == request.user or
-        request.user in course.collaborators.all() or
+        course.is_instructor_or_collaborator(request.user) or
         request.user.user_type == 'admin'
     )
     
@@ -513,12 +553,7 @@ def assignment_detail(request, course_id, unit_id, tema_id, assignment_id):
     if request.user.is_teacher() or request.user.user_type == 'admin':
         can_view = True
     elif request.user.is_student():
-        enrollment = Enrollment.objects.filter(
-            student=request.user,
-            course=course,
-            status='approved'
-        ).first()
-        can_view = enrollment is not None and assignment.is_active and assignment.is_published and tema.is_visible_to_students()
+        can_view = user_enrolled_in_course(request.user, course) and assignment.is_active and assignment.is_published and tema.is_visible_to_students()
     
     if not can_view:
         messages.error(request, 'No tienes permiso para ver esta tarea.')
@@ -641,13 +676,7 @@ def submission_upload(request, course_id, unit_id, tema_id, assignment_id):
         return redirect('assignments:assignment_detail', course_id=course_id, unit_id=unit_id, tema_id=tema_id, assignment_id=assignment_id)
     
     # Check if enrolled
-    enrollment = Enrollment.objects.filter(
-        student=request.user,
-        course=course,
-        status='approved'
-    ).first()
-    
-    if not enrollment:
+    if not user_enrolled_in_course(request.user, course):
         messages.error(request, 'Debes estar inscrito y aprobado en el curso para entregar tareas.')
         return redirect('assignments:assignment_detail', course_id=course_id, unit_id=unit_id, tema_id=tema_id, assignment_id=assignment_id)
     
@@ -748,16 +777,12 @@ def submission_detail(request, course_id, unit_id, tema_id, assignment_id, submi
         messages.error(request, 'No tienes permiso para ver esta entrega.')
         return redirect('assignments:assignment_detail', course_id=course_id, unit_id=unit_id, tema_id=tema_id, assignment_id=assignment_id)
     
-    # Get all versions of this submission (latest first)
-    all_versions = AssignmentSubmission.objects.filter(
-        assignment=assignment,
-        student=submission.student
-    ).prefetch_related('attachment_files').order_by('-version')
+    # Primera página de versiones (más reciente primero); las anteriores se cargan por cursor.
+    versions, versions_next_cursor = _submission_versions_page(submission)
 
     # Redirect to the latest version unless explicitly browsing history
-    latest_submission = all_versions.first()
+    latest_submission = versions[0] if versions else None
     if latest_submission and submission.id != latest_submission.id and not request.GET.get('v'):
-        from django.urls import reverse
         latest_url = reverse(
             'assignments:submission_detail',
             kwargs={
@@ -781,11 +806,8 @@ def submission_detail(request, course_id, unit_id, tema_id, assignment_id, submi
     
     can_manage = assignment.can_be_managed_by(request.user)
     
-    # Get all comments for this submission (top-level only, replies loaded via prefetch)
-    comments = AssignmentComment.objects.filter(
-        submission=submission,
-        parent_comment__isnull=True
-    ).select_related('user').prefetch_related('replies__user').order_by('created_at')
+    # Últimos comentarios (top-level, con sus respuestas); los anteriores se cargan por cursor.
+    comments, comments_next_cursor = _submission_comments_page(submission)
     
     # Check if user can comment (student owner, collaborator, or teacher/admin)
     can_comment = False
@@ -826,17 +848,79 @@ def submission_detail(request, course_id, unit_id, tema_id, assignment_id, submi
         'tema': tema,
         'assignment': assignment,
         'submission': submission,
-        'all_versions': all_versions,
+        'versions': versions,
+        'versions_next_cursor': versions_next_cursor,
+        'latest_version_id': latest_submission.id if latest_submission else None,
         'collaborators': collaborators,
         'can_manage': can_manage,
         'can_manage_collaborators': can_manage_collaborators,
         'comments': comments,
+        'comments_next_cursor': comments_next_cursor,
         'can_comment': can_comment,
         'comment_form': comment_form,
+        'thread_url': reverse('assignments:submission_thread_page', kwargs={
+            'course_id': course_id,
+            'unit_id': unit_id,
+            'tema_id': tema_id,
+            'assignment_id': assignment_id,
+            'submission_id': submission_id,
+        }),
     }
     return render(request, 'assignments/submission_detail.html', context)
 
 
+@login_required
+def submission_thread_page(request, course_id, unit_id, tema_id, assignment_id, submission_id):
+    """
+    JSON con la página anterior de versiones o comentarios de una entrega.
+    Parámetros: kind=versions|comments, before=<cursor devuelto por la página previa>.
+    """
+    course = get_object_or_404(Course, id=course_id)
+    unit = get_object_or_404(Unit, id=unit_id, course=course)
+    tema = get_object_or_404(Tema, id=tema_id, unit=unit)
+    assignment = get_object_or_404(Assignment, id=assignment_id, tema=tema, course=course)
+    submission = get_object_or_404(AssignmentSubmission, id=submission_id, assignment=assignment)
+
+    if request.user.is_student():
+        if submission.student != request.user:
+            return JsonResponse({'error': 'No tienes permiso para ver esta entrega.'}, status=403)
+    elif not (request.user.is_teacher() or request.user.user_type == 'admin'):
+        return JsonResponse({'error': 'No tienes permiso para ver esta entrega.'}, status=403)
+
+    try:
+        before = int(request.GET.get('before', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Cursor inválido.'}, status=400)
+
+    kind = request.GET.get('kind')
+    if kind == 'versions':
+        versions, next_cursor = _submission_versions_page(submission, before=before)
+        latest_id = (
+            AssignmentSubmission.objects
+            .filter(assignment_id=submission.assignment_id, student_id=submission.student_id)
+            .order_by('-version')
+            .values_list('id', flat=True)
+            .first()
+        )
+        html = render_to_string('assignments/_submission_version_rows.html', {
+            'versions': versions,
+            'submission': submission,
+            'latest_version_id': latest_id,
+            'course': course,
+            'unit': unit,
+            'tema': tema,
+            'assignment': assignment,
+        }, request=request)
+    elif kind == 'comments':
+        comments, next_cursor = _submission_comments_page(submission, before=before)
+        html = render_to_string('assignments/_submission_comments.html', {
+            'comments': comments,
+        }, request=request)
+    else:
+        return JsonResponse({'error': 'Tipo inválido.'}, status=400)
+    return JsonResponse({'html': html, 'next_cursor': next_cursor})
+
+
 @login_required
 @require_http_methods(["GET", "POST"])
 def submission_feedback(request, course_id, unit_id, tema_id, assignment_id, submission_id):
@@ -889,6 +973,98 @@ def submission_feedback(request, course_id, unit_id, tema_id, assignment_id, sub
     return render(request, 'assignments/submission_feedback.html', context)
 
 
+def _latest_submissions_for_assignment(assignment):
+    """Última versión de cada alumno para la tarea, en una sola consulta."""
+    latest_version = AssignmentSubmission.objects.filter(
+        assignment_id=OuterRef('assignment_id'),
+        student_id=OuterRef('student_id'),
+    ).order_by('-version').values('version')[:1]
+    return (
+        AssignmentSubmission.objects
+        .filter(assignment=assignment)
+        .annotate(latest_version=Subquery(latest_version))
+        .filter(version=F('latest_version'))
+        .select_related('student')
+        .prefetch_related('attachment_files')
+        .order_by('student__last_name', 'student__first_name', 'student__username')
+    )
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def assignment_bulk_feedback(request, course_id, unit_id, tema_id, assignment_id):
+    """
+    Devolución masiva: feedback y "requiere reentrega" para la última entrega de cada alumno.
+    Solo se actualizan (con un bulk_update) las filas que cambiaron; los avisos por correo
+    quedan encolados para el comando send_feedback_notifications.
+    """
+    course = get_object_or_404(Course, id=course_id)
+    unit = get_object_or_404(Unit, id=unit_id, course=course)
+    tema = get_object_or_404(Tema, id=tema_id, unit=unit)
+    assignment = get_object_or_404(Assignment, id=assignment_id, tema=tema, course=course)
+
+    if not assignment.can_be_managed_by(request.user):
+        messages.error(request, 'No tienes permiso para dar feedback en esta tarea.')
+        return redirect('assignments:assignment_detail', course_id=course_id, unit_id=unit_id, tema_id=tema_id, assignment_id=assignment_id)
+
+    submissions = list(_latest_submissions_for_assignment(assignment))
+
+    if request.method == 'POST':
+        posted_ids = set()
+        for raw in request.POST.getlist('submission_ids'):
+            try:
+                posted_ids.add(int(raw))
+            except (TypeError, ValueError):
+                continue
+        notify = request.POST.get('notify') == '1'
+        now = timezone.now()
+        changed = []
+        for submission in submissions:
+            if submission.id not in posted_ids:
+                continue
+            feedback = request.POST.get(f'feedback_{submission.id}', '').strip()
+            needs_resubmission = request.POST.get(f'resubmit_{submission.id}') == '1'
+            if feedback == (submission.feedback or '') and needs_resubmission == submission.needs_resubmission:
+                continue
+            submission.feedback = feedback
+            submission.needs_resubmission = needs_resubmission
+            submission.status = 'returned' if needs_resubmission else 'submitted'
+            submission.feedback_given_at = now
+            submission.feedback_given_by = request.user
+            if notify:
+                submission.feedback_notification_pending = True
+                submission.feedback_notification_attempts = 0
+            changed.append(submission)
+
+        if changed:
+            with transaction.atomic():
+                AssignmentSubmission.objects.bulk_update(
+                    changed,
+                    [
+                        'feedback',
+                        'needs_resubmission',
+                        'status',
+                        'feedback_given_at',
+                        'feedback_given_by',
+                        'feedback_notification_pending',
+                        'feedback_notification_attempts',
+                    ],
+                    batch_size=200,
+                )
+            messages.success(request, f'Devolución guardada en {len(changed)} entrega(s).')
+        else:
+            messages.info(request, 'No hubo cambios para guardar.')
+        return redirect('assignments:assignment_bulk_feedback', course_id=course_id, unit_id=unit_id, tema_id=tema_id, assignment_id=assignment_id)
+
+    return render(request, 'assignments/assignment_bulk_feedback.html', {
+        'course': course,
+        'unit': unit,
+        'tema': tema,
+        'assignment': assignment,
+        'submissions': submissions,
+    })
+
+
 @login_required
 @require_http_methods(["GET", "POST"])
 def collaborator_add(request, course_id, unit_id, tema_id, assignment_id, submission_id):
@@ -1045,6 +1221,30 @@ def submission_attachment_download(request, course_id, unit_id, tema_id, assignm
     )
 
 
+@login_required
+def submission_attachment_preview(request, course_id, unit_id, tema_id, assignment_id, submission_id, attachment_id):
+    """Miniatura de un adjunto (imagen o primera página del PDF) para el listado docente."""
+    course = get_object_or_404(Course, id=course_id)
+    unit = get_object_or_404(Unit, id=unit_id, course=course)
+    tema = get_object_or_404(Tema, id=tema_id, unit=unit)
+    assignment = get_object_or_404(Assignment, id=assignment_id, tema=tema, course=course)
+    submission = get_object_or_404(AssignmentSubmission, id=submission_id, assignment=assignment)
+
+    if request.user.is_student():
+        if submission.student != request.user:
+            return HttpResponseForbidden('No tienes permiso para ver esta entrega.')
+    elif not (request.user.is_teacher() or request.user.user_type == 'admin'):
+        return HttpResponseForbidden('No tienes permiso para ver esta entrega.')
+
+    att = get_object_or_404(AssignmentSubmissionFile, pk=attachment_id, submission_id=submission.pk)
+    if not att.preview:
+        raise Http404('Vista previa no encontrada.')
+    try:
+        return preview_response(request, att.preview)
+    except FileNotFoundError:
+        raise Http404('Vista previa no encontrada.') from None
+
+
 @login_required
 def submission_docx_viewer(request, course_id, unit_id, tema_id, assignment_id, submission_id, attachment_id=None):
     course = get_object_or_404(Course, id=course_id)
@@ -1068,12 +1268,20 @@ def submission_docx_viewer(request, course_id, unit_id, tema_id, assignment_id,
     kwargs = dict(course_id=course_id, unit_id=unit_id, tema_id=tema_id, assignment_id=assignment_id, submission_id=submission_id)
     if attachment_id is not None:
         kwargs['attachment_id'] = attachment_id
-        file_url = reverse('assignments:submission_attachment_view', kwargs=kwargs)
+        html_url = reverse('assignments:submission_attachment_docx_html', kwargs=kwargs)
         download_url = reverse('assignments:submission_attachment_download', kwargs=kwargs)
     else:
-        file_url = reverse('assignments:submission_view', kwargs=kwargs)
+        html_url = reverse('assignments:submission_docx_html', kwargs=kwargs)
         download_url = reverse('assignments:submission_download', kwargs=kwargs)
 
+    is_docx = is_docx_name(filename)
+    if is_docx:
+        log_user_activity(
+            action=UserActivityLog.ACTION_SUBMISSION_VIEWED,
+            actor=request.user,
+            details=f'Entrega visualizada de tarea "{assignment.title}"',
+        )
+
     return render(request, 'assignments/docx_viewer.html', {
         'course': course,
         'unit': unit,
@@ -1081,12 +1289,53 @@ def submission_docx_viewer(request, course_id, unit_id, tema_id, assignment_id,
         'assignment': assignment,
         'submission': submission,
         'filename': filename,
-        'file_url': file_url,
+        'html_url': html_url,
         'download_url': download_url,
-        'is_docx': filename.lower().endswith('.docx'),
+        'is_docx': is_docx,
     })
 
 
+@login_required
+def submission_docx_html(request, course_id, unit_id, tema_id, assignment_id, submission_id, attachment_id=None):
+    """
+    Fragmento HTML del .docx ya convertido en el servidor (caché por hash de contenido).
+    Responde 304 si el navegador ya tiene esa versión (ETag = hash del archivo).
+    """
+    course = get_object_or_404(Course, id=course_id)
+    unit = get_object_or_404(Unit, id=unit_id, course=course)
+    tema = get_object_or_404(Tema, id=tema_id, unit=unit)
+    assignment = get_object_or_404(Assignment, id=assignment_id, tema=tema, course=course)
+    submission = get_object_or_404(AssignmentSubmission, id=submission_id, assignment=assignment)
+
+    if request.user.is_student():
+        if submission.student != request.user:
+            return HttpResponseForbidden('No tienes permiso para ver esta entrega.')
+    elif not (request.user.is_teacher() or request.user.user_type == 'admin'):
+        return HttpResponseForbidden('No tienes permiso para ver esta entrega.')
+
+    ff, filename = _resolve_submission_file_field(submission, attachment_id)
+    if not ff or not is_docx_name(filename):
+        raise Http404('Archivo no encontrado.')
+
+    try:
+        docx_render = render_field_file(ff)
+    except FileNotFoundError:
+        raise Http404('Archivo no encontrado.') from None
+
+    etag = f'"{docx_render.content_hash}"'
+    last_modified = docx_render.created_at.timestamp()
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if docx_render.error:
+            response = HttpResponse(status=422)
+        else:
+            response = HttpResponse(docx_render.html, content_type='text/html; charset=utf-8')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 def _assignment_material_redirect_kwargs(course_id, unit_id, tema_id, assignment_id):
     return {
         'course_id': course_id,
@@ -17,6 +17,7 @@ from reportlab.lib.pagesizes import landscape, letter
 from reportlab.pdfgen import canvas
 
 from courses.models import Course, Enrollment
+from courses.services.access import user_enrolled_in_course
 from .models import AttendanceSession, AttendanceRecord
 
 
@@ -401,13 +402,7 @@ def attendance_student_view(request, course_id):
         messages.error(request, 'Esta página es solo para estudiantes.')
         return redirect('course_detail', course_id=course.id)
 
-    enrollment = Enrollment.objects.filter(
-        course=course,
-        student=request.user,
-        status='approved'
-    ).first()
-
-    if not enrollment:
+    if not user_enrolled_in_course(request.user, course):
         messages.error(request, 'No tienes acceso a la asistencia de este curso.')
         return redirect('course_detail', course_id=course.id)
 
@@ -4,8 +4,8 @@ from django.template.response import TemplateResponse
 from django.urls import path
 from django.utils.html import format_html
 from django.core.cache import cache
-from django.conf import settings
-from .models import StorageConfig
+from django.utils import timezone
+from .models import StorageConfig, MediaDirectoryState, MediaFile
 from .services.storage import get_storage_usage, check_storage_threshold
 
 
@@ -114,39 +114,27 @@ class StorageConfigAdmin(admin.ModelAdmin):
         from django.shortcuts import redirect
         return redirect('admin:core_storageconfig_changelist')
 
-    def _get_used_file_paths(self):
-        """Devuelve el conjunto de rutas relativas a MEDIA_ROOT de todos los archivos en uso."""
-        from materials.models import Material
-        from assignments.models import AssignmentSubmission, AssignmentSubmissionFile
-
-        used = set()
-        for name in Material.objects.exclude(file='').exclude(file=None).values_list('file', flat=True):
-            if name:
-                used.add(name)
-        for name in AssignmentSubmission.objects.exclude(file='').exclude(file=None).values_list('file', flat=True):
-            if name:
-                used.add(name)
-        for name in AssignmentSubmissionFile.objects.exclude(file='').exclude(file=None).values_list('file', flat=True):
-            if name:
-                used.add(name)
-        return used
-
-    def _scan_media_files(self):
-        """Escanea MEDIA_ROOT y devuelve lista de rutas relativas de todos los archivos."""
-        media_root = settings.MEDIA_ROOT
-        result = []
-        if not os.path.isdir(media_root):
-            return result
-        for dirpath, _dirnames, filenames in os.walk(media_root):
-            for filename in filenames:
-                abs_path = os.path.join(dirpath, filename)
-                rel_path = os.path.relpath(abs_path, media_root)
-                result.append(rel_path)
-        return result
-
     def orphaned_files_view(self, request):
-        """Vista para detectar y eliminar archivos huérfanos del storage."""
+        """
+        Vista para detectar y eliminar archivos huérfanos del storage.
+        El listado sale del índice core.MediaFile; los botones de reconciliación
+        actualizan el índice (incremental o escaneo completo de recuperación).
+        """
         from django.contrib import messages as dj_messages
+        from django.core.files.storage import default_storage
+        from django.shortcuts import redirect
+        from .services.media_index import orphan_files, reconcile, referenced_paths
+
+        if request.method == 'POST' and ('reconcile' in request.POST or 'full_rescan' in request.POST):
+            full = 'full_rescan' in request.POST
+            stats = reconcile(full=full)
+            dj_messages.success(
+                request,
+                f'Índice {"reconstruido" if full else "actualizado"}: '
+                f'{stats["directories_scanned"]} directorios revisados, '
+                f'{stats["added"]} archivos nuevos, {stats["removed"]} quitados.',
+            )
+            return redirect('admin:core_storageconfig_orphaned_files')
 
         deleted_count = 0
         deleted_size = 0
@@ -154,28 +142,29 @@ class StorageConfigAdmin(admin.ModelAdmin):
 
         if request.method == 'POST':
             files_to_delete = request.POST.getlist('files_to_delete')
-            # Doble validación: re-chequear que siguen siendo huérfanos
-            used = self._get_used_file_paths()
-            media_root = settings.MEDIA_ROOT
+            # Doble validación: re-chequear solo las rutas elegidas contra la BD
+            safe_paths = []
             for rel_path in files_to_delete:
                 # Normalizar path para evitar traversal
-                safe_path = os.path.normpath(rel_path)
+                safe_path = os.path.normpath(rel_path).replace('\\', '/')
                 if safe_path.startswith('..') or os.path.isabs(safe_path):
                     errors.append(f'Ruta inválida ignorada: {rel_path}')
                     continue
+                safe_paths.append(safe_path)
+            used = referenced_paths(safe_paths)
+            for safe_path in safe_paths:
                 if safe_path in used:
-                    errors.append(f'Archivo en uso (no se eliminó): {rel_path}')
+                    errors.append(f'Archivo en uso (no se eliminó): {safe_path}')
                     continue
-                abs_path = os.path.join(media_root, safe_path)
-                if not os.path.isfile(abs_path):
+                if not default_storage.exists(safe_path):
                     continue
                 try:
-                    size = os.path.getsize(abs_path)
-                    os.remove(abs_path)
+                    size = default_storage.size(safe_path)
+                    default_storage.delete(safe_path)
                     deleted_count += 1
                     deleted_size += size
                 except Exception as e:
-                    errors.append(f'Error al eliminar {rel_path}: {e}')
+                    errors.append(f'Error al eliminar {safe_path}: {e}')
 
             if deleted_count:
                 mb = deleted_size / (1024 * 1024)
@@ -184,42 +173,44 @@ class StorageConfigAdmin(admin.ModelAdmin):
                 for err in errors:
                     dj_messages.warning(request, err)
 
-            from django.shortcuts import redirect
             return redirect('admin:core_storageconfig_orphaned_files')
 
-        # GET: escanear y calcular huérfanos
-        used = self._get_used_file_paths()
-        all_files = self._scan_media_files()
-        media_root = settings.MEDIA_ROOT
-
+        # GET: huérfanos según el índice
         orphans = []
-        for rel_path in all_files:
-            if rel_path not in used:
-                abs_path = os.path.join(media_root, rel_path)
-                try:
-                    size = os.path.getsize(abs_path)
-                    mtime = os.path.getmtime(abs_path)
-                    import datetime
-                    orphans.append({
-                        'path': rel_path,
-                        'size_kb': round(size / 1024, 1),
-                        'modified': datetime.datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M'),
-                    })
-                except OSError:
-                    pass
-
-        total_orphan_size = sum(o['size_kb'] for o in orphans)
+        total_orphan_bytes = 0
+        for f in orphan_files():
+            total_orphan_bytes += f.size
+            orphans.append({
+                'path': f.path,
+                'size_kb': round(f.size / 1024, 1),
+                'modified': timezone.localtime(f.modified_at).strftime('%Y-%m-%d %H:%M') if f.modified_at else '',
+            })
+
+        last_scan = MediaDirectoryState.objects.order_by('-scanned_at').values_list('scanned_at', flat=True).first()
 
         context = {
             **self.admin_site.each_context(request),
             'title': 'Archivos Huérfanos del Storage',
             'orphans': orphans,
-            'total_orphan_size_kb': round(total_orphan_size, 1),
-            'total_orphan_size_mb': round(total_orphan_size / 1024, 2),
+            'total_orphan_size_kb': round(total_orphan_bytes / 1024, 1),
+            'total_orphan_size_mb': round(total_orphan_bytes / (1024 * 1024), 2),
+            'last_scan': last_scan,
         }
         return TemplateResponse(request, 'admin/core/storageconfig/orphaned_files.html', context)
 
 
+@admin.register(MediaFile)
+class MediaFileAdmin(admin.ModelAdmin):
+    list_display = ['path', 'size', 'is_referenced', 'modified_at', 'indexed_at']
+    list_filter = ['is_referenced', 'directory']
+    search_fields = ['path']
+    readonly_fields = ['path', 'directory', 'size', 'modified_at', 'is_referenced', 'indexed_at']
+
+    def has_add_permission(self, request):
+        # El índice lo mantienen el storage y el reconciliador
+        return False
+
+
 # Agregar un enlace en el admin para acceder a la vista de uso
 admin.site.site_header = "Marina Ojeda LMS - Administración"
 admin.site.index_title = "Panel de Control"
@@ -0,0 +1,32 @@
+"""
+Genera las miniaturas de imágenes y de la primera página de PDFs (materiales y entregas).
+
+Uso:
+  python manage.py generate_previews              # hasta 100 archivos por modelo
+  python manage.py generate_previews --limit 0    # todos los pendientes
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.services.previews import generate_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera vistas previas livianas (JPEG) junto a los archivos originales '
+        'para que los listados no descarguen el archivo completo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Máximo de archivos por modelo en esta corrida (0 = sin límite).',
+        )
+
+    def handle(self, *args, **options):
+        stats = generate_pending(limit=options['limit'] or None)
+        for model_name, (done, skipped) in stats.items():
+            self.stdout.write(f'{model_name}: generadas {done} | sin vista previa {skipped}')
+        self.stdout.write(self.style.SUCCESS('Vistas previas actualizadas.'))
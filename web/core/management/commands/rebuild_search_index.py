@@ -0,0 +1,38 @@
+"""
+Rearma el índice del buscador (core.SearchDocument / core.SearchTerm) desde los modelos.
+
+Las señales lo mantienen al día; esto es para la carga inicial, después de importar datos
+con bulk_create/update (que no disparan señales) o si se cambia el tokenizador.
+
+Uso:
+  python manage.py rebuild_search_index
+  python manage.py rebuild_search_index --course 12
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.search import rebuild
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Rearma el índice del buscador (foro, materiales y tareas).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help='Solo este curso (id).')
+
+    def handle(self, *args, **options):
+        course_id = options['course']
+        if course_id is not None and not Course.objects.filter(pk=course_id).exists():
+            raise CommandError(f'No existe el curso {course_id}.')
+        started = time.perf_counter()
+        stats = rebuild(course_id=course_id)
+        self.stdout.write(
+            f'Publicaciones: {stats["forum_post"]} | respuestas: {stats["forum_reply"]} | '
+            f'materiales: {stats["material"]} | tareas: {stats["assignment"]}'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Índice rearmado en {time.perf_counter() - started:.1f}s.'
+        ))
@@ -0,0 +1,34 @@
+"""
+Sincroniza el índice de archivos de MEDIA_ROOT (core.MediaFile) con el disco.
+
+Uso:
+  python manage.py reconcile_media_index          # solo directorios modificados
+  python manage.py reconcile_media_index --full   # escaneo completo de recuperación
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.services.media_index import orphan_files, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Actualiza el índice de archivos del storage recorriendo solo los directorios '
+        'que cambiaron desde la última corrida (o todo MEDIA_ROOT con --full).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recorrer todo MEDIA_ROOT y recalcular referencias (recuperación).',
+        )
+
+    def handle(self, *args, **options):
+        stats = reconcile(full=options['full'])
+        self.stdout.write(
+            f'Directorios revisados: {stats["directories_scanned"]} | '
+            f'sin cambios: {stats["directories_skipped"]} | '
+            f'archivos nuevos: {stats["added"]} | quitados: {stats["removed"]}'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Huérfanos en el índice: {orphan_files().count()}'))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaDirectoryState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True, verbose_name='Directorio')),
+                ('mtime', models.FloatField(verbose_name='mtime')),
+                ('scanned_at', models.DateTimeField(auto_now=True, verbose_name='Escaneado en')),
+            ],
+            options={
+                'verbose_name': 'Estado de directorio del storage',
+                'verbose_name_plural': 'Estados de directorios del storage',
+            },
+        ),
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True, verbose_name='Ruta relativa')),
+                ('directory', models.CharField(db_index=True, max_length=255, verbose_name='Directorio')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Tamaño (bytes)')),
+                ('modified_at', models.DateTimeField(blank=True, null=True, verbose_name='Modificado en')),
+                ('is_referenced', models.BooleanField(db_index=True, default=False, help_text='Hay un material o una entrega que apunta a este archivo', verbose_name='En uso')),
+                ('indexed_at', models.DateTimeField(auto_now=True, verbose_name='Indexado en')),
+            ],
+            options={
+                'verbose_name': 'Archivo del storage',
+                'verbose_name_plural': 'Archivos del storage',
+                'ordering': ['path'],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_mediadirectorystate_mediafile'),
+        ('courses', '0004_set_existing_courses_enrollment_open'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('forum_post', 'Publicación del foro'), ('forum_reply', 'Respuesta del foro'), ('material', 'Material'), ('assignment', 'Tarea')], max_length=20, verbose_name='Tipo')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='ID del objeto')),
+                ('title', models.CharField(max_length=200, verbose_name='Título')),
+                ('excerpt', models.TextField(blank=True, verbose_name='Extracto')),
+                ('updated_at', models.DateTimeField(verbose_name='Actualizado en')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='courses.course', verbose_name='Curso')),
+            ],
+            options={
+                'verbose_name': 'Documento del buscador',
+                'verbose_name_plural': 'Documentos del buscador',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=40, verbose_name='Término')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='core.searchdocument', verbose_name='Documento')),
+            ],
+            options={
+                'verbose_name': 'Término del buscador',
+                'verbose_name_plural': 'Términos del buscador',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchdocument',
+            index=models.Index(fields=['course', '-updated_at'], name='search_doc_course_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchdocument',
+            unique_together={('kind', 'object_id')},
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'document'], name='search_term_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchterm',
+            unique_together={('document', 'term')},
+        ),
+    ]
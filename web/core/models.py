@@ -55,3 +55,104 @@ class StorageConfig(models.Model):
             raise ValidationError("Solo puede haber una configuración de almacenamiento.")
         self.full_clean()
         super().save(*args, **kwargs)
+
+
+class MediaFile(models.Model):
+    """
+    Índice de los archivos presentes en MEDIA_ROOT.
+    Se mantiene al subir/borrar desde el storage y lo completa el reconciliador
+    incremental (reconcile_media_index), así los reportes de huérfanos no
+    necesitan recorrer el bucket.
+    """
+    path = models.CharField(max_length=255, unique=True, verbose_name="Ruta relativa")
+    directory = models.CharField(max_length=255, db_index=True, verbose_name="Directorio")
+    size = models.PositiveBigIntegerField(default=0, verbose_name="Tamaño (bytes)")
+    modified_at = models.DateTimeField(blank=True, null=True, verbose_name="Modificado en")
+    is_referenced = models.BooleanField(
+        default=False,
+        db_index=True,
+        verbose_name="En uso",
+        help_text="Hay un material o una entrega que apunta a este archivo"
+    )
+    indexed_at = models.DateTimeField(auto_now=True, verbose_name="Indexado en")
+
+    class Meta:
+        verbose_name = "Archivo del storage"
+        verbose_name_plural = "Archivos del storage"
+        ordering = ['path']
+
+    def __str__(self):
+        return self.path
+
+
+class MediaDirectoryState(models.Model):
+    """Último mtime visto de cada directorio de MEDIA_ROOT (para reconciliar solo lo que cambió)."""
+    path = models.CharField(max_length=255, unique=True, verbose_name="Directorio")
+    mtime = models.FloatField(verbose_name="mtime")
+    scanned_at = models.DateTimeField(auto_now=True, verbose_name="Escaneado en")
+
+    class Meta:
+        verbose_name = "Estado de directorio del storage"
+        verbose_name_plural = "Estados de directorios del storage"
+
+    def __str__(self):
+        return self.path or '.'
+
+
+class SearchDocument(models.Model):
+    """
+    Entrada del buscador: una publicación o respuesta del foro, un material o una tarea.
+    La mantienen las señales de core.signals (y rebuild_search_index); los permisos no se
+    copian acá, core.services.search los resuelve contra los modelos originales.
+    """
+    KIND_CHOICES = [
+        ('forum_post', 'Publicación del foro'),
+        ('forum_reply', 'Respuesta del foro'),
+        ('material', 'Material'),
+        ('assignment', 'Tarea'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Tipo")
+    object_id = models.PositiveBigIntegerField(verbose_name="ID del objeto")
+    course = models.ForeignKey(
+        'courses.Course',
+        on_delete=models.CASCADE,
+        related_name='search_documents',
+        verbose_name="Curso",
+    )
+    title = models.CharField(max_length=200, verbose_name="Título")
+    excerpt = models.TextField(blank=True, verbose_name="Extracto")
+    updated_at = models.DateTimeField(verbose_name="Actualizado en")
+
+    class Meta:
+        verbose_name = "Documento del buscador"
+        verbose_name_plural = "Documentos del buscador"
+        unique_together = ['kind', 'object_id']
+        indexes = [
+            models.Index(fields=['course', '-updated_at'], name='search_doc_course_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
+
+
+class SearchTerm(models.Model):
+    """Índice invertido: una fila por palabra normalizada de cada documento."""
+    document = models.ForeignKey(
+        SearchDocument,
+        on_delete=models.CASCADE,
+        related_name='terms',
+        verbose_name="Documento",
+    )
+    term = models.CharField(max_length=40, verbose_name="Término")
+
+    class Meta:
+        verbose_name = "Término del buscador"
+        verbose_name_plural = "Términos del buscador"
+        unique_together = ['document', 'term']
+        indexes = [
+            models.Index(fields=['term', 'document'], name='search_term_idx'),
+        ]
+
+    def __str__(self):
+        return self.term
@@ -443,3 +443,39 @@ def notify_assignment_published(assignment):
             sent_count += 1
     
     return sent_count
+
+
+def notify_submission_feedback(submission):
+    """
+    Avisa al estudiante que su entrega recibió una devolución.
+    Devuelve True si el correo se envió (o no corresponde enviarlo).
+    """
+    student = submission.student
+    if not _can_receive_student_email(student):
+        return True
+
+    from django.conf import settings
+
+    assignment = submission.assignment
+    tema = assignment.tema
+    submission_url = (
+        f"{settings.SITE_URL if hasattr(settings, 'SITE_URL') else 'https://marinaojeda.ar'}"
+        f"/courses/{assignment.course_id}/units/{tema.unit_id}/temas/{tema.id}"
+        f"/assignments/{assignment.id}/submissions/{submission.id}/"
+    )
+    context = {
+        "recipient_name": _full_name_or_username(student),
+        "assignment": assignment,
+        "course": assignment.course,
+        "submission": submission,
+        "submission_url": submission_url,
+        "project_name": "Marina Ojeda LMS",
+    }
+    html = render_to_string("emails/submission_feedback.html", context)
+    return MailgunClient().send_message(
+        to_email=student.email,
+        subject=f"Devolución de la tarea: {assignment.title}",
+        text=strip_tags(html),
+        html=html,
+        tags=["assignment", "feedback"],
+    )
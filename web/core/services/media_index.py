@@ -0,0 +1,277 @@
+"""
+Índice de archivos de MEDIA_ROOT (tabla core.MediaFile).
+
+- IndexedFileSystemStorage registra cada archivo al guardarlo y lo quita al borrarlo.
+- Las señales de Material / entregas marcan como «en uso» los archivos referenciados.
+- reconcile() recorre solo los directorios cuyo mtime cambió desde la última corrida
+  (o todo MEDIA_ROOT con full=True, como recuperación ante desajustes).
+
+Así el reporte de huérfanos sale de una consulta indexada en vez de escanear el bucket OCI.
+"""
+import logging
+import os
+import posixpath
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# (app_label, modelo, campo) cuyos FileField cuentan como referencia a un archivo.
+REFERENCE_SOURCES = (
+    ('materials', 'Material', 'file'),
+    ('materials', 'Material', 'preview'),
+    ('assignments', 'AssignmentSubmission', 'file'),
+    ('assignments', 'AssignmentSubmissionFile', 'file'),
+    ('assignments', 'AssignmentSubmissionFile', 'preview'),
+)
+
+# Tamaño de lote para consultas `file__in` / bulk_create.
+BATCH_SIZE = 500
+
+
+def normalize_path(name):
+    """Ruta relativa a MEDIA_ROOT con separador '/' (como la guarda FileField)."""
+    return str(name).replace('\\', '/').lstrip('/')
+
+
+def _chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _stat_to_fields(st):
+    return {
+        'size': st.st_size,
+        'modified_at': datetime.fromtimestamp(st.st_mtime, tz=dt_timezone.utc),
+    }
+
+
+def referenced_paths(paths=None):
+    """
+    Devuelve el conjunto de rutas referenciadas por algún FileField.
+    Si se pasa `paths`, solo consulta esas rutas (en lotes) en lugar de traer todas las tablas.
+    """
+    from django.apps import apps
+
+    found = set()
+    if paths is not None:
+        paths = [normalize_path(p) for p in paths]
+        if not paths:
+            return found
+    for app_label, model_name, field in REFERENCE_SOURCES:
+        model = apps.get_model(app_label, model_name)
+        base = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+        if paths is None:
+            batches = [base]
+        else:
+            batches = [base.filter(**{f'{field}__in': chunk}) for chunk in _chunks(paths)]
+        for qs in batches:
+            for name in qs.values_list(field, flat=True):
+                if name:
+                    found.add(normalize_path(name))
+    return found
+
+
+def index_file(name, referenced=None):
+    """Crea o actualiza la fila del índice para `name` leyendo tamaño y mtime del disco."""
+    from core.models import MediaFile
+
+    path = normalize_path(name)
+    abs_path = os.path.join(settings.MEDIA_ROOT, path)
+    try:
+        st = os.stat(abs_path)
+    except OSError:
+        MediaFile.objects.filter(path=path).delete()
+        return None
+    defaults = {'directory': posixpath.dirname(path), **_stat_to_fields(st)}
+    if referenced is not None:
+        defaults['is_referenced'] = referenced
+    obj, _ = MediaFile.objects.update_or_create(path=path, defaults=defaults)
+    return obj
+
+
+def forget_file(name):
+    from core.models import MediaFile
+
+    MediaFile.objects.filter(path=normalize_path(name)).delete()
+
+
+def mark_referenced(*names):
+    """
+    Marca archivos como en uso cuando la transacción que los referencia se confirma.
+    Si el archivo es anterior al índice, lo indexa en ese momento.
+    """
+    paths = [normalize_path(n) for n in names if n]
+    if not paths:
+        return
+
+    def _apply():
+        from core.models import MediaFile
+
+        try:
+            updated = set(
+                MediaFile.objects.filter(path__in=paths).values_list('path', flat=True)
+            )
+            MediaFile.objects.filter(path__in=updated).update(is_referenced=True)
+            for path in set(paths) - updated:
+                index_file(path, referenced=True)
+        except Exception as e:
+            logger.warning(f"No se pudo actualizar el índice de archivos: {e}")
+
+    transaction.on_commit(_apply)
+
+
+def orphan_files(prefix=''):
+    """Archivos indexados que ninguna fila referencia (opcionalmente bajo un prefijo)."""
+    from core.models import MediaFile
+
+    qs = MediaFile.objects.filter(is_referenced=False)
+    if prefix:
+        qs = qs.filter(path__startswith=normalize_path(prefix))
+    return qs.order_by('path')
+
+
+def _sync_directory(rel_dir, files_on_disk, full):
+    """Aplica al índice el listado de un directorio. Devuelve (agregados, eliminados)."""
+    from core.models import MediaFile
+
+    existing = {row.path: row for row in MediaFile.objects.filter(directory=rel_dir)}
+    removed = [p for p in existing if p not in files_on_disk]
+    if removed:
+        for chunk in _chunks(removed):
+            MediaFile.objects.filter(path__in=chunk).delete()
+
+    new_paths = [p for p in files_on_disk if p not in existing]
+    if full:
+        to_check = list(files_on_disk)
+    else:
+        # Los no referenciados se re-verifican: su fila pudo confirmarse después del alta.
+        to_check = new_paths + [
+            p for p, row in existing.items()
+            if p in files_on_disk and not row.is_referenced
+        ]
+    refs = referenced_paths(to_check) if to_check else set()
+
+    MediaFile.objects.bulk_create(
+        [
+            MediaFile(
+                path=p,
+                directory=rel_dir,
+                is_referenced=p in refs,
+                **_stat_to_fields(files_on_disk[p]),
+            )
+            for p in new_paths
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+    checked = set(to_check)
+    changed = []
+    for p, row in existing.items():
+        st = files_on_disk.get(p)
+        if st is None:
+            continue
+        fields = _stat_to_fields(st)
+        is_ref = (p in refs) if p in checked else row.is_referenced
+        if row.size != fields['size'] or row.modified_at != fields['modified_at'] or row.is_referenced != is_ref:
+            row.size = fields['size']
+            row.modified_at = fields['modified_at']
+            row.is_referenced = is_ref
+            changed.append(row)
+    if changed:
+        MediaFile.objects.bulk_update(
+            changed, ['size', 'modified_at', 'is_referenced'], batch_size=BATCH_SIZE
+        )
+    return len(new_paths), len(removed)
+
+
+def reconcile(full=False):
+    """
+    Sincroniza el índice con el disco.
+
+    Incremental: hace stat de los directorios conocidos y solo lista los que cambiaron
+    de mtime (agregar/borrar/renombrar un archivo cambia el mtime de su directorio).
+    full=True: lista todo MEDIA_ROOT y recalcula las referencias (escaneo y diff de recuperación).
+    """
+    from core.models import MediaDirectoryState, MediaFile
+
+    stats = {'directories_scanned': 0, 'directories_skipped': 0, 'added': 0, 'removed': 0}
+    media_root = settings.MEDIA_ROOT
+    if not os.path.isdir(media_root):
+        return stats
+
+    known = dict(MediaDirectoryState.objects.values_list('path', 'mtime'))
+    children = {}
+    for p in known:
+        if p:
+            children.setdefault(posixpath.dirname(p), []).append(p)
+
+    seen = set()
+    pending = ['']
+    while pending:
+        rel_dir = pending.pop()
+        abs_dir = os.path.join(media_root, rel_dir) if rel_dir else media_root
+        try:
+            mtime = os.stat(abs_dir).st_mtime
+        except OSError:
+            continue
+        seen.add(rel_dir)
+
+        if not full and known.get(rel_dir) == mtime:
+            stats['directories_skipped'] += 1
+            pending.extend(children.get(rel_dir, []))
+            continue
+
+        files_on_disk = {}
+        try:
+            with os.scandir(abs_dir) as it:
+                for entry in it:
+                    rel = posixpath.join(rel_dir, entry.name) if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(rel)
+                        elif entry.is_file(follow_symlinks=False):
+                            files_on_disk[rel] = entry.stat(follow_symlinks=False)
+                    except OSError as e:
+                        logger.warning(f"No se pudo leer {rel}: {e}")
+        except OSError as e:
+            logger.error(f"No se pudo listar el directorio {abs_dir}: {e}")
+            continue
+
+        added, removed = _sync_directory(rel_dir, files_on_disk, full)
+        stats['added'] += added
+        stats['removed'] += removed
+        stats['directories_scanned'] += 1
+        MediaDirectoryState.objects.update_or_create(path=rel_dir, defaults={'mtime': mtime})
+
+    gone = [p for p in known if p not in seen]
+    if gone:
+        stats['removed'] += MediaFile.objects.filter(directory__in=gone).delete()[0]
+        MediaDirectoryState.objects.filter(path__in=gone).delete()
+    if full:
+        stats['removed'] += MediaFile.objects.exclude(directory__in=seen).delete()[0]
+    return stats
+
+
+class IndexedFileSystemStorage(FileSystemStorage):
+    """FileSystemStorage que mantiene core.MediaFile al guardar y borrar archivos."""
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        try:
+            index_file(name)
+        except Exception as e:
+            logger.warning(f"No se pudo indexar el archivo {name}: {e}")
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        try:
+            forget_file(name)
+        except Exception as e:
+            logger.warning(f"No se pudo quitar del índice el archivo {name}: {e}")
@@ -0,0 +1,189 @@
+"""
+Vistas previas livianas (JPEG ~320px) de imágenes y de la primera página de PDFs.
+
+- Se guardan junto al original: `materials/abc.pdf` -> `materials/abc.pdf.preview.jpg`.
+  Si ese nombre ya existe, el storage elige otro libre: nunca se pisa un archivo ajeno.
+- El comando `generate_previews` (cron) procesa los archivos pendientes; los listados
+  muestran la miniatura en lugar de descargar el archivo completo.
+- Imágenes con Pillow; PDFs con `pdftoppm` (poppler-utils). Si no está instalado,
+  los PDFs quedan sin vista previa.
+"""
+import logging
+import os
+import posixpath
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_SIZE = (320, 320)
+PREVIEW_QUALITY = 75
+PREVIEW_SUFFIX = '.preview.jpg'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp')
+PDF_EXTENSIONS = ('.pdf',)
+PDF_TIMEOUT_SECONDS = 30
+
+# (app_label, modelo) con campos `file`, `preview` y `preview_generated_at`.
+PREVIEW_SOURCES = (
+    ('materials', 'Material'),
+    ('assignments', 'AssignmentSubmissionFile'),
+)
+
+
+def preview_name_for(name):
+    # Con la extensión original: abc.pdf y abc.png no comparten vista previa.
+    return name + PREVIEW_SUFFIX
+
+
+def supports_preview(name):
+    return bool(name) and str(name).lower().endswith(IMAGE_EXTENSIONS + PDF_EXTENSIONS)
+
+
+def _thumbnail_jpeg(image):
+    from PIL import Image, ImageOps
+
+    image.draft('RGB', PREVIEW_SIZE)
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(PREVIEW_SIZE)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    out = BytesIO()
+    image.save(out, 'JPEG', quality=PREVIEW_QUALITY, optimize=True)
+    return out.getvalue()
+
+
+def _image_preview(field_file):
+    from PIL import Image
+
+    with field_file.open('rb') as f:
+        with Image.open(f) as image:
+            return _thumbnail_jpeg(image)
+
+
+def _pdf_preview(field_file):
+    from PIL import Image
+
+    pdftoppm = shutil.which('pdftoppm')
+    if not pdftoppm:
+        logger.info('pdftoppm no está instalado; se omite la vista previa de PDFs.')
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            source = field_file.path
+        except NotImplementedError:
+            source = os.path.join(tmp, 'source.pdf')
+            with field_file.open('rb') as src, open(source, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        prefix = os.path.join(tmp, 'page')
+        subprocess.run(
+            [
+                pdftoppm, '-f', '1', '-l', '1', '-singlefile',
+                '-scale-to', str(max(PREVIEW_SIZE)), '-jpeg', source, prefix,
+            ],
+            check=True,
+            capture_output=True,
+            timeout=PDF_TIMEOUT_SECONDS,
+        )
+        with Image.open(prefix + '.jpg') as image:
+            return _thumbnail_jpeg(image)
+
+
+def build_preview(field_file):
+    """Bytes JPEG de la vista previa, o None si el tipo no se puede previsualizar."""
+    name = field_file.name.lower()
+    if name.endswith(IMAGE_EXTENSIONS):
+        return _image_preview(field_file)
+    if name.endswith(PDF_EXTENSIONS):
+        return _pdf_preview(field_file)
+    return None
+
+
+def generate_preview(instance):
+    """Genera (o regenera) la vista previa de una fila y la guarda junto al original."""
+    from core.services.media_index import mark_referenced
+
+    model = type(instance)
+    preview_name = ''
+    try:
+        data = build_preview(instance.file)
+    except Exception as e:
+        logger.warning(f"No se pudo generar la vista previa de {instance.file.name}: {e}")
+        data = None
+    if data:
+        # Solo se borra la vista previa propia de la fila, nunca lo que haya en el destino.
+        if instance.preview and instance.preview.name != instance.file.name:
+            default_storage.delete(instance.preview.name)
+        preview_name = default_storage.save(preview_name_for(instance.file.name), ContentFile(data))
+        mark_referenced(preview_name)
+    model.objects.filter(pk=instance.pk).update(
+        preview=preview_name,
+        preview_generated_at=timezone.now(),
+    )
+    instance.preview.name = preview_name
+    return preview_name
+
+
+def pending_previews(model):
+    extensions = Q()
+    for ext in IMAGE_EXTENSIONS + PDF_EXTENSIONS:
+        extensions |= Q(file__iendswith=ext)
+    return (
+        model.objects
+        .filter(preview_generated_at__isnull=True)
+        .exclude(file='')
+        .exclude(file__isnull=True)
+        .filter(extensions)
+        .order_by('pk')
+    )
+
+
+def generate_pending(limit=None):
+    """Procesa los archivos sin vista previa de cada modelo. Devuelve {modelo: (generadas, omitidas)}."""
+    from django.apps import apps
+
+    stats = {}
+    for app_label, model_name in PREVIEW_SOURCES:
+        model = apps.get_model(app_label, model_name)
+        qs = pending_previews(model).only('pk', 'file', 'preview')
+        if limit:
+            qs = qs[:limit]
+        done = skipped = 0
+        for instance in qs.iterator():
+            if generate_preview(instance):
+                done += 1
+            else:
+                skipped += 1
+        stats[model_name] = (done, skipped)
+    return stats
+
+
+def delete_preview(instance):
+    """Borra el archivo de vista previa (al borrar o reemplazar el original)."""
+    if instance.preview:
+        instance.preview.delete(save=False)
+
+
+def preview_response(request, field_file):
+    """Sirve la miniatura con ETag para que el navegador la reutilice sin volver a bajarla."""
+    etag = f'"{posixpath.basename(field_file.name)}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        with field_file.open('rb') as f:
+            response = HttpResponse(f.read(), content_type='image/jpeg')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=86400)
+    return response
@@ -0,0 +1,299 @@
+"""
+Buscador de publicaciones y respuestas del foro, materiales y tareas.
+
+- Índice invertido propio (SearchDocument + SearchTerm), portable entre MariaDB y SQLite:
+  cada documento guarda sus palabras normalizadas (minúsculas, sin tildes, sin palabras
+  vacías). core.signals lo mantiene al guardar/borrar y rebuild() lo arma de cero.
+- search() busca cada palabra de la consulta como prefijo (range scan sobre el índice
+  (term, document)), solo en los cursos a los que el usuario tiene acceso, y resuelve la
+  visibilidad contra los modelos originales con una consulta por tipo: los permisos no se
+  copian al índice, así que pausas, publicaciones o privacidad nunca quedan desfasadas.
+"""
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+
+from django.db.models import Q
+from django.urls import reverse
+
+from core.models import SearchDocument, SearchTerm
+
+MAX_TERM_LENGTH = 40
+MAX_QUERY_TERMS = 6
+MAX_DOCUMENT_TERMS = 2000
+EXCERPT_LENGTH = 300
+CANDIDATE_LIMIT = 200
+RESULT_LIMIT = 30
+BATCH_SIZE = 500
+
+STOPWORDS = frozenset(
+    'al con de del el en es la las lo los para por que se su un una y'.split()
+)
+_WORD_RE = re.compile(r'\w+')
+
+SearchResult = namedtuple('SearchResult', ['kind', 'kind_label', 'title', 'excerpt', 'course', 'url'])
+
+
+def tokenize(text):
+    """Palabras normalizadas de `text`, sin repetir y en orden de aparición."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    terms = {}
+    for word in _WORD_RE.findall(text):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        terms.setdefault(word[:MAX_TERM_LENGTH], None)
+    return list(terms)
+
+
+# --- Fuentes indexadas ---
+
+def _forum_post_fields(post):
+    return post.course_id, post.title, post.content, post.updated_at
+
+
+def _forum_reply_fields(reply):
+    post = reply.post
+    return post.course_id, f'Re: {post.title}'[:200], reply.content, reply.updated_at
+
+
+def _material_fields(material):
+    return material.course_id, material.title, material.description, material.uploaded_at
+
+
+def _assignment_fields(assignment):
+    return assignment.course_id, assignment.title, assignment.description, assignment.updated_at
+
+
+def _sources():
+    """kind -> (queryset base para reconstruir, campo de curso, extractor de campos)."""
+    from assignments.models import Assignment
+    from forums.models import ForumPost, ForumReply
+    from materials.models import Material
+
+    return {
+        'forum_post': (ForumPost.objects.all(), 'course_id', _forum_post_fields),
+        'forum_reply': (ForumReply.objects.select_related('post'), 'post__course_id', _forum_reply_fields),
+        'material': (Material.objects.all(), 'course_id', _material_fields),
+        'assignment': (Assignment.objects.all(), 'course_id', _assignment_fields),
+    }
+
+
+def _document_values(kind, obj):
+    course_id, title, body, updated_at = _sources()[kind][2](obj)
+    # El título de una respuesta es el del post: solo se indexa su contenido.
+    text = body if kind == 'forum_reply' else f'{title} {body}'
+    return {
+        'course_id': course_id,
+        'title': title,
+        'excerpt': (body or '')[:EXCERPT_LENGTH],
+        'updated_at': updated_at,
+    }, tokenize(text)[:MAX_DOCUMENT_TERMS]
+
+
+def index_object(kind, obj):
+    """Crea o actualiza el documento de `obj` y reemplaza solo los términos que cambiaron."""
+    values, terms = _document_values(kind, obj)
+    document, _ = SearchDocument.objects.update_or_create(kind=kind, object_id=obj.pk, defaults=values)
+    current = set(SearchTerm.objects.filter(document=document).values_list('term', flat=True))
+    wanted = set(terms)
+    if current - wanted:
+        SearchTerm.objects.filter(document=document, term__in=current - wanted).delete()
+    SearchTerm.objects.bulk_create(
+        [SearchTerm(document=document, term=term) for term in wanted - current],
+        ignore_conflicts=True,
+    )
+    if kind == 'forum_post':
+        # Las respuestas se muestran con el título del post.
+        SearchDocument.objects.filter(
+            kind='forum_reply',
+            object_id__in=obj.replies.values('pk'),
+        ).update(title=f'Re: {obj.title}'[:200])
+
+
+def remove_object(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild(course_id=None, batch_size=BATCH_SIZE):
+    """Rearma el índice (completo o de un curso). Devuelve {kind: documentos indexados}."""
+    stale = SearchDocument.objects.all()
+    if course_id is not None:
+        stale = stale.filter(course_id=course_id)
+    stale.delete()
+
+    stats = {}
+    for kind, (qs, course_field, _) in _sources().items():
+        if course_id is not None:
+            qs = qs.filter(**{course_field: course_id})
+        stats[kind] = 0
+        batch = []
+        for obj in qs.order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                stats[kind] += _index_batch(kind, batch)
+                batch = []
+        if batch:
+            stats[kind] += _index_batch(kind, batch)
+    return stats
+
+
+def _index_batch(kind, objects):
+    prepared = {obj.pk: _document_values(kind, obj) for obj in objects}
+    SearchDocument.objects.filter(kind=kind, object_id__in=prepared).delete()
+    SearchDocument.objects.bulk_create([
+        SearchDocument(kind=kind, object_id=pk, **values) for pk, (values, _) in prepared.items()
+    ])
+    document_ids = dict(
+        SearchDocument.objects.filter(kind=kind, object_id__in=prepared).values_list('object_id', 'pk')
+    )
+    SearchTerm.objects.bulk_create(
+        [
+            SearchTerm(document_id=document_ids[pk], term=term)
+            for pk, (_, terms) in prepared.items()
+            for term in terms
+        ],
+        batch_size=BATCH_SIZE * 4,
+    )
+    return len(prepared)
+
+
+# --- Búsqueda ---
+
+def _visible_forum_posts(ids, user, managed):
+    from forums.models import ForumPost
+
+    qs = ForumPost.objects.filter(pk__in=ids)
+    if managed is not None:
+        qs = qs.filter(
+            Q(course_id__in=managed) | Q(is_private=False) | Q(student_participant=user)
+        )
+    return {pk: reverse('forum_detail', args=[pk]) for pk in qs.values_list('pk', flat=True)}
+
+
+def _visible_forum_replies(ids, user, managed):
+    from forums.models import ForumReply
+
+    qs = ForumReply.objects.filter(pk__in=ids)
+    if managed is not None:
+        qs = qs.filter(
+            Q(post__course_id__in=managed)
+            | Q(post__is_private=False)
+            | Q(post__student_participant=user)
+        )
+    return {
+        pk: f"{reverse('forum_detail', args=[post_id])}#reply-{pk}"
+        for pk, post_id in qs.values_list('pk', 'post_id')
+    }
+
+
+def _student_content_q():
+    """Tema, unidad y curso visibles para alumnos (mismas reglas que el dashboard)."""
+    return Q(
+        tema__is_paused=False,
+        tema__unit__is_paused=False,
+        course__is_active=True,
+        course__is_paused=False,
+    )
+
+
+def _visible_materials(ids, user, managed):
+    from materials.models import Material
+
+    qs = Material.objects.filter(pk__in=ids)
+    if managed is not None:
+        qs = qs.filter(
+            Q(course_id__in=managed)
+            | (
+                Q(is_published=True, visibility__in=['public', 'enrolled'])
+                & _student_content_q()
+                & (Q(assignment__isnull=True) | Q(assignment__is_active=True, assignment__is_published=True))
+            )
+        )
+    urls = {}
+    for pk, course_id, unit_id, tema_id, assignment_id in qs.values_list(
+        'pk', 'course_id', 'tema__unit_id', 'tema_id', 'assignment_id',
+    ):
+        if assignment_id:
+            urls[pk] = reverse(
+                'assignments:assignment_detail', args=[course_id, unit_id, tema_id, assignment_id],
+            )
+        else:
+            urls[pk] = reverse('units:tema_detail', args=[course_id, unit_id, tema_id])
+    return urls
+
+
+def _visible_assignments(ids, user, managed):
+    from assignments.models import Assignment
+
+    qs = Assignment.objects.filter(pk__in=ids)
+    if managed is not None:
+        qs = qs.filter(
+            Q(course_id__in=managed)
+            | (Q(is_active=True, is_published=True) & _student_content_q())
+        )
+    return {
+        pk: reverse('assignments:assignment_detail', args=[course_id, unit_id, tema_id, pk])
+        for pk, course_id, unit_id, tema_id in qs.values_list(
+            'pk', 'course_id', 'tema__unit_id', 'tema_id',
+        )
+    }
+
+
+# kind -> resolver(ids, user, managed): {object_id: url} de lo que el usuario puede ver.
+# managed=None es un admin (ve todo); si no, los cursos que gestiona se ven completos y en el
+# resto se aplican las reglas de alumno.
+VISIBILITY_RESOLVERS = {
+    'forum_post': _visible_forum_posts,
+    'forum_reply': _visible_forum_replies,
+    'material': _visible_materials,
+    'assignment': _visible_assignments,
+}
+
+
+def search(user, query, course_id=None, limit=RESULT_LIMIT):
+    """Resultados visibles para `user`, del más reciente al más antiguo."""
+    from courses.services.access import get_course_access
+
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+    documents = SearchDocument.objects.all()
+    if course_id is not None:
+        documents = documents.filter(course_id=course_id)
+    if user.user_type == 'admin':
+        managed = None
+    else:
+        access = get_course_access(user)
+        managed = access.managed
+        documents = documents.filter(course_id__in=access.managed | access.enrolled)
+    for term in terms:
+        documents = documents.filter(
+            pk__in=SearchTerm.objects.filter(term__startswith=term).values('document_id')
+        )
+    candidates = list(documents.select_related('course').order_by('-updated_at', '-pk')[:CANDIDATE_LIMIT])
+
+    ids_by_kind = defaultdict(list)
+    for document in candidates:
+        ids_by_kind[document.kind].append(document.object_id)
+    urls = {
+        kind: VISIBILITY_RESOLVERS[kind](ids, user, managed)
+        for kind, ids in ids_by_kind.items()
+    }
+
+    results = []
+    for document in candidates:
+        url = urls[document.kind].get(document.object_id)
+        if url is None:
+            continue
+        results.append(SearchResult(
+            kind=document.kind,
+            kind_label=document.get_kind_display(),
+            title=document.title,
+            excerpt=document.excerpt,
+            course=document.course,
+            url=url,
+        ))
+        if len(results) >= limit:
+            break
+    return results
@@ -0,0 +1,28 @@
+"""Mantenimiento del índice del buscador (core.services.search)."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .services.search import index_object, remove_object
+
+_KINDS = {
+    'ForumPost': 'forum_post',
+    'ForumReply': 'forum_reply',
+    'Material': 'material',
+    'Assignment': 'assignment',
+}
+
+
+@receiver(post_save, sender='forums.ForumPost')
+@receiver(post_save, sender='forums.ForumReply')
+@receiver(post_save, sender='materials.Material')
+@receiver(post_save, sender='assignments.Assignment')
+def index_search_document(sender, instance, **kwargs):
+    index_object(_KINDS[sender.__name__], instance)
+
+
+@receiver(post_delete, sender='forums.ForumPost')
+@receiver(post_delete, sender='forums.ForumReply')
+@receiver(post_delete, sender='materials.Material')
+@receiver(post_delete, sender='assignments.Assignment')
+def remove_search_document(sender, instance, **kwargs):
+    remove_object(_KINDS[sender.__name__], instance.pk)
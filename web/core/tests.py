@@ -1,3 +1,265 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.models import MediaFile, SearchTerm
+from core.services.media_index import orphan_files, reconcile
+from core.services.previews import generate_pending, generate_preview, preview_name_for
+from core.services.search import rebuild, search
+from courses.models import Course, Enrollment
+from forums.models import ForumPost, ForumReply
+from materials.models import Material
+from units.models import Unit, Tema
+
+
+User = get_user_model()
+
+
+class MediaIndexTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def _make_material(self):
+        teacher = User.objects.create_user(
+            username='doc_media',
+            password='Pass1234!',
+            user_type='teacher',
+        )
+        course = Course.objects.create(title='Curso', description='Desc', instructor=teacher)
+        unit = Unit.objects.create(title='Unidad', course=course, created_by=teacher, order=1)
+        tema = Tema.objects.create(
+            title='Tema', description='Desc', unit=unit, created_by=teacher, order=1,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            return Material.objects.create(
+                title='Apunte',
+                course=course,
+                tema=tema,
+                uploaded_by=teacher,
+                material_type='file',
+                file=SimpleUploadedFile('apunte.pdf', b'%PDF-1.4 contenido'),
+            )
+
+    def test_storage_save_and_delete_maintain_index(self):
+        name = default_storage.save('materials/suelto.txt', ContentFile(b'hola'))
+        row = MediaFile.objects.get(path=name)
+        self.assertEqual(row.directory, 'materials')
+        self.assertEqual(row.size, 4)
+        self.assertFalse(row.is_referenced)
+
+        default_storage.delete(name)
+        self.assertFalse(MediaFile.objects.filter(path=name).exists())
+
+    def test_referenced_material_file_is_not_orphan(self):
+        material = self._make_material()
+        row = MediaFile.objects.get(path=material.file.name)
+        self.assertTrue(row.is_referenced)
+        self.assertEqual(list(orphan_files()), [])
+
+    def test_reconcile_picks_up_files_written_outside_storage(self):
+        material = self._make_material()
+        reconcile()
+        stray_dir = os.path.join(self.media_root, 'assignments', 'submissions')
+        os.makedirs(stray_dir)
+        with open(os.path.join(stray_dir, 'perdido.docx'), 'wb') as fh:
+            fh.write(b'x' * 10)
+
+        stats = reconcile()
+        self.assertEqual(stats['added'], 1)
+        self.assertEqual(
+            list(orphan_files().values_list('path', flat=True)),
+            ['assignments/submissions/perdido.docx'],
+        )
+        self.assertTrue(MediaFile.objects.get(path=material.file.name).is_referenced)
+
+        # Sin cambios en disco: no se vuelve a listar ningún directorio.
+        stats = reconcile()
+        self.assertEqual(stats['directories_scanned'], 0)
+
+    def test_full_reconcile_drops_rows_for_missing_files(self):
+        MediaFile.objects.create(path='materials/fantasma.pdf', directory='materials', size=1)
+        reconcile(full=True)
+        self.assertFalse(MediaFile.objects.filter(path='materials/fantasma.pdf').exists())
+
+    def test_orphan_command_rechecks_database_before_deleting(self):
+        material = self._make_material()
+        name = default_storage.save('assignments/submissions/entrega.pdf', ContentFile(b'%PDF'))
+        # Referencia escrita sin pasar por las señales: el índice sigue marcándolo huérfano.
+        Material.objects.filter(pk=material.pk).update(file=name)
+        self.assertTrue(orphan_files().filter(path=name).exists())
+
+        call_command('find_orphan_submission_files', delete=True, noinput=True, stdout=StringIO())
+        self.assertTrue(default_storage.exists(name))
+
+
+class PreviewTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        self.teacher = User.objects.create_user(
+            username='doc_preview',
+            password='Pass1234!',
+            user_type='teacher',
+        )
+        course = Course.objects.create(title='Curso', description='Desc', instructor=self.teacher)
+        unit = Unit.objects.create(title='Unidad', course=course, created_by=self.teacher, order=1)
+        tema = Tema.objects.create(
+            title='Tema', description='Desc', unit=unit, created_by=self.teacher, order=1,
+        )
+        self.material_kwargs = dict(
+            course=course, tema=tema, uploaded_by=self.teacher, material_type='file',
+        )
+
+    def _png(self, size=(1600, 1200)):
+        buf = BytesIO()
+        Image.new('RGBA', size, (200, 30, 30, 255)).save(buf, 'PNG')
+        return buf.getvalue()
+
+    def test_image_material_gets_small_preview_next_to_original(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            material = Material.objects.create(
+                title='Diagrama',
+                file=SimpleUploadedFile('diagrama.png', self._png()),
+                **self.material_kwargs,
+            )
+            texto = Material.objects.create(
+                title='Texto',
+                file=SimpleUploadedFile('notas.txt', b'sin vista previa'),
+                **self.material_kwargs,
+            )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stats = generate_pending()
+        self.assertEqual(stats['Material'], (1, 0))
+
+        material.refresh_from_db()
+        texto.refresh_from_db()
+        self.assertEqual(material.preview.name, preview_name_for(material.file.name))
+        self.assertIsNone(texto.preview_generated_at)
+        with Image.open(material.preview.path) as thumb:
+            self.assertLessEqual(max(thumb.size), 320)
+            self.assertEqual(thumb.format, 'JPEG')
+        self.assertFalse(orphan_files().filter(path=material.preview.name).exists())
+
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse('materials:material-preview', args=[material.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
+        preview_path = material.preview.path
+        material.delete()
+        self.assertFalse(os.path.exists(preview_path))
+
+    def test_previews_never_overwrite_other_files(self):
+        jpeg = BytesIO()
+        Image.new('RGB', (800, 600), (10, 120, 30)).save(jpeg, 'JPEG')
+        png_name = default_storage.save('materials/plano.png', ContentFile(self._png()))
+        jpg_name = default_storage.save('materials/plano.jpg', ContentFile(jpeg.getvalue()))
+        # Un archivo ajeno que ya ocupa el nombre de la vista previa.
+        foreign = default_storage.save('materials/plano.png.preview.jpg', ContentFile(b'no tocar'))
+        png = Material.objects.create(title='PNG', file=png_name, **self.material_kwargs)
+        jpg = Material.objects.create(title='JPG', file=jpg_name, **self.material_kwargs)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_pending()
+        png.refresh_from_db()
+        jpg.refresh_from_db()
+        self.assertNotEqual(png.preview.name, jpg.preview.name)
+        self.assertNotEqual(png.preview.name, foreign)
+        with default_storage.open(foreign) as f:
+            self.assertEqual(f.read(), b'no tocar')
+
+        # Regenerar reemplaza solo la vista previa propia.
+        old_preview = jpg.preview.name
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_preview(jpg)
+        self.assertTrue(default_storage.exists(jpg.preview.name))
+        self.assertTrue(default_storage.exists(png.preview.name))
+        self.assertEqual(jpg.preview.name, old_preview)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='doc_busca', password='Pass1234!', user_type='teacher')
+        self.student = User.objects.create_user(username='alu_busca', password='Pass1234!', user_type='student')
+        self.other = User.objects.create_user(username='alu_ajeno', password='Pass1234!', user_type='student')
+        self.course = Course.objects.create(title='Análisis', description='Desc', instructor=self.teacher)
+        for student in (self.student, self.other):
+            Enrollment.objects.create(student=student, course=self.course, status='approved')
+        unit = Unit.objects.create(title='Unidad', course=self.course, created_by=self.teacher, order=1)
+        self.tema = Tema.objects.create(
+            title='Tema', description='Desc', unit=unit, created_by=self.teacher, order=1, is_paused=False,
+        )
+        self.post = ForumPost.objects.create(
+            course=self.course, author=self.teacher, title='Ecuaciones diferenciales', content='Dudas del parcial',
+        )
+        self.reply = ForumReply.objects.create(post=self.post, author=self.student, content='¿Entra la ecuación logística?')
+        ForumPost.objects.create(
+            course=self.course, author=self.other, title='Consulta privada', content='Mi ecuación no da',
+            is_private=True, student_participant=self.other,
+        )
+        self._material('Guía de ecuaciones', is_published=True)
+        self._material('Borrador de ecuaciones', is_published=False)
+
+    def _material(self, title, is_published):
+        return Material.objects.create(
+            title=title, description='Ejercicios resueltos', course=self.course, tema=self.tema,
+            uploaded_by=self.teacher, material_type='link', link_url='https://example.com',
+            is_published=is_published,
+        )
+
+    def _titles(self, user, query='ecuacion'):
+        return sorted(r.title for r in search(user, query))
+
+    def test_results_respect_visibility(self):
+        self.assertEqual(
+            self._titles(self.student),
+            ['Ecuaciones diferenciales', 'Guía de ecuaciones', 'Re: Ecuaciones diferenciales'],
+        )
+        self.assertEqual(len(self._titles(self.teacher)), 5)
+        self.assertEqual(self._titles(self.student, 'ECUACIÓN logíst'), ['Re: Ecuaciones diferenciales'])
+
+        self.tema.is_paused = True
+        self.tema.save()
+        self.assertNotIn('Guía de ecuaciones', self._titles(self.student))
+
+        outsider = User.objects.create_user(username='alu_fuera', password='Pass1234!', user_type='student')
+        self.assertEqual(search(outsider, 'ecuacion'), [])
+
+    def test_index_follows_edits_and_rebuild(self):
+        self.post.title = 'Integrales'
+        self.post.save()
+        self.assertEqual(self._titles(self.student, 'integrales'), ['Integrales'])
+        self.assertEqual(self._titles(self.student, 'logistica'), ['Re: Integrales'])
+
+        self.reply.delete()
+        SearchTerm.objects.all().delete()
+        self.assertEqual(search(self.student, 'integrales'), [])
+        stats = rebuild()
+        self.assertEqual(stats['forum_post'], 2)
+        self.assertEqual(stats['forum_reply'], 0)
+        self.assertEqual(self._titles(self.student, 'integrales'), ['Integrales'])
+
+    def test_search_view(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('search'), {'q': 'logistica', 'course': self.course.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'#reply-{self.reply.id}')
@@ -0,0 +1,33 @@
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+
+from courses.models import Course
+from courses.services.access import get_course_access
+
+from .services.search import search as run_search
+
+
+@login_required
+def search(request):
+    """Buscador del foro, materiales y tareas de los cursos del usuario."""
+    user = request.user
+    if user.user_type == 'admin':
+        courses = Course.objects.all()
+    else:
+        access = get_course_access(user)
+        courses = Course.objects.filter(pk__in=access.managed | access.enrolled)
+    courses = list(courses.order_by('title').only('id', 'title'))
+
+    query = request.GET.get('q', '').strip()
+    try:
+        course_id = int(request.GET.get('course') or 0) or None
+    except ValueError:
+        course_id = None
+    results = run_search(user, query, course_id=course_id) if query else []
+
+    return render(request, 'core/search.html', {
+        'query': query,
+        'course_id': course_id,
+        'courses': courses,
+        'results': results,
+    })
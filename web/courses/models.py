@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
 from django.utils import timezone
 
 class Course(models.Model):
@@ -84,7 +86,11 @@ class Course(models.Model):
     
     def is_instructor_or_collaborator(self, user):
         """Check if user is the instructor or a collaborator of the course"""
-        return self.instructor == user or user in self.collaborators.all()
+        from courses.services.access import user_manages_course
+
+        if user is None or user.pk is None:
+            return False
+        return self.instructor_id == user.pk or user_manages_course(user, self.pk)
     
     def is_visible_to_students(self):
         """Check if course is visible to students (active and not paused)"""
@@ -148,3 +154,47 @@ class Enrollment(models.Model):
     def save(self, *args, **kwargs):
         self.clean()
         super().save(*args, **kwargs)
+
+
+# --- Caché de acceso por usuario (courses.services.access) ---
+
+@receiver(pre_save, sender=Course)
+def remember_previous_instructor(sender, instance, **kwargs):
+    instance._previous_instructor_id = None
+    if instance.pk:
+        instance._previous_instructor_id = (
+            Course.objects.filter(pk=instance.pk).values_list('instructor_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Course)
+def invalidate_access_on_instructor_change(sender, instance, **kwargs):
+    from courses.services.access import invalidate_course_access
+
+    previous = getattr(instance, '_previous_instructor_id', None)
+    if previous != instance.instructor_id:
+        invalidate_course_access(previous, instance.instructor_id)
+
+
+@receiver(m2m_changed, sender=Course.collaborators.through)
+def invalidate_access_on_collaborators_change(sender, instance, action, reverse, pk_set, **kwargs):
+    from courses.services.access import invalidate_course_access
+
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_course_access(instance.pk)
+        return
+    if action in ('post_add', 'post_remove'):
+        invalidate_course_access(*(pk_set or ()))
+    elif action == 'pre_clear':
+        instance._cleared_collaborator_ids = list(instance.collaborators.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        invalidate_course_access(*getattr(instance, '_cleared_collaborator_ids', ()))
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_access_on_enrollment_change(sender, instance, **kwargs):
+    from courses.services.access import invalidate_course_access
+
+    invalidate_course_access(instance.student_id)
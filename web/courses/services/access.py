@@ -0,0 +1,93 @@
+"""
+Cursos que un usuario gestiona (instructor o colaborador) y en los que está inscripto
+con inscripción aprobada, resueltos una vez por request.
+
+- get_course_access() guarda el resultado en la instancia del usuario (request.user vive lo
+  que dura el request, como la caché de permisos de ModelBackend) y en la caché compartida
+  por ACCESS_CACHE_TIMEOUT segundos, para que los requests siguientes no vuelvan a consultar.
+- Las señales de courses.models borran la entrada del usuario afectado al cambiar una
+  inscripción, el instructor o los colaboradores de un curso (y de nuevo al confirmarse
+  la transacción, como invalidate_course_outline).
+
+Course.is_instructor_or_collaborator, los can_be_managed_by de unidades, tareas y exámenes,
+los permisos del foro y los controles de inscripción leen de acá.
+"""
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import IntegerField, Q, Value
+
+ACCESS_CACHE_TIMEOUT = 60
+USER_CACHE_ATTR = '_course_access_cache'
+
+_MANAGED, _ENROLLED = 1, 2
+
+CourseAccess = namedtuple('CourseAccess', ['managed', 'enrolled'])
+NO_ACCESS = CourseAccess(frozenset(), frozenset())
+
+
+def cache_key(user_id):
+    return f'courses:access:{user_id}'
+
+
+def _load_course_access(user):
+    """Una sola consulta (UNION) para cursos gestionados e inscripciones aprobadas."""
+    from courses.models import Course, Enrollment
+
+    managed_qs = (
+        Course.objects
+        .filter(Q(instructor=user) | Q(collaborators=user))
+        .annotate(kind=Value(_MANAGED, output_field=IntegerField()))
+        .values_list('pk', 'kind')
+        .order_by()
+    )
+    enrolled_qs = (
+        Enrollment.objects
+        .filter(student=user, status='approved')
+        .annotate(kind=Value(_ENROLLED, output_field=IntegerField()))
+        .values_list('course_id', 'kind')
+        .order_by()
+    )
+    managed, enrolled = set(), set()
+    for course_id, kind in managed_qs.union(enrolled_qs):
+        (managed if kind == _MANAGED else enrolled).add(course_id)
+    return CourseAccess(frozenset(managed), frozenset(enrolled))
+
+
+def get_course_access(user):
+    if user is None or not getattr(user, 'is_authenticated', False) or user.pk is None:
+        return NO_ACCESS
+    access = getattr(user, USER_CACHE_ATTR, None)
+    if access is None:
+        key = cache_key(user.pk)
+        cached = cache.get(key)
+        if cached is None:
+            access = _load_course_access(user)
+            cache.set(key, (tuple(access.managed), tuple(access.enrolled)), ACCESS_CACHE_TIMEOUT)
+        else:
+            access = CourseAccess(frozenset(cached[0]), frozenset(cached[1]))
+        setattr(user, USER_CACHE_ATTR, access)
+    return access
+
+
+def _course_id(course):
+    return getattr(course, 'pk', course)
+
+
+def user_manages_course(user, course):
+    """Instructor o colaborador del curso (`course` puede ser instancia o id)."""
+    return _course_id(course) in get_course_access(user).managed
+
+
+def user_enrolled_in_course(user, course):
+    """Inscripción aprobada en el curso (`course` puede ser instancia o id)."""
+    return _course_id(course) in get_course_access(user).enrolled
+
+
+def invalidate_course_access(*user_ids):
+    """Borra las entradas ahora y otra vez al confirmar (evita recachear datos sin commit)."""
+    keys = [cache_key(uid) for uid in user_ids if uid]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
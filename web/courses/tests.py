@@ -1,3 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from courses.models import Course, Enrollment
+from courses.services.access import cache_key, get_course_access
+from forums.models import ForumPost
+
+
+User = get_user_model()
+
+
+class CourseAccessCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(username='doc_acceso', password='Pass1234!', user_type='teacher')
+        self.colleague = User.objects.create_user(username='colega', password='Pass1234!', user_type='teacher')
+        self.student = User.objects.create_user(username='alu_acceso', password='Pass1234!', user_type='student')
+        self.course = Course.objects.create(title='Curso', description='Desc', instructor=self.teacher)
+        self.other = Course.objects.create(title='Otro', description='Desc', instructor=self.colleague)
+
+    def test_checks_in_one_request_share_a_single_query(self):
+        self.other.collaborators.add(self.teacher)
+        post = ForumPost.objects.create(
+            course=self.other, author=self.colleague, title='Aviso', content='Hola',
+        )
+        with self.assertNumQueries(1):
+            self.assertTrue(self.other.is_instructor_or_collaborator(self.teacher))
+            self.assertTrue(post.can_view(self.teacher))
+            self.assertTrue(post.can_pin(self.teacher))
+            self.assertEqual(get_course_access(self.teacher).managed, {self.course.pk, self.other.pk})
+
+        # Otro request (otra instancia del usuario) lee de la caché compartida.
+        with self.assertNumQueries(0):
+            self.assertTrue(post.can_edit(User(pk=self.teacher.pk, user_type='teacher')))
+
+    def test_enrollment_and_collaborator_changes_invalidate_shared_entry(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course, status='pending')
+        self.assertEqual(get_course_access(User.objects.get(pk=self.student.pk)).enrolled, frozenset())
+
+        enrollment.status = 'approved'
+        enrollment.save()
+        self.assertEqual(get_course_access(User.objects.get(pk=self.student.pk)).enrolled, {self.course.pk})
+
+        self.assertFalse(self.course.is_instructor_or_collaborator(User.objects.get(pk=self.colleague.pk)))
+        self.course.collaborators.add(self.colleague)
+        self.assertTrue(self.course.is_instructor_or_collaborator(User.objects.get(pk=self.colleague.pk)))
+        self.course.collaborators.clear()
+        self.assertFalse(self.course.is_instructor_or_collaborator(User.objects.get(pk=self.colleague.pk)))
+
+        self.other.instructor = self.teacher
+        self.other.save()
+        self.assertEqual(get_course_access(User.objects.get(pk=self.colleague.pk)).managed, frozenset())
+
+    def test_entry_recached_before_commit_is_dropped_on_commit(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course, status='approved')
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.delete()
+            # Otro request lee las filas sin confirmar y vuelve a cachear el acceso viejo.
+            cache.set(cache_key(self.student.pk), ((), (self.course.pk,)), 60)
+        self.assertEqual(get_course_access(User.objects.get(pk=self.student.pk)).enrolled, frozenset())
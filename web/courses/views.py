@@ -137,8 +137,7 @@ class EnrollmentDetailView(generics.RetrieveUpdateAPIView):
         previous_status = instance.get_status_display()
         # Allow updating status for instructors, collaborators, or admins
         can_update = (
-            instance.course.instructor == request.user or
-            request.user in instance.course.collaborators.all() or
+            instance.course.is_instructor_or_collaborator(request.user) or
             request.user.user_type == 'admin'
         )
         
@@ -425,8 +424,7 @@ def course_detail(request, course_id):
     elif request.user.is_teacher() or request.user.user_type == 'admin':
         # Check if user can manage this course
         can_manage = (
-            course.instructor == request.user or
-            request.user in course.collaborators.all() or
+            course.is_instructor_or_collaborator(request.user) or
             request.user.user_type == 'admin'
         )
         context['can_manage'] = can_manage
@@ -452,8 +450,7 @@ def course_detail(request, course_id):
 def _can_manage_enrollment(user, course):
     """Instructor, colaboradores o admin pueden gestionar inscripción."""
     return (
-        course.instructor == user or
-        user in course.collaborators.all() or
+        course.is_instructor_or_collaborator(user) or
         user.user_type == 'admin'
     )
 
@@ -537,8 +534,7 @@ def enrollment_approve(request, course_id, enrollment_id):
     
     # Check permissions
     can_manage = (
-        course.instructor == request.user or
-        request.user in course.collaborators.all() or
+        course.is_instructor_or_collaborator(request.user) or
         request.user.user_type == 'admin'
     )
     
@@ -567,8 +563,7 @@ def enrollment_reject(request, course_id, enrollment_id):
     
     # Check permissions
     can_manage = (
-        course.instructor == request.user or
-        request.user in course.collaborators.all() or
+        course.is_instructor_or_collaborator(request.user) or
         request.user.user_type == 'admin'
     )
     
@@ -597,8 +592,7 @@ def enrollment_cancel(request, course_id, enrollment_id):
     
     # Check permissions
     can_manage = (
-        course.instructor == request.user or
-        request.user in course.collaborators.all() or
+        course.is_instructor_or_collaborator(request.user) or
         request.user.user_type == 'admin'
     )
     
@@ -14,7 +14,9 @@ class ForumPostAdmin(admin.ModelAdmin):
     list_display = ('title', 'course', 'author', 'is_private', 'is_pinned', 'is_locked', 'created_at')
     list_filter = ('course', 'is_private', 'is_pinned', 'is_locked')
     search_fields = ('title', 'content', 'author__username', 'course__title')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = (
+        'created_at', 'updated_at', 'activity_seq', 'reply_count', 'last_reply_at', 'last_reply_author',
+    )
     inlines = [ForumReplyInline]
 
 
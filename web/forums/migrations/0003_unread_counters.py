@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_activity_seq(apps, schema_editor):
+    # Una unidad por la creación del post más una por respuesta; las lecturas posteriores a la
+    # última actividad quedan al día. Los contadores por curso se arman solos al consultarlos.
+    ForumPost = apps.get_model('forums', 'ForumPost')
+    ForumPostRead = apps.get_model('forums', 'ForumPostRead')
+    ForumReply = apps.get_model('forums', 'ForumReply')
+    reply_counts = (
+        ForumReply.objects.filter(post=OuterRef('pk'))
+        .order_by().values('post').annotate(n=Count('pk')).values('n')
+    )
+    ForumPost.objects.update(
+        activity_seq=Coalesce(Subquery(reply_counts, output_field=IntegerField()), Value(0)) + 1
+    )
+    post = ForumPost.objects.filter(pk=OuterRef('post_id'))
+    ForumPostRead.objects.filter(
+        Exists(post.filter(last_activity_at__lte=OuterRef('last_read_at'))),
+    ).update(seen_seq=Subquery(post.values('activity_seq')[:1]))
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_set_existing_courses_enrollment_open'),
+        ('forums', '0002_forumpost_last_activity_at_forumpostread'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumpost',
+            name='activity_seq',
+            field=models.PositiveIntegerField(default=1, verbose_name='Secuencia de actividad'),
+        ),
+        migrations.AddField(
+            model_name='forumpostread',
+            name='seen_seq',
+            field=models.PositiveIntegerField(default=0, verbose_name='Secuencia leída'),
+        ),
+        migrations.CreateModel(
+            name='ForumUnreadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='No leídas')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forum_unread_counters', to='courses.course', verbose_name='Curso')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forum_unread_counters', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Contador de no leídos del Foro',
+                'verbose_name_plural': 'Contadores de no leídos del Foro',
+                'unique_together': {('user', 'course')},
+            },
+        ),
+        migrations.RunPython(backfill_activity_seq, noop_reverse),
+    ]
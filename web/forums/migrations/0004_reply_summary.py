@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_reply_summary(apps, schema_editor):
+    ForumPost = apps.get_model('forums', 'ForumPost')
+    ForumReply = apps.get_model('forums', 'ForumReply')
+    replies = ForumReply.objects.filter(post=OuterRef('pk'))
+    latest = replies.order_by('-created_at', '-pk')
+    ForumPost.objects.update(
+        reply_count=Coalesce(
+            Subquery(
+                replies.order_by().values('post').annotate(n=Count('pk')).values('n'),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+        last_reply_at=Subquery(latest.values('created_at')[:1]),
+        last_reply_author=Subquery(latest.values('author_id')[:1]),
+    )
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_set_existing_courses_enrollment_open'),
+        ('forums', '0003_unread_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumpost',
+            name='last_reply_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Última respuesta'),
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='last_reply_author',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Autor de la última respuesta'),
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Respuestas'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['course', 'is_private', '-is_pinned', '-last_activity_at', '-id'], name='forum_post_list_idx'),
+        ),
+        migrations.RunPython(backfill_reply_summary, noop_reverse),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_reply_paths(apps, schema_editor):
+    ForumReply = apps.get_model('forums', 'ForumReply')
+    parents = dict(ForumReply.objects.values_list('pk', 'parent_reply_id'))
+    paths = {}
+
+    def path_for(pk):
+        if pk not in paths:
+            parent_id = parents.get(pk)
+            prefix = path_for(parent_id) if parent_id in parents else ''
+            paths[pk] = prefix + '{:010d}/'.format(pk)
+        return paths[pk]
+
+    replies = []
+    for pk in parents:
+        replies.append(ForumReply(pk=pk, path=path_for(pk)))
+    ForumReply.objects.bulk_update(replies, ['path'], batch_size=500)
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forums', '0004_reply_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumreply',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='Ruta'),
+        ),
+        migrations.AddIndex(
+            model_name='forumreply',
+            index=models.Index(fields=['post', 'path'], name='forum_reply_tree_idx'),
+        ),
+        migrations.RunPython(backfill_reply_paths, noop_reverse),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
-from courses.models import Course, Enrollment
+from courses.models import Course
+from courses.services.access import user_enrolled_in_course, user_manages_course
 
 
 class ForumPost(models.Model):
@@ -39,11 +40,31 @@ class ForumPost(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Actualizado en')
     # Tracks when new activity (post creation or new reply) last happened.
     last_activity_at = models.DateTimeField(auto_now_add=True, verbose_name='Última actividad')
+    # Sube en 1 con cada respuesta nueva; ForumPostRead.seen_seq guarda hasta cuál leyó cada usuario.
+    activity_seq = models.PositiveIntegerField(default=1, verbose_name='Secuencia de actividad')
+    # Resumen de respuestas mantenido por forums.signals (forum_list no toca ForumReply).
+    reply_count = models.PositiveIntegerField(default=0, verbose_name='Respuestas')
+    last_reply_at = models.DateTimeField(null=True, blank=True, verbose_name='Última respuesta')
+    last_reply_author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Autor de la última respuesta',
+    )
 
     class Meta:
         verbose_name = 'Publicación del Foro'
         verbose_name_plural = 'Publicaciones del Foro'
         ordering = ['-is_pinned', '-created_at']
+        indexes = [
+            # Orden de forum_list y su paginación por keyset.
+            models.Index(
+                fields=['course', 'is_private', '-is_pinned', '-last_activity_at', '-id'],
+                name='forum_post_list_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.course.title} — {self.title}"
@@ -51,12 +72,9 @@ class ForumPost(models.Model):
     def can_view(self, user):
         if user.user_type == 'admin':
             return True
-        if self.course.is_instructor_or_collaborator(user):
+        if user_manages_course(user, self.course_id):
             return True
-        is_enrolled = Enrollment.objects.filter(
-            student=user, course=self.course, status='approved'
-        ).exists()
-        if not is_enrolled:
+        if not user_enrolled_in_course(user, self.course_id):
             return False
         if not self.is_private:
             return True
@@ -68,16 +86,16 @@ class ForumPost(models.Model):
     def can_edit(self, user):
         return (
             self.author_id == user.pk
-            or self.course.is_instructor_or_collaborator(user)
             or user.user_type == 'admin'
+            or user_manages_course(user, self.course_id)
         )
 
     def can_pin(self, user):
-        return self.course.is_instructor_or_collaborator(user) or user.user_type == 'admin'
+        return user.user_type == 'admin' or user_manages_course(user, self.course_id)
 
     @property
     def replies_count(self):
-        return self.replies.count()
+        return self.reply_count
 
     @property
     def last_reply(self):
@@ -99,6 +117,7 @@ class ForumPostRead(models.Model):
         verbose_name='Publicación',
     )
     last_read_at = models.DateTimeField(auto_now=True, verbose_name='Última lectura')
+    seen_seq = models.PositiveIntegerField(default=0, verbose_name='Secuencia leída')
 
     class Meta:
         verbose_name = 'Lectura de Publicación'
@@ -109,6 +128,37 @@ class ForumPostRead(models.Model):
         return f"{self.user.username} leyó '{self.post.title}'"
 
 
+class ForumUnreadCounter(models.Model):
+    """Publicaciones no leídas de un usuario en un curso (mantenido por forums.services.unread)."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='forum_unread_counters',
+        verbose_name='Usuario',
+    )
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='forum_unread_counters',
+        verbose_name='Curso',
+    )
+    unread_count = models.PositiveIntegerField(default=0, verbose_name='No leídas')
+
+    class Meta:
+        verbose_name = 'Contador de no leídos del Foro'
+        verbose_name_plural = 'Contadores de no leídos del Foro'
+        unique_together = ['user', 'course']
+
+    def __str__(self):
+        return f"{self.user_id} · {self.course_id}: {self.unread_count}"
+
+
+# Ruta materializada de ForumReply: un segmento de 10 dígitos por ancestro (y la propia
+# respuesta), así ordenar por `path` da el hilo completo en orden de lectura.
+REPLY_PATH_SEGMENT = '{:010d}/'
+MAX_REPLY_DEPTH = 20
+
+
 class ForumReply(models.Model):
     post = models.ForeignKey(
         ForumPost,
@@ -131,6 +181,7 @@ class ForumReply(models.Model):
         related_name='nested_replies',
         verbose_name='Respuesta padre',
     )
+    path = models.CharField(max_length=255, blank=True, default='', editable=False, verbose_name='Ruta')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Creado en')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Actualizado en')
 
@@ -138,13 +189,43 @@ class ForumReply(models.Model):
         verbose_name = 'Respuesta del Foro'
         verbose_name_plural = 'Respuestas del Foro'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'path'], name='forum_reply_tree_idx'),
+        ]
 
     def __str__(self):
         return f"{self.author.username} en '{self.post.title}'"
 
+    @property
+    def depth(self):
+        return self.path.count('/') - 1
+
+    def save(self, *args, **kwargs):
+        # Más allá de MAX_REPLY_DEPTH la respuesta queda como hermana de su padre.
+        parent = self.parent_reply
+        while parent is not None and parent.depth >= MAX_REPLY_DEPTH - 1:
+            parent = parent.parent_reply
+        self.parent_reply = parent
+        super().save(*args, **kwargs)
+
+        old_path = self.path
+        new_path = (parent.path if parent else '') + REPLY_PATH_SEGMENT.format(self.pk)
+        if new_path == old_path:
+            return
+        ForumReply.objects.filter(pk=self.pk).update(path=new_path)
+        self.path = new_path
+        if old_path:
+            # Cambió el padre (p. ej. desde el admin): se mueve todo el subárbol.
+            descendants = list(
+                ForumReply.objects.filter(post_id=self.post_id, path__startswith=old_path).exclude(pk=self.pk)
+            )
+            for reply in descendants:
+                reply.path = new_path + reply.path[len(old_path):]
+            ForumReply.objects.bulk_update(descendants, ['path'])
+
     def can_delete(self, user):
         return (
             self.author_id == user.pk
-            or self.post.course.is_instructor_or_collaborator(user)
             or user.user_type == 'admin'
+            or user_manages_course(user, self.post.course_id)
         )
@@ -0,0 +1 @@
+"""Servicios del foro."""
@@ -0,0 +1,64 @@
+"""
+Listado del foro paginado por keyset.
+
+forum_list ordena por (-is_pinned, -last_activity_at, -id) y cada página arranca después
+del último post de la anterior (cursor), así que el costo no depende de cuántas páginas o
+respuestas haya: cantidad y última respuesta están desnormalizadas en ForumPost.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+
+from forums.models import ForumPost, ForumReply
+
+FORUM_PAGE_SIZE = 20
+LIST_ORDERING = ('-is_pinned', '-last_activity_at', '-id')
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(post):
+    micros = (post.last_activity_at - _EPOCH) // timedelta(microseconds=1)
+    return f'{int(post.is_pinned)}_{micros}_{post.pk}'
+
+
+def decode_cursor(value):
+    """(is_pinned, last_activity_at, id) o None si el cursor no es válido."""
+    try:
+        pinned, micros, pk = (int(part) for part in (value or '').split('_'))
+    except ValueError:
+        return None
+    if pinned not in (0, 1):
+        return None
+    return bool(pinned), _EPOCH + timedelta(microseconds=micros), pk
+
+
+def keyset_page(qs, cursor=None, size=FORUM_PAGE_SIZE):
+    """(posts, cursor de la página siguiente o None) a partir de `cursor`."""
+    position = decode_cursor(cursor)
+    if position is not None:
+        pinned, last_activity_at, pk = position
+        qs = qs.filter(
+            Q(is_pinned__lt=pinned)
+            | Q(is_pinned=pinned, last_activity_at__lt=last_activity_at)
+            | Q(is_pinned=pinned, last_activity_at=last_activity_at, pk__lt=pk)
+        )
+    posts = list(qs.order_by(*LIST_ORDERING)[:size + 1])
+    if len(posts) > size:
+        posts = posts[:size]
+        return posts, encode_cursor(posts[-1])
+    return posts, None
+
+
+def refresh_reply_summary(post_id):
+    """Recalcula cantidad y última respuesta del post (después de borrar respuestas)."""
+    latest = (
+        ForumReply.objects.filter(post_id=post_id)
+        .order_by('-created_at', '-pk')
+        .values('created_at', 'author_id')
+        .first()
+    )
+    ForumPost.objects.filter(pk=post_id).update(
+        reply_count=ForumReply.objects.filter(post_id=post_id).count(),
+        last_reply_at=latest['created_at'] if latest else None,
+        last_reply_author_id=latest['author_id'] if latest else None,
+    )
@@ -0,0 +1,21 @@
+"""
+Hilo de respuestas de un post armado en memoria.
+
+Una sola consulta ordenada por ForumReply.path (ruta materializada) trae todas las
+respuestas en orden de lectura, padres antes que hijos, a cualquier profundidad.
+"""
+from forums.models import ForumReply
+
+
+def load_reply_tree(post):
+    """Respuestas de primer nivel de `post`; cada una con `children` (lista) ya cargada."""
+    replies = ForumReply.objects.filter(post=post).select_related('author').order_by('path')
+    by_id = {}
+    roots = []
+    for reply in replies:
+        reply.post = post
+        reply.children = []
+        by_id[reply.pk] = reply
+        parent = by_id.get(reply.parent_reply_id)
+        (parent.children if parent else roots).append(reply)
+    return roots
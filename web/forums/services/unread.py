@@ -0,0 +1,170 @@
+"""
+Contadores de publicaciones no leídas del foro.
+
+- ForumPost.activity_seq sube en 1 con cada respuesta y ForumPostRead.seen_seq guarda la
+  secuencia que vio cada usuario: un post está sin leer si seen_seq < activity_seq (o si no
+  hay lectura). La comparación es un LEFT JOIN por el índice único (user, post).
+- ForumUnreadCounter guarda cuántos posts ajenos sin leer tiene cada usuario en cada curso.
+  Se arma la primera vez que se consulta (unread_counts) y después se mantiene con UPDATE
+  en bloque: post nuevo (+1 a quienes pueden verlo), respuesta nueva (+1 a quienes lo
+  tenían leído) y lectura (mark_post_read, -1).
+- mark_post_read no escribe en vistas repetidas: la marca leída se guarda también en caché
+  y solo se actualiza la fila (con un UPDATE condicional) cuando hubo actividad nueva.
+- Lo que cambia la visibilidad (editar privacidad, borrar un post, inscripciones, docentes
+  del curso) borra los contadores afectados (reset_counters) y se recalculan al pedirlos.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, FilteredRelation, Q, Value, When
+from django.dispatch import Signal
+from django.utils import timezone
+
+from courses.services.access import user_manages_course
+from forums.models import ForumPost, ForumPostRead, ForumUnreadCounter
+
+READ_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Se envía cuando una lectura cambia el estado de un post (estaba sin leer): user, post.
+post_marked_read = Signal()
+
+
+def _with_read(qs, user):
+    return qs.annotate(my_read=FilteredRelation('reads', condition=Q(reads__user=user)))
+
+
+def annotate_is_unread(qs, user):
+    """Agrega `is_unread` a cada post según la lectura del usuario."""
+    return _with_read(qs, user).annotate(
+        is_unread=Case(
+            When(my_read__seen_seq__gte=F('activity_seq'), then=Value(False)),
+            default=Value(True),
+            output_field=BooleanField(),
+        )
+    )
+
+
+def unread_posts(qs, user):
+    """Posts de `qs` escritos por otros que el usuario no leyó desde su última actividad."""
+    return _with_read(qs.exclude(author=user), user).filter(
+        Q(my_read__seen_seq__isnull=True) | Q(my_read__seen_seq__lt=F('activity_seq'))
+    )
+
+
+def visible_posts(user, course_id):
+    """Posts del curso que el usuario puede ver (mismas reglas que ForumPost.can_view)."""
+    qs = ForumPost.objects.filter(course_id=course_id)
+    if user.user_type == 'admin' or user_manages_course(user, course_id):
+        return qs
+    return qs.filter(Q(is_private=False) | Q(student_participant=user))
+
+
+def unread_counts(user, course_ids):
+    """{course_id: no leídos}: una consulta indexada; solo se recalculan los que faltan."""
+    course_ids = list(course_ids)
+    if not course_ids:
+        return {}
+    counts = dict(
+        ForumUnreadCounter.objects
+        .filter(user=user, course_id__in=course_ids)
+        .values_list('course_id', 'unread_count')
+    )
+    missing = [course_id for course_id in course_ids if course_id not in counts]
+    if missing:
+        for course_id in missing:
+            counts[course_id] = unread_posts(visible_posts(user, course_id), user).count()
+        ForumUnreadCounter.objects.bulk_create(
+            [
+                ForumUnreadCounter(user=user, course_id=course_id, unread_count=counts[course_id])
+                for course_id in missing
+            ],
+            ignore_conflicts=True,
+        )
+    return counts
+
+
+def unread_count(user, course_id):
+    return unread_counts(user, [course_id])[course_id]
+
+
+def reset_counters(course_id, user_ids=None):
+    """Descarta contadores del curso (de todos o de `user_ids`); se recalculan al pedirlos."""
+    qs = ForumUnreadCounter.objects.filter(course_id=course_id)
+    if user_ids is not None:
+        qs = qs.filter(user_id__in=[pk for pk in user_ids if pk is not None])
+    qs.delete()
+
+
+def _viewers(post):
+    """Filtro de contadores para los usuarios que pueden ver `post` (sin contar al autor)."""
+    if not post.is_private:
+        return Q()
+    User = get_user_model()
+    managers = User.objects.filter(
+        Q(courses_taught__pk=post.course_id) | Q(courses_collaborated__pk=post.course_id)
+    ).values('pk')
+    return Q(user_id=post.student_participant_id) | Q(user__user_type='admin') | Q(user_id__in=managers)
+
+
+def post_created(post):
+    ForumUnreadCounter.objects.filter(_viewers(post), course_id=post.course_id).exclude(
+        user_id=post.author_id
+    ).update(unread_count=F('unread_count') + 1)
+
+
+def reply_created(reply):
+    """Nueva actividad en el post: sube su secuencia y +1 a quienes ya lo tenían leído.
+
+    El mismo UPDATE mantiene el resumen de respuestas que muestra forum_list.
+    """
+    ForumPost.objects.filter(pk=reply.post_id).update(
+        activity_seq=F('activity_seq') + 1,
+        last_activity_at=timezone.now(),
+        reply_count=F('reply_count') + 1,
+        last_reply_at=reply.created_at,
+        last_reply_author_id=reply.author_id,
+    )
+    course_id, author_id, seq = ForumPost.objects.filter(pk=reply.post_id).values_list(
+        'course_id', 'author_id', 'activity_seq'
+    ).get()
+    readers = ForumPostRead.objects.filter(post_id=reply.post_id, seen_seq__gte=seq - 1).exclude(
+        user_id=author_id
+    ).values('user_id')
+    ForumUnreadCounter.objects.filter(course_id=course_id, user_id__in=readers).update(
+        unread_count=F('unread_count') + 1
+    )
+
+
+def _read_cache_key(user_id, post_id):
+    return f'forums:read:{user_id}:{post_id}'
+
+
+def mark_post_read(user, post):
+    """
+    Marca `post` como leído hasta su actividad actual y descuenta el contador si hacía falta.
+
+    Las vistas repetidas no escriben: la última secuencia leída queda en caché y, si ya
+    cubre activity_seq, no se toca la base. Si no, un UPDATE condicional (seen_seq < actual)
+    avanza la marca; solo si no había fila se crea. Devuelve True si el post estaba sin leer.
+    """
+    seq = post.activity_seq
+    key = _read_cache_key(user.pk, post.pk)
+    cached = cache.get(key)
+    if cached is not None and cached >= seq:
+        return False
+    was_unread = ForumPostRead.objects.filter(user=user, post=post, seen_seq__lt=seq).update(
+        seen_seq=seq, last_read_at=timezone.now(),
+    ) > 0
+    if not was_unread:
+        _, was_unread = ForumPostRead.objects.get_or_create(
+            user=user, post=post, defaults={'seen_seq': seq},
+        )
+    # Solo al confirmar: si el request se revierte, la caché no puede tapar la marca perdida.
+    transaction.on_commit(lambda: cache.set(key, seq, READ_CACHE_TIMEOUT))
+    if was_unread:
+        if post.author_id != user.pk:
+            ForumUnreadCounter.objects.filter(
+                user=user, course_id=post.course_id, unread_count__gt=0,
+            ).update(unread_count=F('unread_count') - 1)
+        post_marked_read.send(sender=ForumPost, user=user, post=post)
+    return was_unread
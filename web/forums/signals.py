@@ -1,13 +1,75 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
-from django.utils import timezone
+
+from courses.models import Course
+
+from .services import listing, unread
 
 
 @receiver(post_save, sender='forums.ForumReply')
 def update_post_activity(sender, instance, created, **kwargs):
-    """When a new reply is saved, bump last_activity_at on the parent post."""
+    """When a new reply is saved, bump the parent post's activity and unread counters."""
     if created:
-        sender.__class__  # noqa: just to avoid unused import warnings
-        instance.post.__class__.objects.filter(pk=instance.post_id).update(
-            last_activity_at=timezone.now()
+        unread.reply_created(instance)
+
+
+@receiver(post_delete, sender='forums.ForumReply')
+def update_reply_summary_on_delete(sender, instance, **kwargs):
+    listing.refresh_reply_summary(instance.post_id)
+
+
+@receiver(pre_save, sender='forums.ForumPost')
+def remember_post_visibility(sender, instance, **kwargs):
+    instance._previous_visibility = None
+    if instance.pk:
+        instance._previous_visibility = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list('is_private', 'student_participant_id')
+            .first()
         )
+
+
+@receiver(post_save, sender='forums.ForumPost')
+def update_unread_on_post_save(sender, instance, created, **kwargs):
+    if created:
+        unread.post_created(instance)
+        return
+    previous = getattr(instance, '_previous_visibility', None)
+    if previous is not None and previous != (instance.is_private, instance.student_participant_id):
+        unread.reset_counters(instance.course_id)
+
+
+@receiver(post_delete, sender='forums.ForumPost')
+def reset_unread_on_post_delete(sender, instance, **kwargs):
+    unread.reset_counters(instance.course_id)
+
+
+@receiver(post_save, sender='courses.Enrollment')
+@receiver(post_delete, sender='courses.Enrollment')
+def reset_unread_on_enrollment_change(sender, instance, **kwargs):
+    unread.reset_counters(instance.course_id, [instance.student_id])
+
+
+@receiver(post_save, sender='courses.Course')
+def reset_unread_on_instructor_change(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_instructor_id', None)
+    if not created and previous != instance.instructor_id:
+        unread.reset_counters(instance.pk, [previous, instance.instructor_id])
+
+
+@receiver(m2m_changed, sender=Course.collaborators.through)
+def reset_unread_on_collaborators_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # instance es el docente; pk_set, los cursos (None si se vació la relación).
+        if pk_set is None:
+            from forums.models import ForumUnreadCounter
+
+            ForumUnreadCounter.objects.filter(user=instance).delete()
+        for course_id in pk_set or ():
+            unread.reset_counters(course_id, [instance.pk])
+    elif action == 'post_clear':
+        unread.reset_counters(instance.pk)
+    else:
+        unread.reset_counters(instance.pk, pk_set)
@@ -0,0 +1,200 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from courses.models import Course, Enrollment
+from forums.models import MAX_REPLY_DEPTH, ForumPost, ForumPostRead, ForumReply, ForumUnreadCounter
+from forums.services.listing import FORUM_PAGE_SIZE
+from forums.services.unread import mark_post_read, unread_count
+
+
+User = get_user_model()
+
+
+class ForumUnreadCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(username='doc_foro', password='Pass1234!', user_type='teacher')
+        self.student = User.objects.create_user(username='alu_foro', password='Pass1234!', user_type='student')
+        self.other = User.objects.create_user(username='alu_otro', password='Pass1234!', user_type='student')
+        self.course = Course.objects.create(title='Curso', description='Desc', instructor=self.teacher)
+        Enrollment.objects.create(student=self.student, course=self.course, status='approved')
+        Enrollment.objects.create(student=self.other, course=self.course, status='approved')
+        self.post = ForumPost.objects.create(
+            course=self.course, author=self.teacher, title='Bienvenida', content='Hola',
+        )
+
+    def _count(self, user):
+        return unread_count(User.objects.get(pk=user.pk), self.course.id)
+
+    def test_counter_follows_posts_replies_and_reads(self):
+        self.assertEqual(self._count(self.student), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.student, self.course.id), 1)
+
+        # Un privado de otro alumno no cuenta; uno nuevo general sí.
+        ForumPost.objects.create(
+            course=self.course, author=self.other, title='Consulta', content='?',
+            is_private=True, student_participant=self.other,
+        )
+        ForumPost.objects.create(course=self.course, author=self.teacher, title='Aviso', content='!')
+        self.assertEqual(self._count(self.student), 2)
+        self.assertEqual(self._count(self.teacher), 1)
+
+        self.client.force_login(self.student)
+        self.client.get(reverse('forum_detail', args=[self.post.id]))
+        self.client.get(reverse('forum_detail', args=[self.post.id]))
+        self.assertEqual(self._count(self.student), 1)
+
+        # Una respuesta nueva vuelve a marcar el post como no leído.
+        ForumReply.objects.create(post=self.post, author=self.other, content='Gracias')
+        self.assertEqual(self._count(self.student), 2)
+        response = self.client.get(reverse('forum_list', args=[self.course.id]))
+        self.assertEqual(response.context['unread_count'], 2)
+        self.assertTrue(all(p.is_unread for p in response.context['general_posts']))
+
+    def test_visibility_changes_rebuild_counters(self):
+        self.assertEqual(self._count(self.student), 1)
+        self.post.is_private = True
+        self.post.student_participant = self.other
+        self.post.save()
+        self.assertFalse(ForumUnreadCounter.objects.filter(course=self.course).exists())
+        self.assertEqual(self._count(self.student), 0)
+        self.assertEqual(self._count(self.other), 1)
+
+    def test_repeated_views_do_not_write_read_markers(self):
+        self.assertEqual(self._count(self.student), 1)
+        post = ForumPost.objects.get(pk=self.post.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(mark_post_read(self.student, post))
+        with self.assertNumQueries(0):
+            self.assertFalse(mark_post_read(self.student, post))
+
+        # Sin la caché alcanza con un UPDATE que no toca filas y la lectura de la marca.
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertFalse(mark_post_read(self.student, post))
+        self.assertFalse(any(q['sql'].startswith(('INSERT', 'DELETE')) for q in ctx.captured_queries))
+
+        ForumReply.objects.create(post=self.post, author=self.teacher, content='Novedad')
+        post.refresh_from_db()
+        self.assertEqual(self._count(self.student), 1)
+        self.assertTrue(mark_post_read(self.student, post))
+        self.assertEqual(ForumPostRead.objects.get(user=self.student, post=post).seen_seq, 2)
+        self.assertEqual(self._count(self.student), 0)
+
+    def test_rolled_back_read_is_not_cached(self):
+        post = ForumPost.objects.get(pk=self.post.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.assertTrue(mark_post_read(self.student, post))
+                    raise RuntimeError('error al renderizar')
+            except RuntimeError:
+                pass
+        self.assertEqual(self._count(self.student), 1)
+        self.assertTrue(mark_post_read(self.student, post))
+        self.assertEqual(self._count(self.student), 0)
+
+
+class ForumListPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(username='doc_lista', password='Pass1234!', user_type='teacher')
+        self.student = User.objects.create_user(username='alu_lista', password='Pass1234!', user_type='student')
+        self.course = Course.objects.create(title='Curso', description='Desc', instructor=self.teacher)
+        Enrollment.objects.create(student=self.student, course=self.course, status='approved')
+        ForumPost.objects.bulk_create([
+            ForumPost(course=self.course, author=self.teacher, title=f'Post {i}', content='...')
+            for i in range(FORUM_PAGE_SIZE + 3)
+        ])
+        self.pinned = ForumPost.objects.create(
+            course=self.course, author=self.teacher, title='Fijado', content='...', is_pinned=True,
+        )
+        self.url = reverse('forum_list', args=[self.course.id])
+
+    def test_pages_follow_keyset_order_without_repeats(self):
+        ForumPost.objects.filter(title='Post 0').update(last_activity_at=self.pinned.last_activity_at)
+        self.client.force_login(self.student)
+        first = self.client.get(self.url)
+        page_one = first.context['general_posts']
+        self.assertEqual(len(page_one), FORUM_PAGE_SIZE)
+        self.assertEqual(page_one[0], self.pinned)
+
+        second = self.client.get(self.url, {'after': first.context['general_next']})
+        page_two = second.context['general_posts']
+        self.assertEqual(len(page_two), 4)
+        self.assertIsNone(second.context['general_next'])
+        self.assertEqual(
+            {p.pk for p in page_one} | {p.pk for p in page_two},
+            set(ForumPost.objects.values_list('pk', flat=True)),
+        )
+
+    def test_reply_summary_is_denormalized(self):
+        first = ForumReply.objects.create(post=self.pinned, author=self.student, content='Uno')
+        ForumReply.objects.create(post=self.pinned, author=self.teacher, content='Dos', parent_reply=first)
+        self.pinned.refresh_from_db()
+        self.assertEqual(self.pinned.reply_count, 2)
+        self.assertEqual(self.pinned.last_reply_author, self.teacher)
+
+        self.client.force_login(self.student)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        self.assertFalse(any('forums_forumreply' in q['sql'] for q in ctx.captured_queries))
+
+        # Borrar una respuesta con hijas recalcula el resumen.
+        first.delete()
+        self.pinned.refresh_from_db()
+        self.assertEqual(self.pinned.reply_count, 0)
+        self.assertIsNone(self.pinned.last_reply_at)
+
+
+class ReplyTreeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(username='doc_hilo', password='Pass1234!', user_type='teacher')
+        self.student = User.objects.create_user(username='alu_hilo', password='Pass1234!', user_type='student')
+        self.course = Course.objects.create(title='Curso', description='Desc', instructor=self.teacher)
+        Enrollment.objects.create(student=self.student, course=self.course, status='approved')
+        self.post = ForumPost.objects.create(
+            course=self.course, author=self.teacher, title='Hilo', content='...',
+        )
+
+    def _chain(self, depth, parent=None):
+        replies = []
+        for i in range(depth):
+            parent = ForumReply.objects.create(
+                post=self.post, author=self.student if i % 2 else self.teacher,
+                content=f'Nivel {i}', parent_reply=parent,
+            )
+            replies.append(parent)
+        return replies
+
+    def _detail_queries(self):
+        self.client.force_login(self.student)
+        url = reverse('forum_detail', args=[self.post.id])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        return response, len(ctx)
+
+    def test_thread_renders_any_depth_with_constant_queries(self):
+        self._chain(2)
+        _, shallow = self._detail_queries()
+
+        deep = self._chain(6, parent=ForumReply.objects.get(content='Nivel 1'))
+        self._chain(2)
+        response, queries = self._detail_queries()
+        self.assertEqual(queries, shallow)
+        self.assertEqual(deep[-1].depth, 7)
+        self.assertEqual([r.content for r in response.context['replies']], ['Nivel 0', 'Nivel 0'])
+        for reply in ForumReply.objects.all():
+            self.assertContains(response, f'id="reply-{reply.id}"')
+
+    def test_depth_is_capped(self):
+        replies = self._chain(MAX_REPLY_DEPTH + 2)
+        self.assertEqual(replies[-1].depth, MAX_REPLY_DEPTH - 1)
+        self.assertEqual(replies[-1].parent_reply, replies[MAX_REPLY_DEPTH - 2])
@@ -3,12 +3,15 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
 
-from django.db.models import BooleanField, Case, F, OuterRef, Q, Subquery, Value, When
-from courses.models import Course, Enrollment
+from courses.models import Course
+from courses.services.access import user_enrolled_in_course
 from core import notifications
 
-from .models import ForumPost, ForumPostRead, ForumReply
+from .models import ForumPost, ForumReply
 from .forms import ForumPostForm, ForumReplyForm
+from .services.listing import keyset_page
+from .services.threads import load_reply_tree
+from .services.unread import annotate_is_unread, mark_post_read, unread_count
 
 
 def _get_course_and_role(request, course_id):
@@ -18,10 +21,7 @@ def _get_course_and_role(request, course_id):
     is_teacher = (
         course.is_instructor_or_collaborator(user) or user.user_type == 'admin'
     )
-    is_enrolled = Enrollment.objects.filter(
-        student=user, course=course, status='approved'
-    ).exists()
-    if not (is_teacher or is_enrolled):
+    if not (is_teacher or user_enrolled_in_course(user, course)):
         raise PermissionDenied
     return course, is_teacher
 
@@ -31,45 +31,30 @@ def forum_list(request, course_id):
     course, is_teacher = _get_course_and_role(request, course_id)
     user = request.user
 
-    last_read_sq = Subquery(
-        ForumPostRead.objects.filter(
-            user=user, post=OuterRef('pk')
-        ).values('last_read_at')[:1]
+    base_qs = annotate_is_unread(
+        ForumPost.objects.filter(course=course).select_related(
+            'author', 'student_participant', 'last_reply_author'
+        ),
+        user,
     )
+    private_qs = base_qs.filter(is_private=True)
+    if not is_teacher:
+        private_qs = private_qs.filter(student_participant=user)
 
-    def annotate_unread(qs):
-        return qs.annotate(last_read=last_read_sq).annotate(
-            is_unread=Case(
-                When(last_read__isnull=True, then=Value(True)),
-                When(last_activity_at__gt=F('last_read'), then=Value(True)),
-                default=Value(False),
-                output_field=BooleanField(),
-            )
-        )
-
-    base_qs = ForumPost.objects.filter(course=course).select_related(
-        'author', 'student_participant'
-    ).prefetch_related('replies')
-
-    if is_teacher:
-        general_posts = annotate_unread(
-            base_qs.filter(is_private=False)
-        ).order_by('-is_pinned', '-last_activity_at')
-        private_posts = annotate_unread(
-            base_qs.filter(is_private=True)
-        ).order_by('-last_activity_at')
-    else:
-        general_posts = annotate_unread(
-            base_qs.filter(is_private=False)
-        ).order_by('-is_pinned', '-last_activity_at')
-        private_posts = annotate_unread(
-            base_qs.filter(is_private=True, student_participant=user)
-        ).order_by('-last_activity_at')
+    general_after = request.GET.get('after')
+    private_after = request.GET.get('private_after')
+    general_posts, general_next = keyset_page(base_qs.filter(is_private=False), general_after)
+    private_posts, private_next = keyset_page(private_qs, private_after)
 
     context = {
         'course': course,
         'general_posts': general_posts,
         'private_posts': private_posts,
+        'general_after': general_after,
+        'general_next': general_next,
+        'private_after': private_after,
+        'private_next': private_next,
+        'unread_count': unread_count(user, course.id),
         'is_teacher': is_teacher,
     }
     return render(request, 'forums/forum_list.html', context)
@@ -127,11 +112,7 @@ def forum_detail(request, post_id):
     )
 
     # Mark this post as read for the current user.
-    ForumPostRead.objects.update_or_create(user=user, post=post)
-
-    top_level_replies = ForumReply.objects.filter(
-        post=post, parent_reply__isnull=True
-    ).select_related('author').prefetch_related('nested_replies__author')
+    mark_post_read(user, post)
 
     can_reply = post.can_reply(user)
     reply_form = None
@@ -166,7 +147,7 @@ def forum_detail(request, post_id):
     context = {
         'post': post,
         'course': course,
-        'replies': top_level_replies,
+        'replies': load_reply_tree(post),
         'can_reply': can_reply,
         'reply_form': reply_form,
         'can_edit': post.can_edit(user),
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0007_remove_material_mat_assign_pub_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='preview',
+            field=models.FileField(blank=True, editable=False, upload_to='', verbose_name='Vista previa'),
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='preview_generated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Vista previa generada'),
+        ),
+    ]
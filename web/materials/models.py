@@ -77,6 +77,13 @@ class Material(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name="Subido en")
     file_size = models.PositiveIntegerField(blank=True, null=True, verbose_name="Tamaño del archivo")
     file_type = models.CharField(max_length=100, blank=True, verbose_name="Tipo de archivo")
+    preview = models.FileField(blank=True, editable=False, verbose_name="Vista previa")
+    preview_generated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Vista previa generada",
+    )
     is_published = models.BooleanField(
         default=False,
         verbose_name="Publicado",
@@ -195,20 +202,42 @@ def update_file_info(sender, instance, created, **kwargs):
             instance.save(update_fields=['file_size', 'file_type', 'original_filename'])
 
 
+@receiver(post_save, sender=Material)
+def index_material_file(sender, instance, **kwargs):
+    """Marcar el archivo como en uso en el índice de MEDIA_ROOT."""
+    if instance.file:
+        from core.services.media_index import mark_referenced
+        mark_referenced(instance.file.name)
+
+
 @receiver(pre_save, sender=Material)
 def delete_old_material_file(sender, instance, **kwargs):
     if not instance.pk:
         return
-    old_instance = Material.objects.filter(pk=instance.pk).only('file').first()
+    old_instance = Material.objects.filter(pk=instance.pk).only('file', 'preview').first()
     if not old_instance or not old_instance.file:
         return
     old_file = old_instance.file
     new_file = instance.file
     if not new_file or old_file.name != new_file.name:
         old_file.delete(save=False)
+        from core.services.previews import delete_preview
+        delete_preview(old_instance)
+        instance.preview = ''
+        instance.preview_generated_at = None
 
 
 @receiver(post_delete, sender=Material)
 def delete_material_file(sender, instance, **kwargs):
     if instance.file:
         instance.file.delete(save=False)
+    from core.services.previews import delete_preview
+    delete_preview(instance)
+
+
+@receiver(post_save, sender=Material)
+@receiver(post_delete, sender=Material)
+def invalidate_outline_on_material_change(sender, instance, **kwargs):
+    from units.services.outline import invalidate_course_outline
+
+    invalidate_course_outline(instance.course_id)
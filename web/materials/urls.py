@@ -10,4 +10,5 @@ urlpatterns = [
     path("api/courses/<int:course_id>/materials/", views.MaterialListCreateView.as_view(), name="material-list-create-api"),
     path("materials/<int:pk>/", views.MaterialDetailView.as_view(), name="material-detail"),
     path("materials/<int:pk>/download/", views.MaterialDownloadView.as_view(), name="material-download"),
+    path("materials/<int:pk>/preview/", views.material_preview, name="material-preview"),
 ]
\ No newline at end of file
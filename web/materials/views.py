@@ -10,6 +10,7 @@ from django.core.files.storage import default_storage
 from .models import Material
 from .serializers import MaterialSerializer, MaterialUploadSerializer
 from courses.models import Enrollment, Course
+from courses.services.access import user_enrolled_in_course
 from accounts.models import UserActivityLog
 from accounts.activity import log_user_activity
 
@@ -46,11 +47,7 @@ def _student_can_view_assignment_guide(user, material):
         return False
     if not user.is_student():
         return False
-    if not Enrollment.objects.filter(
-        student=user,
-        course=material.course,
-        status='approved',
-    ).exists():
+    if not user_enrolled_in_course(user, material.course_id):
         return False
     if not (
         assignment.is_active
@@ -121,11 +118,7 @@ class MaterialListCreateView(generics.ListCreateAPIView):
             pass
         else:
             # Students see materials based on visibility and publication status
-            enrolled = Enrollment.objects.filter(
-                student=user,
-                course=course,
-                status='approved'
-            ).exists()
+            enrolled = user_enrolled_in_course(user, course)
 
             if enrolled:
                 # Show public and enrolled materials that are published
@@ -197,6 +190,21 @@ class MaterialDownloadView(APIView):
         raise Http404("Archivo no encontrado.")
 
 
+@login_required
+def material_preview(request, pk):
+    """Miniatura del material (imagen o primera página del PDF) para los listados."""
+    material = get_object_or_404(Material, pk=pk)
+    if not CanViewMaterial().has_object_permission(request, None, material):
+        raise Http404("Vista previa no encontrada.")
+    if not material.preview:
+        raise Http404("Vista previa no encontrada.")
+    from core.services.previews import preview_response
+    try:
+        return preview_response(request, material.preview)
+    except FileNotFoundError:
+        raise Http404("Vista previa no encontrada.")
+
+
 @login_required
 def material_list(request, course_id):
     """List all materials for a course (dashboard view)"""
@@ -208,12 +216,7 @@ def material_list(request, course_id):
         can_view = True
     elif request.user.is_student():
         # Check if student is enrolled and approved
-        enrollment = Enrollment.objects.filter(
-            student=request.user,
-            course=course,
-            status='approved'
-        ).first()
-        can_view = enrollment is not None
+        can_view = user_enrolled_in_course(request.user, course)
     
     if not can_view:
         messages.error(request, 'No tienes permiso para ver los materiales de este curso.')
@@ -228,11 +231,7 @@ def material_list(request, course_id):
         materials = Material.objects.filter(course=course, assignment__isnull=True).order_by('-uploaded_at')
     else:
         # Students see materials based on visibility and publication status
-        enrolled = Enrollment.objects.filter(
-            student=request.user,
-            course=course,
-            status='approved'
-        ).exists()
+        enrolled = user_enrolled_in_course(request.user, course)
         
         if enrolled:
             # Show public and enrolled materials that are published
@@ -253,8 +252,7 @@ def material_list(request, course_id):
     
     # Check if user can manage materials
     can_manage = (
-        course.instructor == request.user or
-        request.user in course.collaborators.all() or
+        course.is_instructor_or_collaborator(request.user) or
         request.user.user_type == 'admin'
     )
     
@@ -1,12 +1,17 @@
 from django.contrib import admin
 
 from .models import (
+    BankAnswerOption,
+    BankQuestion,
     ExamAnswerOption,
     ExamAttempt,
     ExamAttemptAnswer,
+    ExamFocusViolation,
     ExamQuestion,
+    QuestionTag,
     ThemeExam,
 )
+from .services.grading import rescore_attempts
 
 
 class ExamAnswerOptionInline(admin.TabularInline):
@@ -33,6 +38,16 @@ class ThemeExamAdmin(admin.ModelAdmin):
     )
     list_filter = ('is_published', 'course')
     inlines = [ExamQuestionInline]
+    actions = ['rescore_submitted_attempts']
+
+    @admin.action(description='Recalcular notas de los intentos enviados')
+    def rescore_submitted_attempts(self, request, queryset):
+        checked, updated = rescore_attempts(ExamAttempt.objects.filter(exam__in=queryset))
+        self.message_user(
+            request,
+            f'{checked} intentos revisados; {updated} con nota recalculada.',
+            level='success',
+        )
 
 
 @admin.register(ExamQuestion)
@@ -47,8 +62,35 @@ class ExamAttemptAnswerInline(admin.TabularInline):
     raw_id_fields = ('question', 'selected_option')
 
 
+class ExamFocusViolationInline(admin.TabularInline):
+    model = ExamFocusViolation
+    extra = 0
+    readonly_fields = ('occurred_at', 'violation_type')
+    can_delete = False
+
+
 @admin.register(ExamAttempt)
 class ExamAttemptAdmin(admin.ModelAdmin):
-    list_display = ('exam', 'student', 'score', 'submitted_at')
+    list_display = ('exam', 'student', 'score', 'focus_violations', 'submitted_at')
     list_filter = ('exam',)
-    inlines = [ExamAttemptAnswerInline]
+    inlines = [ExamAttemptAnswerInline, ExamFocusViolationInline]
+
+
+class BankAnswerOptionInline(admin.TabularInline):
+    model = BankAnswerOption
+    extra = 0
+
+
+@admin.register(BankQuestion)
+class BankQuestionAdmin(admin.ModelAdmin):
+    list_display = ('text', 'version', 'created_by', 'created_at')
+    list_filter = ('tags',)
+    search_fields = ('text',)
+    filter_horizontal = ('tags',)
+    readonly_fields = ('content_hash', 'version')
+    inlines = [BankAnswerOptionInline]
+
+
+@admin.register(QuestionTag)
+class QuestionTagAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
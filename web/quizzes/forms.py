@@ -17,6 +17,8 @@ class ThemeExamForm(forms.ModelForm):
             'available_until',
             'attendance_date',
             'max_focus_violations',
+            'questions_per_attempt',
+            'time_limit_minutes',
         ]
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control'}),
@@ -35,6 +37,8 @@ class ThemeExamForm(forms.ModelForm):
                 'type': 'date',
             }),
             'max_focus_violations': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
+            'questions_per_attempt': forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
+            'time_limit_minutes': forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
         }
         labels = {
             'title': 'Título del examen',
@@ -44,6 +48,8 @@ class ThemeExamForm(forms.ModelForm):
             'available_until': 'Disponible hasta',
             'attendance_date': 'Fecha de asistencia requerida',
             'max_focus_violations': 'Límite de salidas de pantalla (0 = sin límite)',
+            'questions_per_attempt': 'Preguntas por intento (vacío = todas)',
+            'time_limit_minutes': 'Duración por intento en minutos (vacío = hasta el cierre)',
         }
 
     def __init__(self, *args, **kwargs):
@@ -171,3 +177,26 @@ class ExamImportForm(forms.Form):
         help_text='Si se marca, se eliminan las preguntas actuales y se cargan solo las del archivo.',
         widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
     )
+
+
+class QuestionBankImportForm(forms.Form):
+    file = forms.FileField(
+        label='Archivo Excel (.xlsx)',
+        help_text='Mismo formato que la importación de exámenes. Las preguntas que ya están en el banco no se duplican.',
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.xlsx,.xlsm'}),
+    )
+    tags = forms.CharField(
+        label='Etiquetas',
+        required=False,
+        help_text='Separadas por coma. Ej.: álgebra, unidad 2',
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+
+
+class BankSampleForm(forms.Form):
+    count = forms.IntegerField(
+        label='Cantidad a sortear',
+        min_value=1,
+        max_value=500,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
+    )
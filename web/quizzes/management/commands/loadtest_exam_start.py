@@ -0,0 +1,180 @@
+"""
+Simula la apertura simultánea de un examen por muchos alumnos.
+
+Crea un curso de prueba con N alumnos inscriptos y un examen abierto, opcionalmente
+pre-genera los intentos (prepare_exam_attempts) y dispara N GET concurrentes a exam_take,
+cada uno con su propio cliente y conexión a la base. Informa latencias (p50/p95/máx),
+consultas e INSERTs por pedido. Al terminar borra los datos de prueba (salvo --keep).
+Pensado para MariaDB: con SQLite las escrituras concurrentes fallan por bloqueo (usar --workers 1).
+Cada hilo abre su propia conexión: por defecto se usan a lo sumo MAX_DEFAULT_WORKERS, por
+debajo del max_connections (151) por defecto de MariaDB/MySQL.
+
+Crea usuarios, cursos e inscripciones (y dispara sus señales) en la base configurada, así que
+solo corre con DEBUG activo o con --allow-live-db.
+
+Uso:
+  python manage.py loadtest_exam_start
+  python manage.py loadtest_exam_start --workers 100 --allow-live-db
+  python manage.py loadtest_exam_start --students 200 --questions 30 --no-prepare
+"""
+
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from courses.models import Course, Enrollment
+from quizzes.models import ExamAnswerOption, ExamAttempt, ExamQuestion, ThemeExam
+from quizzes.services.attempt_prep import prepare_exam_attempts
+from units.models import Tema, Unit
+
+MAX_DEFAULT_WORKERS = 50
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga: N alumnos abren el mismo examen a la vez.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200, help='Alumnos simultáneos.')
+        parser.add_argument('--questions', type=int, default=20, help='Preguntas del examen.')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=0,
+            help=f'Hilos, cada uno con su conexión (0 = uno por alumno, hasta {MAX_DEFAULT_WORKERS}).',
+        )
+        parser.add_argument(
+            '--no-prepare',
+            action='store_true',
+            help='No pre-generar intentos (mide el camino sin prepare_exam_attempts).',
+        )
+        parser.add_argument('--keep', action='store_true', help='No borrar los datos de prueba.')
+        parser.add_argument(
+            '--allow-live-db',
+            action='store_true',
+            help='Correr aunque DEBUG esté desactivado (crea datos en la base configurada).',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['allow_live_db']:
+            raise CommandError(
+                'DEBUG está desactivado: esta prueba crea usuarios, cursos e inscripciones en la '
+                'base configurada. Usá una base de prueba o pasá --allow-live-db.'
+            )
+        if options['students'] < 1:
+            raise CommandError('--students debe ser al menos 1.')
+        tag = uuid.uuid4().hex[:8]
+        course, exam, students, url = self._build_fixture(tag, options['students'], options['questions'])
+        try:
+            if not options['no_prepare']:
+                started = time.perf_counter()
+                prepared = prepare_exam_attempts(exam)
+                self.stdout.write(
+                    f'Intentos pre-generados: {prepared} en {time.perf_counter() - started:.2f}s'
+                )
+
+            workers = options['workers'] or min(len(students), MAX_DEFAULT_WORKERS)
+            with override_settings(ALLOWED_HOSTS=['*']):
+                clients = [self._logged_client(s) for s in students]
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(lambda c: self._start(c, url), clients))
+            self._report(results, exam)
+        finally:
+            if not options['keep']:
+                User = get_user_model()
+                course.delete()
+                User.objects.filter(username__startswith=f'loadtest_{tag}_').delete()
+
+    def _build_fixture(self, tag, student_count, question_count):
+        User = get_user_model()
+        teacher = User.objects.create_user(
+            username=f'loadtest_{tag}_docente', password=None, user_type='teacher',
+        )
+        User.objects.bulk_create([
+            User(username=f'loadtest_{tag}_alumno{i}', user_type='student')
+            for i in range(student_count)
+        ])
+        students = list(
+            User.objects.filter(username__startswith=f'loadtest_{tag}_alumno').order_by('id')
+        )
+        course = Course.objects.create(
+            title=f'Prueba de carga {tag}', description='Generado por loadtest_exam_start', instructor=teacher,
+        )
+        Enrollment.objects.bulk_create([
+            Enrollment(student=s, course=course, status='approved') for s in students
+        ])
+        unit = Unit.objects.create(title='Unidad', course=course, created_by=teacher, order=1, is_paused=False)
+        tema = Tema.objects.create(
+            title='Tema', description='', unit=unit, created_by=teacher, order=1, is_paused=False,
+        )
+        now = timezone.now()
+        exam = ThemeExam.objects.create(
+            title='Examen de carga',
+            tema=tema,
+            course=course,
+            created_by=teacher,
+            available_from=now - timedelta(minutes=1),
+            available_until=now + timedelta(hours=1),
+        )
+        questions = ExamQuestion.objects.bulk_create([
+            ExamQuestion(exam=exam, text=f'Pregunta {i + 1}', order=i) for i in range(question_count)
+        ])
+        ExamAnswerOption.objects.bulk_create([
+            ExamAnswerOption(question=q, text=f'Opción {j + 1}', is_correct=(j == 0))
+            for q in questions
+            for j in range(3)
+        ])
+        ThemeExam.objects.filter(pk=exam.pk).update(is_published=True)
+        exam.refresh_from_db()
+        url = reverse('quizzes:exam_take', kwargs={
+            'course_id': course.id,
+            'unit_id': unit.id,
+            'tema_id': tema.id,
+            'exam_id': exam.id,
+        })
+        return course, exam, students, url
+
+    def _logged_client(self, student):
+        client = Client(raise_request_exception=False)
+        client.force_login(student)
+        return client
+
+    def _start(self, client, url):
+        try:
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = time.perf_counter() - started
+            inserts = sum(1 for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith('INSERT'))
+            return response.status_code, elapsed, len(ctx.captured_queries), inserts
+        finally:
+            connections.close_all()
+
+    def _report(self, results, exam):
+        latencies = sorted(r[1] * 1000 for r in results)
+        failures = [r for r in results if r[0] != 200]
+        p95 = latencies[max(0, int(round(len(latencies) * 0.95)) - 1)]
+        self.stdout.write(
+            f'Pedidos: {len(results)} | errores: {len(failures)} | '
+            f'p50: {statistics.median(latencies):.0f} ms | p95: {p95:.0f} ms | máx: {latencies[-1]:.0f} ms'
+        )
+        self.stdout.write(
+            f'Consultas por pedido: {max(r[2] for r in results)} | '
+            f'INSERTs totales: {sum(r[3] for r in results)}'
+        )
+        attempts = ExamAttempt.objects.filter(exam=exam)
+        self.stdout.write(
+            f'Intentos: {attempts.count()} | sin abrir: {attempts.filter(is_prepared=True).count()}'
+        )
+        style = self.style.ERROR if failures else self.style.SUCCESS
+        self.stdout.write(style('Prueba de carga terminada.'))
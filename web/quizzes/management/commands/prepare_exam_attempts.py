@@ -0,0 +1,43 @@
+"""
+Pre-genera los intentos de los exámenes que están por abrir.
+
+Crea en bloque (bulk_create) el intento, el orden aleatorio y las respuestas vacías de cada
+alumno habilitado, para que la apertura simultánea de todo el curso no dispare cientos de INSERTs.
+
+Uso:
+  python manage.py prepare_exam_attempts
+  python manage.py prepare_exam_attempts --minutes 30
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from quizzes.services.attempt_prep import exams_opening_soon, prepare_exam_attempts
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Pre-genera intentos y respuestas de los exámenes que abren en los próximos minutos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes',
+            type=int,
+            default=15,
+            help='Ventana (minutos) antes de la apertura en la que se preparan los intentos.',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for exam in exams_opening_soon(minutes=options['minutes']):
+            try:
+                created = prepare_exam_attempts(exam)
+            except Exception as e:
+                logger.error(f"No se pudieron preparar los intentos del examen {exam.pk}: {e}")
+                continue
+            if created:
+                self.stdout.write(f'Examen {exam.pk} «{exam.title}»: {created} intentos preparados')
+            total += created
+        self.stdout.write(self.style.SUCCESS(f'Intentos preparados: {total}'))
@@ -0,0 +1,47 @@
+"""
+Recalcula la nota de todos los intentos enviados de uno o más exámenes.
+
+Útil después de corregir una opción marcada mal como correcta: por examen hace una
+consulta agrupada y un bulk_update, así que miles de intentos se recalculan en segundos.
+
+Uso:
+  python manage.py rescore_exam_attempts 12
+  python manage.py rescore_exam_attempts 12 15 --dry-run
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from quizzes.models import ThemeExam
+from quizzes.services.grading import rescore_exam
+
+
+class Command(BaseCommand):
+    help = 'Recalcula nota, aciertos y total de los intentos enviados de los exámenes indicados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_ids', nargs='+', type=int, help='IDs de ThemeExam.')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Informa cuántos intentos cambiarían sin guardar nada.',
+        )
+
+    def handle(self, *args, **options):
+        exams = list(ThemeExam.objects.filter(pk__in=options['exam_ids']).order_by('pk'))
+        missing = set(options['exam_ids']) - {e.pk for e in exams}
+        if missing:
+            raise CommandError(f'No existen exámenes con id: {", ".join(map(str, sorted(missing)))}')
+
+        for exam in exams:
+            with transaction.atomic():
+                checked, updated = rescore_exam(exam)
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+            self.stdout.write(
+                f'Examen {exam.pk} «{exam.title}»: {checked} intentos revisados, {updated} con nota nueva'
+            )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Simulación: no se guardaron cambios.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Recalificación terminada.'))
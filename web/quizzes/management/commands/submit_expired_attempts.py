@@ -0,0 +1,29 @@
+"""
+Envía los intentos de examen cuyo plazo venció.
+
+Corrige y cierra en bloque (una consulta agrupada + bulk_update por lote) los intentos sin
+enviar cuyo deadline_at pasó, en lugar de esperar un POST de cada alumno al mismo minuto.
+
+Uso:
+  python manage.py submit_expired_attempts
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from quizzes.services.grading import submit_expired_attempts
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Envía automáticamente los intentos de examen cuyo tiempo venció.'
+
+    def handle(self, *args, **options):
+        try:
+            submitted = submit_expired_attempts()
+        except Exception as e:
+            logger.error(f"No se pudieron enviar los intentos vencidos: {e}")
+            raise
+        self.stdout.write(self.style.SUCCESS(f'Intentos vencidos enviados: {submitted}'))
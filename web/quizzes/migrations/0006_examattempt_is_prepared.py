@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0005_examattempt_focus_violation_log_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examattempt',
+            name='is_prepared',
+            field=models.BooleanField(default=False, help_text='Creado por prepare_exam_attempts antes de la apertura; al abrirlo el alumno se marca en False y started_at pasa a ser el momento real de inicio.', verbose_name='Pre-generado sin abrir'),
+        ),
+    ]
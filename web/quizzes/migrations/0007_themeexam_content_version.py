@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0006_examattempt_is_prepared'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='themeexam',
+            name='content_version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Aumenta con cada alta, cambio o baja de preguntas u opciones; forma parte de la clave de la copia en caché del examen.', verbose_name='Versión de preguntas'),
+        ),
+    ]
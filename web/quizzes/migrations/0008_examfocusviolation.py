@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+def copy_focus_violation_logs(apps, schema_editor):
+    ExamAttempt = apps.get_model('quizzes', 'ExamAttempt')
+    ExamFocusViolation = apps.get_model('quizzes', 'ExamFocusViolation')
+    batch = []
+    for attempt in ExamAttempt.objects.exclude(focus_violation_log=[]).only('id', 'started_at', 'focus_violation_log'):
+        for entry in attempt.focus_violation_log or []:
+            occurred_at = parse_datetime(str(entry.get('ts') or '')) or attempt.started_at
+            batch.append(ExamFocusViolation(
+                attempt_id=attempt.pk,
+                occurred_at=occurred_at,
+                violation_type=str(entry.get('type') or 'visibility')[:30],
+            ))
+        if len(batch) >= 500:
+            ExamFocusViolation.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ExamFocusViolation.objects.bulk_create(batch)
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0007_themeexam_content_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamFocusViolation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha y hora')),
+                ('violation_type', models.CharField(max_length=30, verbose_name='Tipo')),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='focus_violation_events', to='quizzes.examattempt', verbose_name='Intento')),
+            ],
+            options={
+                'verbose_name': 'Salida de pantalla',
+                'verbose_name_plural': 'Salidas de pantalla',
+                'ordering': ['occurred_at', 'id'],
+            },
+        ),
+        migrations.RunPython(copy_focus_violation_logs, noop_reverse),
+        migrations.RemoveField(
+            model_name='examattempt',
+            name='focus_violation_log',
+        ),
+    ]
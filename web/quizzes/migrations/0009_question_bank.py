@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_fulltext_index(apps, schema_editor):
+    # Búsqueda del banco por texto (ver quizzes.services.question_bank.search_bank).
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX quizzes_bankquestion_text_ft ON quizzes_bankquestion (text)'
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX quizzes_bankquestion_text_ft ON quizzes_bankquestion')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0008_examfocusviolation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=60, unique=True, verbose_name='Nombre')),
+            ],
+            options={
+                'verbose_name': 'Etiqueta de preguntas',
+                'verbose_name_plural': 'Etiquetas de preguntas',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='examquestion',
+            name='bank_version',
+            field=models.PositiveIntegerField(blank=True, help_text='Versión de la pregunta del banco copiada en este examen.', null=True, verbose_name='Versión del banco'),
+        ),
+        migrations.AddField(
+            model_name='themeexam',
+            name='questions_per_attempt',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Opcional. Si se indica, cada alumno recibe esa cantidad de preguntas elegidas al azar entre las del examen.', null=True, verbose_name='Preguntas por intento'),
+        ),
+        migrations.CreateModel(
+            name='BankQuestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='Texto de la pregunta')),
+                ('correct_explanation', models.TextField(blank=True, default='', verbose_name='Aclaración')),
+                ('content_hash', models.CharField(help_text='SHA-256 de pregunta y opciones normalizadas: evita cargar la misma pregunta dos veces.', max_length=64, unique=True, verbose_name='Hash del contenido')),
+                ('version', models.PositiveIntegerField(default=1, editable=False, verbose_name='Versión')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creada en')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizada en')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bank_questions', to=settings.AUTH_USER_MODEL, verbose_name='Cargada por')),
+                ('tags', models.ManyToManyField(blank=True, related_name='questions', to='quizzes.questiontag', verbose_name='Etiquetas')),
+            ],
+            options={
+                'verbose_name': 'Pregunta del banco',
+                'verbose_name_plural': 'Banco de preguntas',
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BankAnswerOption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='Texto de la opción')),
+                ('is_correct', models.BooleanField(default=False, verbose_name='Es correcta')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='options', to='quizzes.bankquestion', verbose_name='Pregunta')),
+            ],
+            options={
+                'verbose_name': 'Opción del banco',
+                'verbose_name_plural': 'Opciones del banco',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='examquestion',
+            name='bank_question',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exam_questions', to='quizzes.bankquestion', verbose_name='Pregunta del banco'),
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
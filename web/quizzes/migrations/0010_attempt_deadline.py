@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_open_attempt_deadlines(apps, schema_editor):
+    # Intentos en curso al migrar: vencen al cierre de su examen.
+    ExamAttempt = apps.get_model('quizzes', 'ExamAttempt')
+    ThemeExam = apps.get_model('quizzes', 'ThemeExam')
+    ExamAttempt.objects.filter(submitted_at__isnull=True, is_prepared=False).update(
+        deadline_at=Subquery(
+            ThemeExam.objects.filter(pk=OuterRef('exam_id')).values('available_until')[:1]
+        )
+    )
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0009_question_bank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examattempt',
+            name='deadline_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Inicio + duración del examen (o su cierre). submit_expired_attempts envía en bloque los intentos vencidos.', null=True, verbose_name='Vence en'),
+        ),
+        migrations.AddField(
+            model_name='themeexam',
+            name='time_limit_minutes',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Opcional. Tiempo desde que el alumno abre el examen; al vencer se envía automáticamente. El cierre de «Disponible hasta» siempre es el límite final.', null=True, verbose_name='Duración por intento (minutos)'),
+        ),
+        migrations.RunPython(backfill_open_attempt_deadlines, noop_reverse),
+    ]
@@ -1,10 +1,19 @@
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
 from decimal import Decimal, ROUND_HALF_UP
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
+# Margen tras el vencimiento para aceptar respuestas que ya estaban en viaje.
+ATTEMPT_DEADLINE_GRACE = timedelta(seconds=30)
+
 
 class ThemeExam(models.Model):
     """Examen de opción múltiple asociado a un tema."""
@@ -48,6 +57,27 @@ class ThemeExam(models.Model):
         help_text='Cantidad de veces que el alumno puede salir de la pantalla del examen '
                   'antes de que se envíe automáticamente. 0 = sin límite.',
     )
+    questions_per_attempt = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Preguntas por intento',
+        help_text='Opcional. Si se indica, cada alumno recibe esa cantidad de preguntas '
+                  'elegidas al azar entre las del examen.',
+    )
+    time_limit_minutes = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Duración por intento (minutos)',
+        help_text='Opcional. Tiempo desde que el alumno abre el examen; al vencer se envía '
+                  'automáticamente. El cierre de «Disponible hasta» siempre es el límite final.',
+    )
+    content_version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        verbose_name='Versión de preguntas',
+        help_text='Aumenta con cada alta, cambio o baja de preguntas u opciones; '
+                  'forma parte de la clave de la copia en caché del examen.',
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Creado en')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Actualizado en')
 
@@ -75,19 +105,31 @@ class ThemeExam(models.Model):
     def save(self, *args, **kwargs):
         if self.tema_id is not None and self.course_id is not None:
             self.clean()
+        if not self._state.adding and not args and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            # content_version solo lo sube bump_exam_content_version (F() + 1): guardar el
+            # valor leído al principio del pedido pisaría un cambio de preguntas concurrente.
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'content_version'
+            ]
         super().save(*args, **kwargs)
 
     def can_be_managed_by(self, user):
-        return (
-            self.course.instructor == user
-            or user in self.course.collaborators.all()
-            or getattr(user, 'user_type', '') == 'admin'
-        )
+        from courses.services.access import user_manages_course
+
+        return getattr(user, 'user_type', '') == 'admin' or user_manages_course(user, self.course_id)
 
     def is_available_now(self):
         now = timezone.now()
         return self.available_from <= now <= self.available_until
 
+    def attempt_deadline(self, started_at):
+        """Vencimiento de un intento iniciado en `started_at` (duración o cierre del examen)."""
+        if self.time_limit_minutes:
+            return min(started_at + timedelta(minutes=self.time_limit_minutes), self.available_until)
+        return self.available_until
+
     def question_count(self):
         if self.pk is None:
             return 0
@@ -105,6 +147,11 @@ class ThemeExam(models.Model):
         questions = list(self.questions.prefetch_related('answer_options'))
         if not questions:
             return False, 'Debe haber al menos una pregunta.'
+        if self.questions_per_attempt and self.questions_per_attempt > len(questions):
+            return False, (
+                f'«Preguntas por intento» ({self.questions_per_attempt}) no puede superar '
+                f'la cantidad de preguntas del examen ({len(questions)}).'
+            )
         for q in questions:
             opts = list(q.answer_options.all())
             if len(opts) != 3:
@@ -144,6 +191,20 @@ class ExamQuestion(models.Model):
         verbose_name='Aclaración de la respuesta correcta (opcional)',
         help_text='Opcional. Se muestra al alumno al revisar el examen.',
     )
+    bank_question = models.ForeignKey(
+        'BankQuestion',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='exam_questions',
+        verbose_name='Pregunta del banco',
+    )
+    bank_version = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Versión del banco',
+        help_text='Versión de la pregunta del banco copiada en este examen.',
+    )
 
     class Meta:
         verbose_name = 'Pregunta'
@@ -172,6 +233,76 @@ class ExamAnswerOption(models.Model):
         return self.text[:60]
 
 
+class QuestionTag(models.Model):
+    name = models.CharField(max_length=60, unique=True, verbose_name='Nombre')
+
+    class Meta:
+        verbose_name = 'Etiqueta de preguntas'
+        verbose_name_plural = 'Etiquetas de preguntas'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class BankQuestion(models.Model):
+    """
+    Pregunta del banco compartido entre exámenes y cursos. Al agregarla a un examen se copia
+    como ExamQuestion (con su versión), así editar el banco no cambia exámenes ya armados.
+    """
+    text = models.TextField(verbose_name='Texto de la pregunta')
+    correct_explanation = models.TextField(blank=True, default='', verbose_name='Aclaración')
+    tags = models.ManyToManyField(
+        QuestionTag,
+        blank=True,
+        related_name='questions',
+        verbose_name='Etiquetas',
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='Hash del contenido',
+        help_text='SHA-256 de pregunta y opciones normalizadas: evita cargar la misma pregunta dos veces.',
+    )
+    version = models.PositiveIntegerField(default=1, editable=False, verbose_name='Versión')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='bank_questions',
+        verbose_name='Cargada por',
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Creada en')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Actualizada en')
+
+    class Meta:
+        verbose_name = 'Pregunta del banco'
+        verbose_name_plural = 'Banco de preguntas'
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        return self.text[:80]
+
+
+class BankAnswerOption(models.Model):
+    question = models.ForeignKey(
+        BankQuestion,
+        on_delete=models.CASCADE,
+        related_name='options',
+        verbose_name='Pregunta',
+    )
+    text = models.TextField(verbose_name='Texto de la opción')
+    is_correct = models.BooleanField(default=False, verbose_name='Es correcta')
+
+    class Meta:
+        verbose_name = 'Opción del banco'
+        verbose_name_plural = 'Opciones del banco'
+        ordering = ['id']
+
+    def __str__(self):
+        return self.text[:60]
+
+
 class ExamAttempt(models.Model):
     exam = models.ForeignKey(
         ThemeExam,
@@ -218,10 +349,19 @@ class ExamAttempt(models.Model):
         default=0,
         verbose_name='Salidas de pantalla detectadas',
     )
-    focus_violation_log = models.JSONField(
-        default=list,
+    is_prepared = models.BooleanField(
+        default=False,
+        verbose_name='Pre-generado sin abrir',
+        help_text='Creado por prepare_exam_attempts antes de la apertura; al abrirlo el alumno '
+                  'se marca en False y started_at pasa a ser el momento real de inicio.',
+    )
+    deadline_at = models.DateTimeField(
+        null=True,
         blank=True,
-        verbose_name='Log de salidas de pantalla',
+        db_index=True,
+        verbose_name='Vence en',
+        help_text='Inicio + duración del examen (o su cierre). submit_expired_attempts envía '
+                  'en bloque los intentos vencidos.',
     )
 
     class Meta:
@@ -236,6 +376,32 @@ class ExamAttempt(models.Model):
     def is_submitted(self):
         return self.submitted_at is not None
 
+    def is_expired(self, now=None):
+        """True si pasó el vencimiento más el margen para respuestas en viaje."""
+        if self.deadline_at is None:
+            return False
+        return (now or timezone.now()) > self.deadline_at + ATTEMPT_DEADLINE_GRACE
+
+
+class ExamFocusViolation(models.Model):
+    """Una salida de pantalla durante el intento (solo se insertan filas, nunca se reescriben)."""
+    attempt = models.ForeignKey(
+        ExamAttempt,
+        on_delete=models.CASCADE,
+        related_name='focus_violation_events',
+        verbose_name='Intento',
+    )
+    occurred_at = models.DateTimeField(default=timezone.now, verbose_name='Fecha y hora')
+    violation_type = models.CharField(max_length=30, verbose_name='Tipo')
+
+    class Meta:
+        verbose_name = 'Salida de pantalla'
+        verbose_name_plural = 'Salidas de pantalla'
+        ordering = ['occurred_at', 'id']
+
+    def __str__(self):
+        return f'{self.attempt} — {self.violation_type}'
+
 
 class ExamAttemptAnswer(models.Model):
     attempt = models.ForeignKey(
@@ -275,3 +441,92 @@ class ExamAttemptAnswer(models.Model):
             raise ValidationError(
                 'Si se marca «No lo sé», no debe elegirse una opción de la pregunta.'
             )
+
+
+_content_version_state = threading.local()
+
+
+@contextmanager
+def deferred_content_version_bump(exam_id):
+    """
+    Para cambios masivos de preguntas (importación): las señales no incrementan la versión
+    fila por fila y al salir se incrementa una sola vez.
+    """
+    pending = getattr(_content_version_state, 'pending', None)
+    if pending is not None:
+        pending.add(exam_id)
+        yield
+        return
+    _content_version_state.pending = {exam_id}
+    try:
+        yield
+    finally:
+        pending, _content_version_state.pending = _content_version_state.pending, None
+    # Solo si no hubo error: con excepción la transacción se revierte y no hay nada que invalidar.
+    for pk in pending:
+        bump_exam_content_version(exam_id=pk)
+
+
+def bump_exam_content_version(exam_id=None, question_id=None):
+    """Invalida la copia en caché del examen (ver quizzes.services.exam_snapshot)."""
+    if getattr(_content_version_state, 'pending', None) is not None:
+        return
+    qs = ThemeExam.objects.all()
+    if exam_id is not None:
+        qs = qs.filter(pk=exam_id)
+    else:
+        qs = qs.filter(questions__id=question_id)
+    qs.update(content_version=F('content_version') + 1)
+
+
+@receiver(post_save, sender=ExamQuestion)
+@receiver(post_delete, sender=ExamQuestion)
+def invalidate_snapshot_on_question_change(sender, instance, **kwargs):
+    bump_exam_content_version(exam_id=instance.exam_id)
+
+
+@receiver(post_save, sender=ExamAnswerOption)
+@receiver(post_delete, sender=ExamAnswerOption)
+def invalidate_snapshot_on_option_change(sender, instance, **kwargs):
+    # Si la pregunta ya se borró (CASCADE), su propio post_delete invalida el examen.
+    bump_exam_content_version(question_id=instance.question_id)
+
+
+@receiver(post_save, sender=ThemeExam)
+def warm_snapshot_on_publish(sender, instance, **kwargs):
+    """Al publicar, deja armada la copia en caché antes de que entren los alumnos."""
+    if instance.is_published:
+        from quizzes.services.exam_snapshot import warm_exam_snapshot
+
+        transaction.on_commit(lambda: warm_exam_snapshot(instance.pk))
+
+
+@receiver(post_save, sender=ExamAttempt)
+@receiver(post_delete, sender=ExamAttempt)
+def invalidate_item_analysis_on_attempt_change(sender, instance, update_fields=None, **kwargs):
+    """Las estadísticas del examen se recalculan cuando entra (o se borra) una entrega."""
+    if instance.submitted_at is None:
+        return
+    if update_fields is not None and not {'submitted_at', 'score'} & set(update_fields):
+        return
+    from quizzes.services.item_analysis import invalidate_item_analysis
+
+    invalidate_item_analysis((instance.exam_id, instance.exam.content_version))
+
+
+@receiver(post_save, sender=BankQuestion)
+@receiver(post_save, sender=BankAnswerOption)
+def bump_bank_question_version(sender, instance, created, **kwargs):
+    """Cada edición de una pregunta del banco (o de sus opciones) es una versión nueva."""
+    if created:
+        return
+    question_id = instance.pk if sender is BankQuestion else instance.question_id
+    BankQuestion.objects.filter(pk=question_id).update(version=F('version') + 1)
+
+
+@receiver(post_save, sender=ThemeExam)
+@receiver(post_delete, sender=ThemeExam)
+def invalidate_outline_on_exam_change(sender, instance, **kwargs):
+    from units.services.outline import invalidate_course_outline
+
+    invalidate_course_outline(instance.course_id)
@@ -0,0 +1,101 @@
+"""
+Pre-generación de intentos antes de que abra un examen.
+
+prepare_exam_attempts() crea con bulk_create el ExamAttempt (con su orden aleatorio) y las
+filas de ExamAttemptAnswer de cada alumno habilitado que todavía no tiene intento. Así, cuando
+todo el curso entra a la vez al abrir el examen, exam_take solo lee y marca el inicio real.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from quizzes.models import ExamAttempt, ExamAttemptAnswer, ThemeExam
+from quizzes.utils import build_shuffle_state, load_exam_questions
+
+BATCH_SIZE = 500
+
+
+def eligible_student_ids(exam):
+    """Alumnos que resolve_student_exam_access dejaría rendir (salvo la ventana horaria)."""
+    from attendance.models import AttendanceRecord
+    from courses.models import Enrollment
+
+    if not exam.is_published or not exam.tema.is_visible_to_students():
+        return set()
+    ids = set(
+        Enrollment.objects.filter(
+            course_id=exam.course_id,
+            status='approved',
+            student__user_type='student',
+        ).values_list('student_id', flat=True)
+    )
+    if exam.attendance_date:
+        ids &= set(
+            AttendanceRecord.objects.filter(
+                session__course_id=exam.course_id,
+                session__date=exam.attendance_date,
+                status='present',
+            ).values_list('student_id', flat=True)
+        )
+    return ids
+
+
+def prepare_exam_attempts(exam):
+    """Crea intentos y respuestas vacías para los alumnos habilitados. Devuelve cuántos creó."""
+    questions = load_exam_questions(exam)
+    if not questions:
+        return 0
+    pending = eligible_student_ids(exam) - set(
+        ExamAttempt.objects.filter(exam=exam).values_list('student_id', flat=True)
+    )
+    if not pending:
+        return 0
+
+    with transaction.atomic():
+        # ignore_conflicts: si un alumno entró justo ahora, su intento gana.
+        ExamAttempt.objects.bulk_create(
+            [
+                ExamAttempt(
+                    exam=exam,
+                    student_id=student_id,
+                    shuffle_state=build_shuffle_state(questions, exam=exam),
+                    is_prepared=True,
+                )
+                for student_id in sorted(pending)
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        prepared = list(
+            ExamAttempt.objects.filter(
+                exam=exam,
+                student_id__in=pending,
+                is_prepared=True,
+            ).values_list('id', 'shuffle_state')
+        )
+        ExamAttemptAnswer.objects.bulk_create(
+            [
+                ExamAttemptAnswer(attempt_id=attempt_id, question_id=qid)
+                for attempt_id, state in prepared
+                for qid in state['question_ids']
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+    return len(prepared)
+
+
+def exams_opening_soon(minutes=15, now=None):
+    """Exámenes publicados que abren dentro de `minutes` o ya están abiertos."""
+    now = now or timezone.now()
+    return (
+        ThemeExam.objects
+        .filter(
+            is_published=True,
+            available_from__lte=now + timedelta(minutes=minutes),
+            available_until__gt=now,
+        )
+        .select_related('tema__unit')
+        .order_by('available_from')
+    )
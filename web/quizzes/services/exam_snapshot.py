@@ -0,0 +1,74 @@
+"""
+Copia inmutable de preguntas y opciones de un examen en la caché compartida.
+
+Mientras un examen está en curso sus preguntas no cambian (la edición se bloquea con
+intentos enviados), así que exam_take, exam_result y la revisión del docente leen esta
+copia en lugar de volver a consultar preguntas y opciones en cada pedido.
+
+La clave incluye ThemeExam.content_version, que las señales de ExamQuestion /
+ExamAnswerOption incrementan en cada cambio: una edición deja la copia anterior
+inalcanzable en todos los procesos, sin depender de borrar claves.
+"""
+import logging
+
+from django.core.cache import cache
+
+from quizzes.models import ExamQuestion, ThemeExam
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+SNAPSHOT_FORMAT = 1
+
+QUESTION_FIELDS = ('id', 'exam_id', 'text', 'order', 'correct_explanation')
+OPTION_FIELDS = ('id', 'question_id', 'text', 'is_correct')
+
+
+def snapshot_key(exam):
+    return f'quizzes:exam_snapshot:{SNAPSHOT_FORMAT}:{exam.pk}:{exam.content_version}'
+
+
+def build_exam_snapshot(exam):
+    """
+    Preguntas (orden order, id) con sus opciones, en una sola consulta (LEFT JOIN).
+    Devuelve tuplas planas: [(fila_pregunta, [fila_opción, ...]), ...].
+    """
+    rows = (
+        ExamQuestion.objects
+        .filter(exam_id=exam.pk)
+        .order_by('order', 'id', 'answer_options__id')
+        .values_list(
+            *QUESTION_FIELDS,
+            'answer_options__id',
+            'answer_options__text',
+            'answer_options__is_correct',
+        )
+    )
+    snapshot = []
+    last_qid = None
+    for row in rows:
+        if row[0] != last_qid:
+            snapshot.append((tuple(row[:5]), []))
+            last_qid = row[0]
+        if row[5] is not None:
+            snapshot[-1][1].append((row[5], row[0], row[6], row[7]))
+    return snapshot
+
+
+def get_exam_snapshot(exam):
+    """Copia en caché del examen; si no está (o cambió la versión), la arma y la guarda."""
+    key = snapshot_key(exam)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_exam_snapshot(exam)
+        try:
+            cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"No se pudo guardar en caché el examen {exam.pk}: {e}")
+    return snapshot
+
+
+def warm_exam_snapshot(exam_id):
+    exam = ThemeExam.objects.filter(pk=exam_id).only('id', 'content_version').first()
+    if exam is not None:
+        get_exam_snapshot(exam)
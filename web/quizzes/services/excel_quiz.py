@@ -1,9 +1,15 @@
 """Importación y exportación de preguntas de examen en Excel (openpyxl)."""
-from io import BytesIO
+import tempfile
+from itertools import islice
 
+from django.db.models import Max
+from django.utils import timezone
 from openpyxl import Workbook, load_workbook
 
-from quizzes.models import ThemeExam, ExamQuestion, ExamAnswerOption
+from quizzes.models import ThemeExam, ExamQuestion, ExamAnswerOption, deferred_content_version_bump
+
+IMPORT_BATCH_SIZE = 500
+RESULTS_CHUNK_SIZE = 500
 
 HEADER_ALIASES = {
     'pregunta': 'pregunta',
@@ -28,6 +34,18 @@ EXPORT_HEADERS = (
 )
 
 
+RESULTS_HEADERS = (
+    'alumno',
+    'usuario',
+    'nota',
+    'aciertos',
+    'preguntas',
+    'duracion_min',
+    'salidas_de_pantalla',
+    'enviado',
+)
+
+
 def _normalize_header(cell_value):
     if cell_value is None:
         return ''
@@ -48,23 +66,76 @@ def _parse_correct_cell(val):
     return None
 
 
-def parse_excel_rows(file_obj):
+def _iter_valid_rows(wb, iter_rows, columns, errors):
+    """Valida fila por fila y entrega solo las válidas; los errores se agregan a `errors`."""
+    idx_p, idx_a, idx_b, idx_c, idx_ok, idx_exp = columns
+    max_idx = max(idx_p, idx_a, idx_b, idx_c, idx_ok, idx_exp or 0)
+    try:
+        for line_no, row in enumerate(iter_rows, start=2):
+            if row is None or all(v is None or str(v).strip() == '' for v in row):
+                continue
+            cells = list(row) + [None] * max(0, max_idx + 1 - len(row))
+            pregunta = cells[idx_p]
+            a = cells[idx_a]
+            b = cells[idx_b]
+            c = cells[idx_c]
+            cor = cells[idx_ok]
+            exp_cell = cells[idx_exp] if idx_exp is not None else None
+
+            pregunta = (str(pregunta).strip() if pregunta is not None else '')
+            a = (str(a).strip() if a is not None else '')
+            b = (str(b).strip() if b is not None else '')
+            c_text = (str(c).strip() if c is not None else '')
+            expl = (str(exp_cell).strip() if exp_cell is not None else '')
+
+            if not pregunta and not a and not b and not c_text:
+                continue
+
+            ci = _parse_correct_cell(cor)
+            if not pregunta:
+                errors.append(f'Fila {line_no}: falta el texto de la pregunta.')
+                continue
+            if not a or not b or not c_text:
+                errors.append(f'Fila {line_no}: las tres opciones son obligatorias.')
+                continue
+            if ci is None:
+                errors.append(
+                    f'Fila {line_no}: «correcta» debe ser a, b, c (o 1, 2, 3).'
+                )
+                continue
+
+            yield {
+                'pregunta': pregunta,
+                'opcion_a': a,
+                'opcion_b': b,
+                'opcion_c': c_text,
+                'correct_index': ci,
+                'explicacion': expl,
+            }
+    finally:
+        wb.close()
+
+
+def open_excel_rows(file_obj):
     """
-    Lee un .xlsx y devuelve (rows, errors). Cada fila incluye opcionalmente 'explicacion'.
+    Abre un .xlsx en modo streaming y valida el encabezado.
+    Devuelve (rows, errors): `rows` es un iterador que lee y valida de a una fila
+    (cada fila incluye opcionalmente 'explicacion'); los errores de cada fila se van
+    agregando a `errors` a medida que se consume.
     """
     errors = []
-    rows_out = []
     try:
         wb = load_workbook(file_obj, read_only=True, data_only=True)
     except Exception as e:
-        return [], [f'No se pudo leer el archivo Excel: {e}']
+        return iter(()), [f'No se pudo leer el archivo Excel: {e}']
 
     ws = wb.active
     iter_rows = ws.iter_rows(min_row=1, values_only=True)
     try:
         header_row = next(iter_rows)
     except StopIteration:
-        return [], ['El archivo está vacío.']
+        wb.close()
+        return iter(()), ['El archivo está vacío.']
 
     headers = []
     for c in header_row:
@@ -77,7 +148,8 @@ def parse_excel_rows(file_obj):
         idx_c = headers.index('opcion_c')
         idx_ok = headers.index('correcta')
     except ValueError:
-        return [], [
+        wb.close()
+        return iter(()), [
             'La primera fila debe incluir al menos: '
             'pregunta | opcion_a | opcion_b | opcion_c | correcta '
             '(y opcionalmente explicacion).'
@@ -88,91 +160,77 @@ def parse_excel_rows(file_obj):
     except ValueError:
         idx_exp = None
 
-    max_idx = max(idx_p, idx_a, idx_b, idx_c, idx_ok, idx_exp or 0)
+    columns = (idx_p, idx_a, idx_b, idx_c, idx_ok, idx_exp)
+    return _iter_valid_rows(wb, iter_rows, columns, errors), errors
 
-    for line_no, row in enumerate(iter_rows, start=2):
-        if row is None or all(v is None or str(v).strip() == '' for v in row):
-            continue
-        cells = list(row) + [None] * max(0, max_idx + 1 - len(row))
-        pregunta = cells[idx_p] if idx_p < len(cells) else None
-        a = cells[idx_a] if idx_a < len(cells) else None
-        b = cells[idx_b] if idx_b < len(cells) else None
-        c = cells[idx_c] if idx_c < len(cells) else None
-        cor = cells[idx_ok] if idx_ok < len(cells) else None
-        exp_cell = cells[idx_exp] if idx_exp is not None and idx_exp < len(cells) else None
-
-        pregunta = (str(pregunta).strip() if pregunta is not None else '')
-        a = (str(a).strip() if a is not None else '')
-        b = (str(b).strip() if b is not None else '')
-        c_text = (str(c).strip() if c is not None else '')
-        expl = (str(exp_cell).strip() if exp_cell is not None else '') if idx_exp is not None else ''
-
-        if not pregunta and not a and not b and not c_text:
-            continue
 
-        ci = _parse_correct_cell(cor)
-        if not pregunta:
-            errors.append(f'Fila {line_no}: falta el texto de la pregunta.')
-            continue
-        if not a or not b or not c_text:
-            errors.append(f'Fila {line_no}: las tres opciones son obligatorias.')
-            continue
-        if ci is None:
-            errors.append(
-                f'Fila {line_no}: «correcta» debe ser a, b, c (o 1, 2, 3).'
-            )
-            continue
-
-        row_dict = {
-            'pregunta': pregunta,
-            'opcion_a': a,
-            'opcion_b': b,
-            'opcion_c': c_text,
-            'correct_index': ci,
-            'explicacion': expl,
-        }
-        rows_out.append(row_dict)
-
-    wb.close()
-    return rows_out, errors
-
-
-def import_questions_for_exam(exam: ThemeExam, rows, replace_existing: bool):
-    """Crea preguntas desde filas parseadas. Usar dentro de transaction.atomic."""
-    if replace_existing:
-        exam.questions.all().delete()
-
-    order_base = 0
-    if not replace_existing:
-        last = ExamQuestion.objects.filter(exam=exam).order_by('-order').first()
-        if last:
-            order_base = last.order + 1
-
-    for i, row in enumerate(rows):
-        q = ExamQuestion.objects.create(
+def _create_question_batch(exam, rows, first_order):
+    """Dos INSERT por lote: preguntas y luego sus opciones."""
+    questions = ExamQuestion.objects.bulk_create([
+        ExamQuestion(
             exam=exam,
             text=row['pregunta'],
-            order=order_base + i,
+            order=first_order + i,
             correct_explanation=row.get('explicacion') or '',
+            bank_question_id=row.get('bank_question_id'),
+            bank_version=row.get('bank_version'),
+        )
+        for i, row in enumerate(rows)
+    ])
+    if any(q.pk is None for q in questions):
+        # Sin RETURNING (MySQL): el orden es único dentro del lote y sirve para recuperar los id.
+        ids_by_order = dict(
+            ExamQuestion.objects.filter(
+                exam=exam,
+                order__gte=first_order,
+                order__lt=first_order + len(rows),
+            ).values_list('order', 'id')
         )
-        texts = [row['opcion_a'], row['opcion_b'], row['opcion_c']]
-        ci = row['correct_index']
-        for j, t in enumerate(texts):
-            ExamAnswerOption.objects.create(
-                question=q,
-                text=t,
-                is_correct=(j == ci),
-            )
+        for q in questions:
+            q.pk = ids_by_order[q.order]
+    ExamAnswerOption.objects.bulk_create([
+        ExamAnswerOption(question_id=q.pk, text=text, is_correct=(j == row['correct_index']))
+        for q, row in zip(questions, rows)
+        for j, text in enumerate((row['opcion_a'], row['opcion_b'], row['opcion_c']))
+    ])
+
+
+def import_questions_for_exam(exam: ThemeExam, rows, replace_existing: bool, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Crea preguntas desde filas parseadas (lista o iterador de open_excel_rows), en lotes
+    con bulk_create. Usar dentro de transaction.atomic. Devuelve cuántas preguntas creó.
+    Si no hay ninguna fila válida no toca las preguntas existentes (aunque se pida reemplazar).
+    """
+    rows = iter(rows)
+    batch = list(islice(rows, batch_size))
+    if not batch:
+        return 0
+
+    with deferred_content_version_bump(exam.pk):
+        if replace_existing:
+            exam.questions.all().delete()
+            order_base = 0
+        else:
+            last_order = ExamQuestion.objects.filter(exam=exam).aggregate(m=Max('order'))['m']
+            order_base = 0 if last_order is None else last_order + 1
+
+        created = 0
+        while batch:
+            _create_question_batch(exam, batch, order_base + created)
+            created += len(batch)
+            batch = list(islice(rows, batch_size))
+    return created
 
 
 def export_exam_to_workbook(exam: ThemeExam) -> Workbook:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'preguntas'
+    """Preguntas del examen en un libro write-only (las filas no quedan en memoria)."""
+    from quizzes.utils import load_exam_questions
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('preguntas')
     ws.append(list(EXPORT_HEADERS))
-    questions = exam.questions.prefetch_related('answer_options').order_by('order', 'id')
-    for q in questions:
-        opts = list(q.answer_options.order_by('id'))
+    for q in load_exam_questions(exam):
+        opts = q.option_list
         if len(opts) != 3:
             continue
         correct_letter = None
@@ -193,6 +251,84 @@ def export_exam_to_workbook(exam: ThemeExam) -> Workbook:
     return wb
 
 
+def _answer_label(option_letters, selected_option_id, dont_know):
+    if dont_know:
+        return 'No lo sé'
+    return option_letters.get(selected_option_id, '')
+
+
+def export_exam_results_workbook(exam: ThemeExam, chunk_size=RESULTS_CHUNK_SIZE) -> Workbook:
+    """
+    Resultados por alumno (nota, aciertos, duración, salidas de pantalla y la opción elegida
+    en cada pregunta). Lee los intentos y sus respuestas por tandas y los escribe en un libro
+    write-only: la memoria no crece con la cantidad de alumnos.
+    """
+    from quizzes.models import ExamAttempt, ExamAttemptAnswer
+    from quizzes.utils import load_exam_questions
+
+    questions = load_exam_questions(exam)
+    column = {q.pk: i for i, q in enumerate(questions)}
+    option_letters = {
+        o.pk: 'ABC'[j] if j < 3 else str(j + 1)
+        for q in questions
+        for j, o in enumerate(q.option_list)
+    }
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('resultados')
+    ws.append(
+        list(RESULTS_HEADERS) + [f'P{i}' for i in range(1, len(questions) + 1)]
+    )
+    ws.append(
+        ['Respuesta correcta'] + [''] * (len(RESULTS_HEADERS) - 1) + [
+            next((option_letters[o.pk] for o in q.option_list if o.is_correct), '')
+            for q in questions
+        ]
+    )
+
+    attempts = (
+        ExamAttempt.objects
+        .filter(exam=exam, submitted_at__isnull=False)
+        .select_related('student')
+        .order_by('student__last_name', 'student__first_name', 'student__username', 'pk')
+    )
+    chunk = []
+    for attempt in attempts.iterator(chunk_size=chunk_size):
+        chunk.append(attempt)
+        if len(chunk) >= chunk_size:
+            _append_result_rows(ws, chunk, column, option_letters, ExamAttemptAnswer)
+            chunk = []
+    if chunk:
+        _append_result_rows(ws, chunk, column, option_letters, ExamAttemptAnswer)
+    return wb
+
+
+def _append_result_rows(ws, attempts, column, option_letters, answer_model):
+    answers = {}
+    for attempt_id, question_id, option_id, dont_know in (
+        answer_model.objects
+        .filter(attempt_id__in=[a.pk for a in attempts])
+        .values_list('attempt_id', 'question_id', 'selected_option_id', 'dont_know')
+    ):
+        answers.setdefault(attempt_id, {})[question_id] = _answer_label(option_letters, option_id, dont_know)
+    for a in attempts:
+        cells = [''] * len(column)
+        for question_id, label in answers.get(a.pk, {}).items():
+            if question_id in column:
+                cells[column[question_id]] = label
+        duration = (a.submitted_at - a.started_at).total_seconds() / 60
+        ws.append([
+            a.student.get_full_name() or a.student.username,
+            a.student.username,
+            float(a.score) if a.score is not None else None,
+            a.correct_count,
+            a.total_questions,
+            round(duration, 1),
+            a.focus_violations,
+            timezone.localtime(a.submitted_at).strftime('%d/%m/%Y %H:%M'),
+        ] + cells)
+
+
 def build_template_workbook() -> Workbook:
     wb = Workbook()
     ws = wb.active
@@ -210,14 +346,18 @@ def build_template_workbook() -> Workbook:
 
 
 def workbook_to_response(wb: Workbook, filename: str):
-    from django.http import HttpResponse
-
-    buf = BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    resp = HttpResponse(
-        buf.getvalue(),
+    """
+    Guarda el libro en un archivo temporal y lo envía por partes (FileResponse):
+    con libros write-only ni las filas ni el .xlsx completo quedan en memoria.
+    """
+    from django.http import FileResponse
+
+    tmp = tempfile.TemporaryFile()
+    wb.save(tmp)
+    tmp.seek(0)
+    return FileResponse(
+        tmp,
+        as_attachment=True,
+        filename=filename,
         content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
     )
-    resp['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return resp
@@ -0,0 +1,135 @@
+"""
+Corrección de intentos con agregados en la base (sin recorrer respuestas en Python).
+
+- grade_attempt(): un COUNT condicional sobre las respuestas del intento al enviarlo.
+- rescore_attempts(): recalcula muchos intentos con una sola consulta agrupada y un
+  bulk_update; se usa tras corregir un `is_correct` mal cargado (comando
+  `rescore_exam_attempts` y acción del admin).
+- submit_expired_attempts(): envía en bloque los intentos cuyo plazo venció (comando
+  `submit_expired_attempts` por cron): el vencimiento no depende de que el navegador
+  de cada alumno mande un POST a la misma hora.
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from quizzes.models import ATTEMPT_DEADLINE_GRACE, ExamAttempt, ExamAttemptAnswer, ThemeExam
+from quizzes.services.item_analysis import invalidate_item_analysis
+
+BATCH_SIZE = 500
+
+
+def grade_attempt(attempt):
+    """(aciertos, total, nota) del intento en una sola consulta."""
+    counts = ExamAttemptAnswer.objects.filter(attempt=attempt).aggregate(
+        total=Count('id'),
+        correct=Count('id', filter=Q(selected_option__is_correct=True)),
+    )
+    total, correct = counts['total'], counts['correct']
+    return correct, total, ThemeExam.score_from_counts(correct, total) if total else None
+
+
+def submit_attempt(attempt, submitted_at=None):
+    """Corrige y cierra un intento (envío del alumno o vencimiento detectado al abrirlo)."""
+    correct, total, score = grade_attempt(attempt)
+    attempt.correct_count = correct
+    attempt.total_questions = total
+    attempt.score = score
+    attempt.submitted_at = submitted_at or timezone.now()
+    attempt.save(update_fields=['correct_count', 'total_questions', 'score', 'submitted_at'])
+    return score
+
+
+def _with_answer_counts(attempts):
+    return attempts.annotate(
+        n_total=Count('answers'),
+        n_correct=Count('answers', filter=Q(answers__selected_option__is_correct=True)),
+    )
+
+
+def rescore_attempts(attempts):
+    """
+    Recalcula nota, aciertos y total de los intentos enviados de `attempts` (queryset).
+    Solo escribe los que cambiaron; devuelve (revisados, actualizados).
+    """
+    rows = (
+        _with_answer_counts(attempts.filter(submitted_at__isnull=False))
+        .values_list(
+            'pk', 'exam_id', 'exam__content_version', 'score', 'correct_count', 'total_questions',
+            'n_total', 'n_correct',
+        )
+        .order_by()
+    )
+    checked = 0
+    changed = []
+    exam_versions = set()
+    for pk, exam_id, version, score, correct_count, total_questions, n_total, n_correct in rows.iterator():
+        checked += 1
+        if not n_total:
+            continue
+        new_score = ThemeExam.score_from_counts(n_correct, n_total)
+        if (score, correct_count, total_questions) != (new_score, n_correct, n_total):
+            changed.append(
+                ExamAttempt(pk=pk, score=new_score, correct_count=n_correct, total_questions=n_total)
+            )
+            exam_versions.add((exam_id, version))
+    if changed:
+        ExamAttempt.objects.bulk_update(
+            changed, ['score', 'correct_count', 'total_questions'], batch_size=BATCH_SIZE
+        )
+        invalidate_item_analysis(*exam_versions)
+    return checked, len(changed)
+
+
+def rescore_exam(exam):
+    return rescore_attempts(ExamAttempt.objects.filter(exam=exam))
+
+
+def expired_attempts(now=None):
+    """Intentos abiertos cuyo vencimiento (más el margen) ya pasó; usa el índice de deadline_at."""
+    now = now or timezone.now()
+    return ExamAttempt.objects.filter(
+        submitted_at__isnull=True,
+        is_prepared=False,
+        deadline_at__lt=now - ATTEMPT_DEADLINE_GRACE,
+    )
+
+
+def submit_expired_attempts(now=None, batch_size=BATCH_SIZE):
+    """
+    Envía los intentos vencidos por lotes: bloquea los ids, calcula las notas con una consulta
+    agrupada y las escribe con bulk_update (submitted_at = vencimiento). Devuelve cuántos envió.
+    """
+    submitted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                expired_attempts(now).select_for_update()
+                .order_by('deadline_at', 'pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            rows = (
+                _with_answer_counts(ExamAttempt.objects.filter(pk__in=ids))
+                .values_list('pk', 'exam_id', 'exam__content_version', 'deadline_at', 'n_total', 'n_correct')
+                .order_by()
+            )
+            changed = []
+            exam_versions = set()
+            for pk, exam_id, version, deadline_at, n_total, n_correct in rows:
+                changed.append(ExamAttempt(
+                    pk=pk,
+                    submitted_at=deadline_at,
+                    score=ThemeExam.score_from_counts(n_correct, n_total) if n_total else None,
+                    correct_count=n_correct,
+                    total_questions=n_total,
+                ))
+                exam_versions.add((exam_id, version))
+            ExamAttempt.objects.bulk_update(
+                changed, ['submitted_at', 'score', 'correct_count', 'total_questions'],
+                batch_size=batch_size,
+            )
+        invalidate_item_analysis(*exam_versions)
+        submitted += len(changed)
+    return submitted
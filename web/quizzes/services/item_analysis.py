@@ -0,0 +1,157 @@
+"""
+Análisis de ítems de un examen: dificultad (p), discriminación, distractores,
+tasa de «No lo sé» y distribución de notas.
+
+Todo sale de consultas agrupadas sobre ExamAttemptAnswer / ExamAttempt (una fila por
+pregunta u opción, no por respuesta), así que el costo casi no crece con la cantidad de
+intentos. El resultado se guarda en caché hasta que se envía o recalifica un intento o
+cambian las preguntas (la clave lleva ThemeExam.content_version);
+la caché es compartida (settings.CACHES), así que también la invalidan submit_expired_attempts
+y rescore_exam_attempts corriendo desde cron o una shell.
+
+Discriminación: proporción de aciertos del 27 % superior menos la del 27 % inferior
+(por nota). Con empates en el corte, el grupo incluye a todos los de esa nota.
+"""
+from django.core.cache import cache
+from django.db.models import Avg, Count, IntegerField, Max, Min, Q, StdDev
+from django.db.models.functions import Floor, Least
+
+from quizzes.models import ExamAttempt, ExamAttemptAnswer
+from quizzes.utils import load_exam_questions
+
+CACHE_TIMEOUT = 60 * 60
+GROUP_FRACTION = 0.27
+SCORE_BUCKETS = 10
+
+
+def cache_key(exam_id, content_version):
+    """Incluye content_version (como exam_snapshot): editar preguntas u opciones la invalida sola."""
+    return f'quizzes:item_analysis:{exam_id}:{content_version}'
+
+
+def invalidate_item_analysis(*exam_versions):
+    """Recibe pares (exam_id, content_version), los mismos que arman la clave."""
+    cache.delete_many([cache_key(pk, version) for pk, version in exam_versions])
+
+
+def _rate(part, whole):
+    return round(part / whole, 3) if whole else None
+
+
+def _score_cutoffs(submitted, n):
+    """Nota mínima del grupo superior y máxima del inferior (o None si no hay dispersión)."""
+    k = max(1, round(n * GROUP_FRACTION))
+    upper = submitted.order_by('-score', 'pk').values_list('score', flat=True)[k - 1]
+    lower = submitted.order_by('score', 'pk').values_list('score', flat=True)[k - 1]
+    if upper <= lower:
+        return None, None
+    return upper, lower
+
+
+def compute_item_analysis(exam):
+    submitted = ExamAttempt.objects.filter(exam=exam, submitted_at__isnull=False, score__isnull=False)
+    summary = submitted.aggregate(
+        n=Count('id'),
+        mean=Avg('score'),
+        stdev=StdDev('score'),
+        min=Min('score'),
+        max=Max('score'),
+    )
+    n = summary['n']
+    result = {
+        'attempts': n,
+        'summary': summary,
+        'distribution': [],
+        'questions': [],
+        'has_discrimination': False,
+    }
+    if not n:
+        return result
+
+    bucket_counts = dict(
+        submitted
+        .annotate(bucket=Least(Floor('score'), SCORE_BUCKETS - 1, output_field=IntegerField()))
+        .values('bucket')
+        .annotate(count=Count('id'))
+        .values_list('bucket', 'count')
+        .order_by()
+    )
+    result['distribution'] = [
+        {
+            'label': f'{b}–{b + 1}',
+            'count': bucket_counts.get(b, 0),
+            'percent': round(100 * bucket_counts.get(b, 0) / n),
+        }
+        for b in range(SCORE_BUCKETS)
+    ]
+
+    upper, lower = _score_cutoffs(submitted, n)
+    result['has_discrimination'] = upper is not None
+    is_correct = Q(selected_option__is_correct=True)
+    answers = ExamAttemptAnswer.objects.filter(
+        attempt__exam=exam,
+        attempt__submitted_at__isnull=False,
+        attempt__score__isnull=False,
+    )
+    aggregates = {
+        'n': Count('id'),
+        'correct': Count('id', filter=is_correct),
+        'dont_know': Count('id', filter=Q(dont_know=True)),
+    }
+    if upper is not None:
+        in_upper = Q(attempt__score__gte=upper)
+        in_lower = Q(attempt__score__lte=lower)
+        aggregates.update(
+            upper_n=Count('id', filter=in_upper),
+            upper_correct=Count('id', filter=in_upper & is_correct),
+            lower_n=Count('id', filter=in_lower),
+            lower_correct=Count('id', filter=in_lower & is_correct),
+        )
+    per_question = {
+        row['question_id']: row
+        for row in answers.values('question_id').annotate(**aggregates).order_by()
+    }
+    per_option = {
+        (qid, oid): count
+        for qid, oid, count in (
+            answers.filter(selected_option__isnull=False)
+            .values('question_id', 'selected_option_id')
+            .annotate(count=Count('id'))
+            .values_list('question_id', 'selected_option_id', 'count')
+            .order_by()
+        )
+    }
+
+    for num, q in enumerate(load_exam_questions(exam), start=1):
+        row = per_question.get(q.pk, {})
+        total = row.get('n', 0)
+        discrimination = None
+        if upper is not None and row.get('upper_n') and row.get('lower_n'):
+            discrimination = round(
+                row['upper_correct'] / row['upper_n'] - row['lower_correct'] / row['lower_n'], 3
+            )
+        result['questions'].append({
+            'num': num,
+            'question': q,
+            'answered': total,
+            'p_value': _rate(row.get('correct', 0), total),
+            'discrimination': discrimination,
+            'dont_know_rate': _rate(row.get('dont_know', 0), total),
+            'options': [
+                {
+                    'option': o,
+                    'rate': _rate(per_option.get((q.pk, o.pk), 0), total),
+                }
+                for o in q.option_list
+            ],
+        })
+    return result
+
+
+def get_item_analysis(exam):
+    key = cache_key(exam.pk, exam.content_version)
+    result = cache.get(key)
+    if result is None:
+        result = compute_item_analysis(exam)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
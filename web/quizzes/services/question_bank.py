@@ -0,0 +1,177 @@
+"""
+Banco de preguntas compartido entre exámenes y cursos.
+
+- Importación desde Excel (mismo formato que los exámenes) en lotes con bulk_create; las
+  preguntas repetidas se detectan por hash del contenido y no se vuelven a guardar.
+- Búsqueda por etiquetas (índice de la tabla intermedia) y por texto: en MariaDB con el
+  índice FULLTEXT de la migración 0009_question_bank; en otros motores, icontains.
+- Agregar al examen copia las preguntas como ExamQuestion con su versión del banco
+  (elegidas una por una o sorteadas dentro de una etiqueta).
+"""
+import hashlib
+import re
+import secrets
+from itertools import islice
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from quizzes.models import BankAnswerOption, BankQuestion, QuestionTag
+from quizzes.services.excel_quiz import IMPORT_BATCH_SIZE, import_questions_for_exam
+
+OPTION_KEYS = ('opcion_a', 'opcion_b', 'opcion_c')
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _normalize(text):
+    return ' '.join(str(text or '').split()).lower()
+
+
+def content_hash(row):
+    """Hash de pregunta, opciones y respuesta correcta (ignora mayúsculas y espacios repetidos)."""
+    parts = [_normalize(row['pregunta'])] + [_normalize(row[k]) for k in OPTION_KEYS]
+    parts.append(str(row['correct_index']))
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def parse_tag_names(raw):
+    """'Álgebra, tema 1' -> ['álgebra', 'tema 1'] (sin repetidos, en orden)."""
+    names = []
+    for part in str(raw or '').split(','):
+        name = _normalize(part)[:60]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_tags(names):
+    existing = {t.name: t for t in QuestionTag.objects.filter(name__in=names)}
+    missing = [QuestionTag(name=n) for n in names if n not in existing]
+    if missing:
+        QuestionTag.objects.bulk_create(missing, ignore_conflicts=True)
+        existing = {t.name: t for t in QuestionTag.objects.filter(name__in=names)}
+    return [existing[n] for n in names]
+
+
+def import_rows_to_bank(rows, user, tag_names=(), batch_size=IMPORT_BATCH_SIZE):
+    """
+    Carga filas (de open_excel_rows) al banco. Usar dentro de transaction.atomic.
+    Devuelve (creadas, repetidas). Las repetidas igual reciben las etiquetas indicadas.
+    """
+    tags = get_or_create_tags(list(tag_names)) if tag_names else []
+    Through = BankQuestion.tags.through
+    created = duplicates = 0
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        by_hash = {}
+        for row in batch:
+            by_hash.setdefault(content_hash(row), row)
+        duplicates += len(batch) - len(by_hash)
+        known = dict(
+            BankQuestion.objects.filter(content_hash__in=list(by_hash)).values_list('content_hash', 'id')
+        )
+        duplicates += len(known)
+        new_rows = {h: row for h, row in by_hash.items() if h not in known}
+        if new_rows:
+            BankQuestion.objects.bulk_create(
+                [
+                    BankQuestion(
+                        text=row['pregunta'],
+                        correct_explanation=row.get('explicacion') or '',
+                        content_hash=h,
+                        created_by=user,
+                    )
+                    for h, row in new_rows.items()
+                ],
+                ignore_conflicts=True,
+            )
+            # Sin RETURNING (MySQL) los objetos no traen id: se buscan por hash.
+            new_ids = dict(
+                BankQuestion.objects.filter(content_hash__in=list(new_rows)).values_list('content_hash', 'id')
+            )
+            BankAnswerOption.objects.bulk_create([
+                BankAnswerOption(question_id=new_ids[h], text=row[k], is_correct=(j == row['correct_index']))
+                for h, row in new_rows.items()
+                for j, k in enumerate(OPTION_KEYS)
+            ])
+            created += len(new_rows)
+            known.update(new_ids)
+        if tags:
+            Through.objects.bulk_create(
+                [
+                    Through(bankquestion_id=qid, questiontag_id=tag.pk)
+                    for qid in known.values()
+                    for tag in tags
+                ],
+                ignore_conflicts=True,
+            )
+    return created, duplicates
+
+
+def _fulltext_query(text):
+    """Términos para MATCH ... IN BOOLEAN MODE: todos obligatorios y con prefijo."""
+    return ' '.join(f'+{w}*' for w in _WORD_RE.findall(text))
+
+
+def search_bank(query='', tag_names=()):
+    """Preguntas del banco que tienen todas las etiquetas y coinciden con el texto."""
+    qs = BankQuestion.objects.all()
+    for name in tag_names:
+        qs = qs.filter(tags__name=name)
+    query = (query or '').strip()
+    if query:
+        terms = _fulltext_query(query)
+        if connection.vendor == 'mysql' and terms:
+            qs = qs.annotate(
+                relevance=RawSQL(
+                    'MATCH (quizzes_bankquestion.text) AGAINST (%s IN BOOLEAN MODE)', (terms,)
+                ),
+            ).filter(relevance__gt=0).order_by('-relevance', '-id')
+        else:
+            for word in _WORD_RE.findall(query):
+                qs = qs.filter(text__icontains=word)
+    return qs.distinct() if tag_names else qs
+
+
+def sample_bank_question_ids(qs, count, rng=None):
+    """Sortea `count` ids del queryset (trae solo los id, no las filas)."""
+    rng = rng or secrets.SystemRandom()
+    ids = list(qs.values_list('id', flat=True).order_by())
+    return rng.sample(ids, min(count, len(ids)))
+
+
+def bank_rows(question_ids):
+    """Filas con el formato de open_excel_rows para copiar preguntas del banco a un examen."""
+    questions = (
+        BankQuestion.objects
+        .filter(pk__in=question_ids)
+        .prefetch_related('options')
+        .order_by('id')
+    )
+    for q in questions:
+        options = list(q.options.all())
+        correct = [i for i, o in enumerate(options) if o.is_correct]
+        if len(options) != 3 or len(correct) != 1:
+            continue
+        yield {
+            'pregunta': q.text,
+            'opcion_a': options[0].text,
+            'opcion_b': options[1].text,
+            'opcion_c': options[2].text,
+            'correct_index': correct[0],
+            'explicacion': q.correct_explanation,
+            'bank_question_id': q.pk,
+            'bank_version': q.version,
+        }
+
+
+def add_bank_questions_to_exam(exam, question_ids):
+    """Copia las preguntas del banco al final del examen, salvo las que ya tiene. Devuelve cuántas agregó."""
+    already = set(exam.questions.filter(bank_question__isnull=False).values_list('bank_question_id', flat=True))
+    ids = [pk for pk in question_ids if pk not in already]
+    if not ids:
+        return 0
+    return import_questions_for_exam(exam, bank_rows(ids), replace_existing=False)
@@ -0,0 +1,587 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+
+from attendance.models import AttendanceRecord, AttendanceSession
+from courses.models import Course, Enrollment
+from courses.services.access import get_course_access
+from quizzes.models import (
+    BankQuestion,
+    ExamAnswerOption,
+    ExamAttempt,
+    ExamAttemptAnswer,
+    ExamFocusViolation,
+    ExamQuestion,
+    ThemeExam,
+)
+from quizzes.services.attempt_prep import prepare_exam_attempts
+from quizzes.services.excel_quiz import import_questions_for_exam, open_excel_rows
+from quizzes.services.grading import grade_attempt, rescore_exam, submit_expired_attempts
+from quizzes.services.item_analysis import get_item_analysis
+from quizzes.services.question_bank import add_bank_questions_to_exam, import_rows_to_bank, search_bank
+from quizzes.utils import load_exam_questions, resolve_student_exam_access, resolve_student_exams_access
+from units.models import Unit, Tema
+
+
+User = get_user_model()
+
+
+class ExamTestMixin:
+    """Curso, tema y alumno inscripto; make_exam arma un examen publicado de N preguntas."""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(
+            username='teacher_exam',
+            password='Pass1234!',
+            user_type='teacher',
+        )
+        self.student = User.objects.create_user(
+            username='student_exam',
+            password='Pass1234!',
+            user_type='student',
+        )
+        self.course = Course.objects.create(title='Curso', description='Desc', instructor=self.teacher)
+        Enrollment.objects.create(student=self.student, course=self.course, status='approved')
+        self.unit = Unit.objects.create(
+            title='Unidad', course=self.course, created_by=self.teacher, order=1, is_paused=False,
+        )
+        self.tema = Tema.objects.create(
+            title='Tema', description='Desc', unit=self.unit, created_by=self.teacher, order=1, is_paused=False,
+        )
+
+    def make_exam(self, question_count, title='Examen'):
+        now = timezone.now()
+        exam = ThemeExam.objects.create(
+            title=title,
+            tema=self.tema,
+            course=self.course,
+            created_by=self.teacher,
+            available_from=now - timedelta(hours=1),
+            available_until=now + timedelta(hours=1),
+        )
+        questions = ExamQuestion.objects.bulk_create([
+            ExamQuestion(exam=exam, text=f'Pregunta {i}', order=i)
+            for i in range(question_count)
+        ])
+        ExamAnswerOption.objects.bulk_create([
+            ExamAnswerOption(question=q, text=f'Opción {j}', is_correct=(j == 0))
+            for q in questions
+            for j in range(3)
+        ])
+        ThemeExam.objects.filter(pk=exam.pk).update(is_published=True)
+        exam.refresh_from_db()
+        return exam
+
+    def take_url(self, exam):
+        return reverse('quizzes:exam_take', kwargs={
+            'course_id': self.course.id,
+            'unit_id': self.unit.id,
+            'tema_id': self.tema.id,
+            'exam_id': exam.id,
+        })
+
+
+class ExamTakeQueryCountTests(ExamTestMixin, TestCase):
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_take_page_query_count_does_not_depend_on_exam_size(self):
+        small = self.make_exam(3, title='Chico')
+        large = self.make_exam(40, title='Grande')
+        self.client.force_login(self.student)
+        # Los cursos del alumno (courses.services.access) quedan en caché desde el primer request.
+        get_course_access(self.student)
+
+        first_small = self._count_queries(self.take_url(small))
+        first_large = self._count_queries(self.take_url(large))
+        self.assertEqual(first_small, first_large)
+        self.assertEqual(ExamAttempt.objects.get(exam=large).answers.count(), 40)
+
+        steady_small = self._count_queries(self.take_url(small) + '?step=2')
+        steady_large = self._count_queries(self.take_url(large) + '?step=30')
+        self.assertEqual(steady_small, steady_large)
+
+
+class ExamAccessBatchTests(ExamTestMixin, TestCase):
+    def test_many_exams_resolve_in_fixed_queries(self):
+        exams = [self.make_exam(1, title=f'Examen {i}') for i in range(6)]
+        session_date = timezone.localdate()
+        ThemeExam.objects.filter(pk=exams[1].pk).update(attendance_date=session_date)
+        ThemeExam.objects.filter(pk=exams[2].pk).update(attendance_date=session_date - timedelta(days=1))
+        session = AttendanceSession.objects.create(
+            course=self.course, date=session_date, created_by=self.teacher, updated_by=self.teacher,
+        )
+        AttendanceRecord.objects.create(
+            session=session, student=self.student, status='present', updated_by=self.teacher,
+        )
+        other_course = Course.objects.create(title='Otro', description='Desc', instructor=self.teacher)
+        ThemeExam.objects.filter(pk=exams[3].pk).update(course=other_course)
+        ThemeExam.objects.filter(pk=exams[4].pk).update(available_until=timezone.now() - timedelta(minutes=1))
+
+        exams = list(ThemeExam.objects.filter(pk__in=[e.pk for e in exams]).order_by('pk'))
+        with self.assertNumQueries(3):
+            access = resolve_student_exams_access(self.student, exams)
+        self.assertEqual([access[e.pk][0] for e in exams], [True, True, False, False, False, True])
+        self.assertIn('estuviste presente', access[exams[2].pk][1])
+        self.assertIn('inscripto', access[exams[3].pk][1])
+        for e in exams:
+            self.assertEqual(
+                resolve_student_exam_access(self.student, e.course, e.tema, e), access[e.pk],
+            )
+
+
+class ExamAnswerAutosaveTests(ExamTestMixin, TestCase):
+    def test_autosave_updates_one_answer_and_returns_progress(self):
+        exam = self.make_exam(4)
+        self.client.force_login(self.student)
+        self.client.get(self.take_url(exam))
+        attempt = ExamAttempt.objects.get(exam=exam, student=self.student)
+        question = exam.questions.order_by('order').first()
+        option = question.answer_options.first()
+        url = reverse('quizzes:exam_answer_autosave', kwargs={
+            'course_id': self.course.id,
+            'unit_id': self.unit.id,
+            'tema_id': self.tema.id,
+            'exam_id': exam.id,
+        })
+
+        response = self.client.post(url, {'question': question.id, 'value': option.id})
+        self.assertEqual(response.json(), {'answered': 1, 'total': 4})
+        answer = attempt.answers.get(question=question)
+        self.assertEqual(answer.selected_option_id, option.id)
+
+        response = self.client.post(url, {'question': question.id, 'value': '__dk__'})
+        self.assertEqual(response.json(), {'answered': 1, 'total': 4})
+        answer.refresh_from_db()
+        self.assertTrue(answer.dont_know)
+        self.assertIsNone(answer.selected_option_id)
+
+        other_option = exam.questions.order_by('order').last().answer_options.first()
+        response = self.client.post(url, {'question': question.id, 'value': other_option.id})
+        self.assertEqual(response.status_code, 400)
+
+
+class PrepareExamAttemptsTests(ExamTestMixin, TestCase):
+    def test_prepared_attempt_opens_without_inserts(self):
+        other = User.objects.create_user(username='student_exam2', password='Pass1234!', user_type='student')
+        Enrollment.objects.create(student=other, course=self.course, status='pending')
+        exam = self.make_exam(5)
+
+        self.assertEqual(prepare_exam_attempts(exam), 1)
+        self.assertEqual(prepare_exam_attempts(exam), 0)
+        attempt = ExamAttempt.objects.get(exam=exam)
+        self.assertEqual(attempt.student, self.student)
+        self.assertTrue(attempt.is_prepared)
+        self.assertEqual(len(attempt.shuffle_state['question_ids']), 5)
+        self.assertEqual(ExamAttemptAnswer.objects.filter(attempt=attempt).count(), 5)
+
+        self.client.force_login(self.student)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.take_url(exam))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(q['sql'].startswith('INSERT') for q in ctx.captured_queries))
+        attempt.refresh_from_db()
+        self.assertFalse(attempt.is_prepared)
+
+
+class ExamSnapshotTests(ExamTestMixin, TestCase):
+    def test_snapshot_is_cached_and_invalidated_by_edits(self):
+        exam = self.make_exam(3)
+        first = load_exam_questions(exam)
+        with self.assertNumQueries(0):
+            cached = load_exam_questions(exam)
+            self.assertEqual([q.pk for q in cached], [q.pk for q in first])
+            self.assertEqual(len(cached[0].option_list), 3)
+
+        question = ExamQuestion.objects.get(pk=first[0].pk)
+        question.text = 'Pregunta corregida'
+        question.save()
+        exam.refresh_from_db()
+        self.assertEqual(load_exam_questions(exam)[0].text, 'Pregunta corregida')
+
+        option = question.answer_options.order_by('id').last()
+        option.text = 'Opción corregida'
+        option.save()
+        exam.refresh_from_db()
+        options = load_exam_questions(exam)[0].option_list
+        self.assertEqual(options[2].text, 'Opción corregida')
+
+
+    def test_saving_the_exam_keeps_a_concurrent_version_bump(self):
+        exam = self.make_exam(2)
+        loaded = ThemeExam.objects.get(pk=exam.pk)
+        version = loaded.content_version
+        # Otra pestaña edita una pregunta mientras se edita el examen.
+        question = exam.questions.order_by('order').first()
+        question.text = 'Pregunta corregida'
+        question.save()
+
+        loaded.title = 'Examen renombrado'
+        loaded.save()
+        loaded.refresh_from_db()
+        self.assertEqual(loaded.title, 'Examen renombrado')
+        self.assertEqual(loaded.content_version, version + 1)
+        self.assertEqual(load_exam_questions(loaded)[0].text, 'Pregunta corregida')
+
+
+class ExamGradingTests(ExamTestMixin, TestCase):
+    def test_rescore_fixes_scores_after_correct_option_change(self):
+        exam = self.make_exam(4)
+        questions = list(exam.questions.order_by('order'))
+        students = [self.student] + [
+            User.objects.create_user(username=f'alumno_nota{i}', password='Pass1234!', user_type='student')
+            for i in range(2)
+        ]
+        for student in students:
+            attempt = ExamAttempt.objects.create(exam=exam, student=student)
+            # Todos eligen la primera opción (marcada correcta) de las dos primeras preguntas.
+            ExamAttemptAnswer.objects.bulk_create([
+                ExamAttemptAnswer(
+                    attempt=attempt,
+                    question=q,
+                    selected_option=q.answer_options.order_by('id').first() if i < 2 else None,
+                    dont_know=i >= 2,
+                )
+                for i, q in enumerate(questions)
+            ])
+            with self.assertNumQueries(1):
+                correct, total, score = grade_attempt(attempt)
+            self.assertEqual((correct, total, score), (2, 4, Decimal('5.00')))
+            ExamAttempt.objects.filter(pk=attempt.pk).update(
+                correct_count=correct, total_questions=total, score=score, submitted_at=timezone.now(),
+            )
+
+        # La opción correcta de la primera pregunta estaba mal cargada.
+        first_options = list(questions[0].answer_options.order_by('id'))
+        ExamAnswerOption.objects.filter(pk=first_options[0].pk).update(is_correct=False)
+        ExamAnswerOption.objects.filter(pk=first_options[1].pk).update(is_correct=True)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(rescore_exam(exam), (3, 3))
+        self.assertEqual(
+            set(ExamAttempt.objects.filter(exam=exam).values_list('score', 'correct_count')),
+            {(Decimal('2.50'), 1)},
+        )
+        self.assertEqual(rescore_exam(exam), (3, 0))
+
+
+class AttemptDeadlineTests(ExamTestMixin, TestCase):
+    def test_opening_the_exam_sets_deadline_from_time_limit(self):
+        exam = self.make_exam(2)
+        ThemeExam.objects.filter(pk=exam.pk).update(time_limit_minutes=20)
+        self.client.force_login(self.student)
+        response = self.client.get(self.take_url(exam))
+        self.assertEqual(response.status_code, 200)
+        attempt = ExamAttempt.objects.get(exam=exam, student=self.student)
+        self.assertAlmostEqual(
+            attempt.deadline_at, attempt.started_at + timedelta(minutes=20), delta=timedelta(seconds=1),
+        )
+        self.assertIn(response.context['seconds_left'], range(1190, 1201))
+
+    def test_sweeper_submits_expired_attempts_in_bulk(self):
+        exam = self.make_exam(2)
+        questions = list(exam.questions.order_by('order'))
+        past = timezone.now() - timedelta(minutes=5)
+        attempts = []
+        for i in range(4):
+            student = User.objects.create_user(username=f'alumno_tiempo{i}', password='Pass1234!', user_type='student')
+            attempt = ExamAttempt.objects.create(exam=exam, student=student, deadline_at=past)
+            ExamAttemptAnswer.objects.bulk_create([
+                ExamAttemptAnswer(
+                    attempt=attempt,
+                    question=q,
+                    selected_option=q.answer_options.order_by('id').first() if j <= i % 2 else None,
+                )
+                for j, q in enumerate(questions)
+            ])
+            attempts.append(attempt)
+        still_running = ExamAttempt.objects.create(
+            exam=exam, student=self.student, deadline_at=timezone.now() + timedelta(minutes=5),
+        )
+
+        self.assertEqual(submit_expired_attempts(batch_size=3), 4)
+        rows = ExamAttempt.objects.filter(pk__in=[a.pk for a in attempts]).order_by('pk')
+        self.assertEqual(
+            [(a.submitted_at, a.correct_count, a.score) for a in rows],
+            [(past, 1, Decimal('5.00')), (past, 2, Decimal('10.00'))] * 2,
+        )
+        still_running.refresh_from_db()
+        self.assertIsNone(still_running.submitted_at)
+        self.assertEqual(submit_expired_attempts(), 0)
+
+    def test_expired_attempt_is_closed_on_open_and_rejects_autosave(self):
+        exam = self.make_exam(2)
+        self.client.force_login(self.student)
+        self.client.get(self.take_url(exam))
+        attempt = ExamAttempt.objects.get(exam=exam, student=self.student)
+        ExamAttempt.objects.filter(pk=attempt.pk).update(deadline_at=timezone.now() - timedelta(minutes=2))
+
+        question = exam.questions.order_by('order').first()
+        response = self.client.post(self.take_url(exam).replace('realizar/', 'realizar/respuesta/'), {
+            'question': question.pk,
+            'value': str(question.answer_options.order_by('id').first().pk),
+        })
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(response.json()['expired'])
+
+        response = self.client.get(self.take_url(exam))
+        self.assertRedirects(response, reverse('quizzes:exam_result', kwargs={
+            'course_id': self.course.id,
+            'unit_id': self.unit.id,
+            'tema_id': self.tema.id,
+            'exam_id': exam.id,
+        }))
+        attempt.refresh_from_db()
+        self.assertTrue(attempt.is_submitted())
+        self.assertEqual(attempt.correct_count, 0)
+
+
+class ItemAnalysisTests(ExamTestMixin, TestCase):
+    def _submit(self, exam, student, picks):
+        """picks: por pregunta, índice de opción elegida o None para «No lo sé»."""
+        attempt = ExamAttempt.objects.create(exam=exam, student=student)
+        for q, pick in zip(exam.questions.order_by('order'), picks):
+            ExamAttemptAnswer.objects.create(
+                attempt=attempt,
+                question=q,
+                selected_option=None if pick is None else q.answer_options.order_by('id')[pick],
+                dont_know=pick is None,
+            )
+        attempt.correct_count, attempt.total_questions, attempt.score = grade_attempt(attempt)
+        attempt.submitted_at = timezone.now()
+        attempt.save(update_fields=['correct_count', 'total_questions', 'score', 'submitted_at'])
+        return attempt
+
+    def test_item_statistics_and_cache_invalidation(self):
+        exam = self.make_exam(2)
+        students = [self.student] + [
+            User.objects.create_user(username=f'alumno_stats{i}', password='Pass1234!', user_type='student')
+            for i in range(3)
+        ]
+        # Pregunta 1 la aciertan los dos mejores; pregunta 2 solo el mejor.
+        self._submit(exam, students[0], [0, 0])
+        self._submit(exam, students[1], [0, 1])
+        self._submit(exam, students[2], [1, None])
+
+        stats = get_item_analysis(exam)
+        self.assertEqual(stats['attempts'], 3)
+        first, second = stats['questions']
+        self.assertEqual(first['p_value'], 0.667)
+        self.assertEqual(first['discrimination'], 1.0)
+        self.assertEqual([o['rate'] for o in first['options']], [0.667, 0.333, 0.0])
+        self.assertEqual(second['dont_know_rate'], 0.333)
+        self.assertEqual(sum(b['count'] for b in stats['distribution']), 3)
+        self.assertEqual(stats['distribution'][9]['count'], 1)
+
+        with self.assertNumQueries(0):
+            get_item_analysis(exam)
+
+        self._submit(exam, students[3], [None, None])
+        self.assertEqual(get_item_analysis(exam)['attempts'], 4)
+
+        # Corregir la opción correcta sin recalificar también invalida el análisis.
+        option = exam.questions.order_by('order').first().answer_options.order_by('id')[1]
+        option.is_correct = True
+        option.save()
+        exam.refresh_from_db()
+        self.assertEqual(get_item_analysis(exam)['questions'][0]['p_value'], 0.75)
+
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse('quizzes:exam_statistics', kwargs={
+            'course_id': self.course.id,
+            'unit_id': self.unit.id,
+            'tema_id': self.tema.id,
+            'exam_id': exam.id,
+        }))
+        self.assertContains(response, 'Análisis por pregunta')
+
+
+class FocusViolationTests(ExamTestMixin, TestCase):
+    def test_each_violation_appends_a_row_and_increments_counter(self):
+        exam = self.make_exam(2)
+        self.client.force_login(self.student)
+        self.client.get(self.take_url(exam))
+        url = reverse('quizzes:exam_focus_violation', kwargs={
+            'course_id': self.course.id,
+            'unit_id': self.unit.id,
+            'tema_id': self.tema.id,
+            'exam_id': exam.id,
+        })
+
+        self.client.post(url, {'type': 'visibility'})
+        self.client.post(url, {'type': 'blur'})
+        response = self.client.post(url, {'type': 'visibility'})
+        self.assertEqual(response.json(), {'violations': 3, 'limit': 3, 'should_force_submit': True})
+
+        attempt = ExamAttempt.objects.get(exam=exam, student=self.student)
+        self.assertEqual(attempt.focus_violations, 3)
+        self.assertEqual(
+            list(ExamFocusViolation.objects.filter(attempt=attempt).values_list('violation_type', flat=True)),
+            ['visibility', 'blur', 'visibility'],
+        )
+
+
+class ExcelImportTests(ExamTestMixin, TestCase):
+    def _workbook(self, count, bad_rows=()):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('preguntas')
+        ws.append(['pregunta', 'opcion_a', 'opcion_b', 'opcion_c', 'correcta', 'explicacion'])
+        for i in range(count):
+            if i in bad_rows:
+                ws.append([f'Pregunta {i}', 'A', '', 'C', 'a', ''])
+            else:
+                ws.append([f'Pregunta {i}', f'A{i}', f'B{i}', f'C{i}', 'abc'[i % 3], f'Porque {i}'])
+        buf = BytesIO()
+        wb.save(buf)
+        buf.seek(0)
+        return buf
+
+    def test_large_bank_imports_in_batches(self):
+        exam = self.make_exam(2)
+        version = exam.content_version
+        rows, errors = open_excel_rows(self._workbook(2000, bad_rows={10, 1500}))
+
+        with CaptureQueriesContext(connection) as ctx:
+            created = import_questions_for_exam(exam, rows, replace_existing=True)
+        self.assertEqual(created, 1998)
+        self.assertEqual(errors, [
+            'Fila 12: las tres opciones son obligatorias.',
+            'Fila 1502: las tres opciones son obligatorias.',
+        ])
+        # Antes eran 4 INSERT por pregunta (8000); SQLite parte cada bulk_create en varios INSERT.
+        self.assertLess(len(ctx.captured_queries), 60)
+
+        self.assertEqual(exam.questions.count(), 1998)
+        self.assertEqual(ExamAnswerOption.objects.filter(question__exam=exam).count(), 1998 * 3)
+        last = exam.questions.order_by('-order').first()
+        self.assertEqual((last.order, last.text), (1997, 'Pregunta 1999'))
+        self.assertEqual(last.answer_options.get(is_correct=True).text, 'B1999')
+        exam.refresh_from_db()
+        self.assertEqual(exam.content_version, version + 1)
+
+    def test_file_without_valid_rows_keeps_existing_questions(self):
+        exam = self.make_exam(3)
+        rows, errors = open_excel_rows(self._workbook(1, bad_rows={0}))
+        self.assertEqual(import_questions_for_exam(exam, rows, replace_existing=True), 0)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(exam.questions.count(), 3)
+
+
+class ExcelExportTests(ExamTestMixin, TestCase):
+    def _download(self, name, exam):
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse(f'quizzes:{name}', kwargs={
+            'course_id': self.course.id,
+            'unit_id': self.unit.id,
+            'tema_id': self.tema.id,
+            'exam_id': exam.id,
+        }))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        wb = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        return [list(row) for row in wb.worksheets[0].iter_rows(values_only=True)]
+
+    def test_results_sheet_has_one_row_per_submitted_attempt(self):
+        exam = self.make_exam(3)
+        questions = list(exam.questions.order_by('order'))
+        started = timezone.now() - timedelta(minutes=30)
+        attempt = ExamAttempt.objects.create(
+            exam=exam,
+            student=self.student,
+            submitted_at=started + timedelta(minutes=12),
+            score=Decimal('3.33'),
+            correct_count=1,
+            total_questions=3,
+            focus_violations=2,
+        )
+        ExamAttempt.objects.filter(pk=attempt.pk).update(started_at=started)
+        ExamAttemptAnswer.objects.bulk_create([
+            ExamAttemptAnswer(attempt=attempt, question=questions[0],
+                              selected_option=questions[0].answer_options.order_by('id').first()),
+            ExamAttemptAnswer(attempt=attempt, question=questions[1],
+                              selected_option=questions[1].answer_options.order_by('id').last()),
+            ExamAttemptAnswer(attempt=attempt, question=questions[2], dont_know=True),
+        ])
+        other = User.objects.create_user(username='sin_entregar', password='Pass1234!', user_type='student')
+        ExamAttempt.objects.create(exam=exam, student=other)
+
+        rows = self._download('exam_results_export', exam)
+        self.assertEqual(rows[0][-5:], ['salidas_de_pantalla', 'enviado', 'P1', 'P2', 'P3'])
+        self.assertEqual(rows[1][-3:], ['A', 'A', 'A'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2][1:7], ['student_exam', 3.33, 1, 3, 12.0, 2])
+        self.assertEqual(rows[2][-3:], ['A', 'C', 'No lo sé'])
+
+    def test_questions_export_lists_options_and_correct_letter(self):
+        exam = self.make_exam(4)
+        rows = self._download('exam_export', exam)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1][:5], ['Pregunta 0', 'Opción 0', 'Opción 1', 'Opción 2', 'a'])
+
+
+class QuestionBankTests(ExamTestMixin, TestCase):
+    def _rows(self, count, prefix='Pregunta'):
+        return [
+            {
+                'pregunta': f'{prefix} {i} sobre fracciones',
+                'opcion_a': 'A', 'opcion_b': 'B', 'opcion_c': 'C',
+                'correct_index': i % 3,
+                'explicacion': '',
+            }
+            for i in range(count)
+        ]
+
+    def test_bank_dedupes_imports_and_exams_sample_per_attempt(self):
+        self.assertEqual(import_rows_to_bank(self._rows(12), self.teacher, ['fracciones']), (12, 0))
+        # Reimportar la misma planilla en otro curso no duplica filas.
+        self.assertEqual(import_rows_to_bank(self._rows(12), self.teacher, ['unidad 2']), (0, 12))
+        self.assertEqual(BankQuestion.objects.count(), 12)
+        self.assertEqual(search_bank('fracciones 3', ['fracciones', 'unidad 2']).count(), 1)
+
+        exam = self.make_exam(0)
+        ids = list(search_bank(tag_names=['fracciones']).values_list('id', flat=True))
+        self.assertEqual(add_bank_questions_to_exam(exam, ids), 12)
+        self.assertEqual(add_bank_questions_to_exam(exam, ids), 0)
+        copy = exam.questions.select_related('bank_question').first()
+        self.assertEqual(copy.bank_version, copy.bank_question.version)
+
+        ThemeExam.objects.filter(pk=exam.pk).update(questions_per_attempt=5)
+        self.client.force_login(self.student)
+        response = self.client.get(self.take_url(exam))
+        self.assertEqual(response.status_code, 200)
+        attempt = ExamAttempt.objects.get(exam=exam, student=self.student)
+        self.assertEqual(len(attempt.shuffle_state['question_ids']), 5)
+        self.assertEqual(attempt.answers.count(), 5)
+
+        # Editar la pregunta del banco sube su versión; la copia del examen queda igual.
+        bank_question = copy.bank_question
+        bank_question.text = 'Texto corregido'
+        bank_question.save()
+        bank_question.refresh_from_db()
+        copy.refresh_from_db()
+        self.assertEqual(bank_question.version, copy.bank_version + 1)
+        self.assertNotEqual(copy.text, 'Texto corregido')
+
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse('quizzes:question_bank'), {'tag': 'fracciones'})
+        self.assertContains(response, 'Preguntas (12)')
+        response = self.client.get(reverse('quizzes:exam_add_from_bank', kwargs={
+            'course_id': self.course.id,
+            'unit_id': self.unit.id,
+            'tema_id': self.tema.id,
+            'exam_id': exam.id,
+        }))
+        self.assertContains(response, 'Ya está en el examen')
@@ -5,6 +5,7 @@ from . import views
 app_name = 'quizzes'
 
 urlpatterns = [
+    path('banco-preguntas/', views.question_bank, name='question_bank'),
     path(
         'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/exams/',
         views.exam_list,
@@ -20,6 +21,11 @@ urlpatterns = [
         views.exam_manage,
         name='exam_manage',
     ),
+    path(
+        'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/exams/<int:exam_id>/estadisticas/',
+        views.exam_statistics,
+        name='exam_statistics',
+    ),
     path(
         'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/exams/<int:exam_id>/edit/',
         views.exam_edit,
@@ -45,6 +51,11 @@ urlpatterns = [
         views.question_delete,
         name='question_delete',
     ),
+    path(
+        'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/exams/<int:exam_id>/banco/',
+        views.exam_add_from_bank,
+        name='exam_add_from_bank',
+    ),
     path(
         'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/exams/<int:exam_id>/import/',
         views.exam_import,
@@ -55,6 +66,11 @@ urlpatterns = [
         views.exam_export,
         name='exam_export',
     ),
+    path(
+        'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/exams/<int:exam_id>/resultados.xlsx',
+        views.exam_results_export,
+        name='exam_results_export',
+    ),
     path(
         'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/exams/<int:exam_id>/template.xlsx',
         views.exam_template_download,
@@ -65,6 +81,11 @@ urlpatterns = [
         views.exam_take,
         name='exam_take',
     ),
+    path(
+        'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/exams/<int:exam_id>/realizar/respuesta/',
+        views.exam_answer_autosave,
+        name='exam_answer_autosave',
+    ),
     path(
         'courses/<int:course_id>/units/<int:unit_id>/temas/<int:tema_id>/exams/<int:exam_id>/violation/',
         views.record_focus_violation,
@@ -3,7 +3,7 @@ import secrets
 
 from django.db import transaction
 
-from .models import ExamAttempt, ExamAttemptAnswer
+from .models import ExamAnswerOption, ExamAttempt, ExamAttemptAnswer, ExamQuestion, ThemeExam
 
 # Token en shuffle_state JSON (mezclado con ids de opción como strings).
 DONT_KNOW_SHUFFLE_TOKEN = 'dk'
@@ -25,7 +25,7 @@ def _options_map_needs_rebuild(options_map, questions) -> bool:
             t == DONT_KNOW_SHUFFLE_TOKEN or t == 'dk' for t in toks
         ):
             return True
-        oids = list(q.answer_options.values_list('id', flat=True))
+        oids = [o.pk for o in q.option_list]
         if len(oids) != 3:
             return True
         int_ids = set()
@@ -41,99 +41,170 @@ def _options_map_needs_rebuild(options_map, questions) -> bool:
     return False
 
 
+def load_exam_questions(exam):
+    """
+    Preguntas del examen (orden order, id) armadas desde la copia en caché
+    (quizzes.services.exam_snapshot); sin caché, una sola consulta con LEFT JOIN.
+    Cada pregunta trae sus opciones en la lista `q.option_list` (como Prefetch con to_attr).
+    """
+    from quizzes.services.exam_snapshot import OPTION_FIELDS, QUESTION_FIELDS, get_exam_snapshot
+
+    questions = []
+    for q_row, option_rows in get_exam_snapshot(exam):
+        q = ExamQuestion.from_db('default', QUESTION_FIELDS, q_row)
+        q.option_list = [
+            ExamAnswerOption.from_db('default', OPTION_FIELDS, o_row) for o_row in option_rows
+        ]
+        questions.append(q)
+    return questions
+
+
 def resolve_student_exam_access(user, course, tema, exam):
     """
     Para alumnos: (True, None) si puede rendir el examen; si no, (False, mensaje).
     """
-    from courses.models import Enrollment
+    if exam.tema_id == tema.pk:
+        exam.tema = tema
+    return resolve_student_exams_access(user, [exam])[exam.pk]
+
 
+def resolve_student_exams_access(user, exams):
+    """
+    Versión por lotes de resolve_student_exam_access: {exam.pk: (puede_rendir, mensaje)}.
+    Inscripción (courses.services.access), visibilidad del tema y asistencia se resuelven con
+    a lo sumo tres consultas para toda la lista (ninguna para temas ya cargados con su unidad).
+    """
+    from attendance.models import AttendanceRecord
+    from courses.services.access import get_course_access
+    from units.models import Tema
+
+    exams = list(exams)
+    if not exams:
+        return {}
     if not user.is_student():
-        return False, 'Solo los alumnos pueden realizar el examen.'
-    if not Enrollment.objects.filter(
-        student=user,
-        course=course,
-        status='approved',
-    ).exists():
-        return False, 'No estás inscripto en este curso o tu inscripción no está aprobada.'
-    if not tema.is_visible_to_students():
-        return False, 'Este tema no está disponible para estudiantes.'
-    if not exam.is_published:
-        return False, 'El examen no está publicado.'
-    if not exam.is_available_now():
-        return False, 'El examen no está disponible en este momento.'
-    if exam.attendance_date and not student_is_present_on_date(
-        user, course, exam.attendance_date
-    ):
-        return False, (
-            'Este examen solo puede realizarse si estuviste presente el día '
-            f'{exam.attendance_date.strftime("%d/%m/%Y")} según la asistencia del curso.'
+        return {e.pk: (False, 'Solo los alumnos pueden realizar el examen.') for e in exams}
+
+    course_ids = {e.course_id for e in exams}
+    enrolled = get_course_access(user).enrolled
+
+    tema_field = ThemeExam._meta.get_field('tema')
+    unit_field = Tema._meta.get_field('unit')
+    visible = {}
+    for e in exams:
+        if tema_field.is_cached(e) and unit_field.is_cached(e.tema):
+            visible[e.tema_id] = e.tema.is_visible_to_students()
+    missing = {e.tema_id for e in exams} - set(visible)
+    if missing:
+        for tema_id, tema_paused, unit_paused in Tema.objects.filter(pk__in=missing).values_list(
+            'pk', 'is_paused', 'unit__is_paused'
+        ):
+            visible[tema_id] = not tema_paused and not unit_paused
+
+    attendance_dates = {e.attendance_date for e in exams if e.attendance_date}
+    present = set()
+    if attendance_dates:
+        present = set(
+            AttendanceRecord.objects.filter(
+                student=user,
+                status='present',
+                session__course_id__in=course_ids,
+                session__date__in=attendance_dates,
+            ).values_list('session__course_id', 'session__date')
         )
-    return True, None
 
+    results = {}
+    for e in exams:
+        if e.course_id not in enrolled:
+            results[e.pk] = (False, 'No estás inscripto en este curso o tu inscripción no está aprobada.')
+        elif not visible.get(e.tema_id, False):
+            results[e.pk] = (False, 'Este tema no está disponible para estudiantes.')
+        elif not e.is_published:
+            results[e.pk] = (False, 'El examen no está publicado.')
+        elif not e.is_available_now():
+            results[e.pk] = (False, 'El examen no está disponible en este momento.')
+        elif e.attendance_date and (e.course_id, e.attendance_date) not in present:
+            results[e.pk] = (False, (
+                'Este examen solo puede realizarse si estuviste presente el día '
+                f'{e.attendance_date.strftime("%d/%m/%Y")} según la asistencia del curso.'
+            ))
+        else:
+            results[e.pk] = (True, None)
+    return results
+
+
+def build_shuffle_state(questions, rng=None, exam=None):
+    """
+    Orden aleatorio de preguntas y de opciones (con «No lo sé») para un intento.
+    Si el examen define questions_per_attempt, se sortea esa cantidad de preguntas.
+    """
+    rng = rng or secrets.SystemRandom()
+    sample_size = exam.questions_per_attempt if exam is not None else None
+    if sample_size and sample_size < len(questions):
+        questions = rng.sample(list(questions), sample_size)
+    q_ids = [q.id for q in questions]
+    rng.shuffle(q_ids)
+    options_map = {}
+    for q in questions:
+        oids = [o.pk for o in q.option_list]
+        if len(oids) == 3:
+            pack = [str(x) for x in oids] + [DONT_KNOW_SHUFFLE_TOKEN]
+            rng.shuffle(pack)
+            options_map[str(q.id)] = pack
+    return {'question_ids': q_ids, 'options': options_map}
 
-def student_is_present_on_date(user, course, attendance_date) -> bool:
-    """True si el alumno tiene registro «presente» en la sesión de asistencia de ese día."""
-    from attendance.models import AttendanceRecord, AttendanceSession
 
-    session = AttendanceSession.objects.filter(
-        course=course,
-        date=attendance_date,
-    ).first()
-    if not session:
-        return False
-    rec = AttendanceRecord.objects.filter(session=session, student=user).first()
-    if not rec:
-        return False
-    return rec.status == 'present'
+def _expected_question_count(exam, available):
+    sample_size = exam.questions_per_attempt if exam is not None else None
+    return min(sample_size, available) if sample_size else available
 
 
-def ensure_attempt_shuffle_and_answers(attempt: ExamAttempt) -> None:
+def ensure_attempt_shuffle_and_answers(attempt: ExamAttempt, questions=None, answers=None):
     """
     Genera shuffle_state y filas de ExamAttemptAnswer si el intento no está enviado.
+    `questions` (de load_exam_questions) y `answers` ({question_id: respuesta}) evitan
+    volver a consultarlos; devuelve el dict de respuestas actualizado.
     """
-    if attempt.is_submitted():
-        return
-
-    exam = attempt.exam
-    questions = list(exam.questions.prefetch_related('answer_options'))
-    if not questions:
-        return
+    if questions is None:
+        questions = load_exam_questions(attempt.exam)
+    if answers is None:
+        answers = {a.question_id: a for a in attempt.answers.all()}
+    if attempt.is_submitted() or not questions:
+        return answers
 
     rng = secrets.SystemRandom()
     state = attempt.shuffle_state or {}
     q_ids_state = state.get('question_ids') or []
-    current_ids = [q.id for q in questions]
+    current_ids = {q.id for q in questions}
+    state_ids = set(q_ids_state)
     options_map = state.get('options') or {}
 
     need_rebuild = (
         not q_ids_state
-        or len(q_ids_state) != len(current_ids)
-        or set(q_ids_state) != set(current_ids)
-        or _options_map_needs_rebuild(options_map, questions)
+        or len(q_ids_state) != len(state_ids)
+        or len(q_ids_state) != _expected_question_count(attempt.exam, len(current_ids))
+        or not state_ids <= current_ids
+        or _options_map_needs_rebuild(options_map, [q for q in questions if q.id in state_ids])
     )
 
     if need_rebuild:
-        q_ids = current_ids[:]
-        rng.shuffle(q_ids)
-        options_map = {}
-        for q in questions:
-            oids = list(q.answer_options.values_list('id', flat=True))
-            if len(oids) == 3:
-                pack = [str(x) for x in oids] + [DONT_KNOW_SHUFFLE_TOKEN]
-                rng.shuffle(pack)
-                options_map[str(q.id)] = pack
-        attempt.shuffle_state = {'question_ids': q_ids, 'options': options_map}
+        attempt.shuffle_state = build_shuffle_state(questions, rng, exam=attempt.exam)
         attempt.save(update_fields=['shuffle_state'])
-        ExamAttemptAnswer.objects.filter(attempt=attempt).exclude(
-            question_id__in=current_ids
-        ).delete()
-
-    with transaction.atomic():
-        for q in questions:
-            ExamAttemptAnswer.objects.get_or_create(
-                attempt=attempt,
-                question=q,
+        state_ids = set(attempt.shuffle_state['question_ids'])
+        stale = [qid for qid in answers if qid not in state_ids]
+        if stale:
+            ExamAttemptAnswer.objects.filter(attempt=attempt, question_id__in=stale).delete()
+            for qid in stale:
+                answers.pop(qid, None)
+
+    missing = [q for q in questions if q.id in state_ids and q.id not in answers]
+    if missing:
+        with transaction.atomic():
+            ExamAttemptAnswer.objects.bulk_create(
+                [ExamAttemptAnswer(attempt=attempt, question=q) for q in missing],
+                ignore_conflicts=True,
             )
+        answers = {a.question_id: a for a in attempt.answers.all()}
+    return answers
 
 
 def build_exam_attempt_review_rows(attempt: ExamAttempt, exam):
@@ -141,30 +212,21 @@ def build_exam_attempt_review_rows(attempt: ExamAttempt, exam):
     Filas para vista de resultado: orden del intento (shuffle), texto de pregunta,
     opción elegida, opción correcta, si acertó, aclaración opcional.
     """
+    questions = {q.pk: q for q in load_exam_questions(exam)}
+    options = {o.pk: o for q in questions.values() for o in q.option_list}
     state = attempt.shuffle_state or {}
-    q_order = state.get('question_ids') or []
-    if not q_order:
-        q_order = list(
-            exam.questions.order_by('order', 'id').values_list('pk', flat=True)
-        )
-    questions = {
-        q.pk: q
-        for q in exam.questions.prefetch_related('answer_options')
-    }
-    answers = {
-        a.question_id: a
-        for a in attempt.answers.select_related('selected_option', 'question')
-    }
+    q_order = state.get('question_ids') or list(questions)
+    answers = {a.question_id: a for a in attempt.answers.all()}
     rows = []
     for num, qid in enumerate(q_order, start=1):
         q = questions.get(qid)
         if not q:
             continue
         aa = answers.get(qid)
-        selected = aa.selected_option if aa and not aa.dont_know else None
+        selected = options.get(aa.selected_option_id) if aa and not aa.dont_know else None
         selected_dont_know = bool(aa and aa.dont_know)
         correct_opt = next(
-            (o for o in q.answer_options.all() if o.is_correct),
+            (o for o in q.option_list if o.is_correct),
             None,
         )
         rows.append(
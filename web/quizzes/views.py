@@ -5,36 +5,64 @@ from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from django.db import DatabaseError, transaction
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.db.models import Count, F, Q
 from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 
-from courses.models import Course, Enrollment
+from courses.models import Course
+from courses.services.access import user_enrolled_in_course
 from units.models import Unit, Tema
 
-from .forms import ExamImportForm, ExamQuestionWithOptionsForm, ThemeExamForm
-from .models import ExamAttempt, ExamAttemptAnswer, ExamQuestion, ThemeExam
+from .forms import (
+    BankSampleForm,
+    ExamImportForm,
+    ExamQuestionWithOptionsForm,
+    QuestionBankImportForm,
+    ThemeExamForm,
+)
+from .models import (
+    ExamAttempt,
+    ExamAttemptAnswer,
+    ExamFocusViolation,
+    ExamQuestion,
+    QuestionTag,
+    ThemeExam,
+)
 from .services.excel_quiz import (
     build_template_workbook,
+    export_exam_results_workbook,
     export_exam_to_workbook,
     import_questions_for_exam,
-    parse_excel_rows,
+    open_excel_rows,
     workbook_to_response,
 )
+from .services.grading import submit_attempt
+from .services.item_analysis import get_item_analysis
+from .services.question_bank import (
+    add_bank_questions_to_exam,
+    import_rows_to_bank,
+    parse_tag_names,
+    sample_bank_question_ids,
+    search_bank,
+)
 from .utils import (
     DONT_KNOW_POST_VALUE,
     DONT_KNOW_SHUFFLE_TOKEN,
     build_exam_attempt_review_rows,
     ensure_attempt_shuffle_and_answers,
     exam_has_submitted_attempts,
+    load_exam_questions,
     resolve_student_exam_access,
 )
 
 logger = logging.getLogger(__name__)
 
+BANK_PAGE_SIZE = 25
+
 
 def _course_unit_tema(course_id, unit_id, tema_id):
     course = get_object_or_404(Course, pk=course_id)
@@ -44,19 +72,11 @@ def _course_unit_tema(course_id, unit_id, tema_id):
 
 
 def _user_manages_course(user, course):
-    return (
-        course.instructor_id == user.id
-        or course.collaborators.filter(pk=user.pk).exists()
-        or getattr(user, 'user_type', '') == 'admin'
-    )
+    return getattr(user, 'user_type', '') == 'admin' or course.is_instructor_or_collaborator(user)
 
 
 def _student_enrolled_approved(user, course):
-    return Enrollment.objects.filter(
-        student=user,
-        course=course,
-        status='approved',
-    ).exists()
+    return user_enrolled_in_course(user, course)
 
 
 def _get_exam(course_id, unit_id, tema_id, exam_id):
@@ -271,6 +291,142 @@ def exam_manage(request, course_id, unit_id, tema_id, exam_id):
     )
 
 
+def _can_use_question_bank(user):
+    return user.is_teacher() or getattr(user, 'user_type', '') == 'admin'
+
+
+def _bank_page(request, results):
+    results = results.prefetch_related('tags', 'options')
+    return Paginator(results, BANK_PAGE_SIZE).get_page(request.GET.get('page'))
+
+
+@login_required
+@require_http_methods(['GET', 'POST'])
+def question_bank(request):
+    """Banco de preguntas compartido: búsqueda por texto/etiqueta e importación desde Excel."""
+    if not _can_use_question_bank(request.user):
+        messages.error(request, 'No tenés permiso.')
+        return redirect('dashboard')
+
+    if request.method == 'POST':
+        form = QuestionBankImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            rows, errs = open_excel_rows(form.cleaned_data['file'])
+            try:
+                with transaction.atomic():
+                    created, duplicates = import_rows_to_bank(
+                        rows, request.user, parse_tag_names(form.cleaned_data['tags'])
+                    )
+            except Exception as e:
+                messages.error(request, f'Error al importar: {e}')
+            else:
+                for e in errs[:20]:
+                    messages.warning(request, e)
+                if len(errs) > 20:
+                    messages.warning(request, f'…y {len(errs) - 20} errores más.')
+                messages.success(
+                    request,
+                    f'{created} pregunta(s) nuevas en el banco; {duplicates} ya estaban cargadas.',
+                )
+                return redirect('quizzes:question_bank')
+    else:
+        form = QuestionBankImportForm()
+
+    query = request.GET.get('q', '').strip()
+    tag = request.GET.get('tag', '').strip()
+    page = _bank_page(request, search_bank(query, parse_tag_names(tag)))
+    return render(
+        request,
+        'quizzes/question_bank.html',
+        {
+            'form': form,
+            'page': page,
+            'query': query,
+            'tag': tag,
+            'tags': QuestionTag.objects.annotate(n=Count('questions')).order_by('name'),
+        },
+    )
+
+
+@login_required
+@require_http_methods(['GET', 'POST'])
+def exam_add_from_bank(request, course_id, unit_id, tema_id, exam_id):
+    """Agrega al examen preguntas del banco: elegidas o sorteadas entre los resultados del filtro."""
+    course, unit, tema, exam = _get_exam(course_id, unit_id, tema_id, exam_id)
+    if not exam.can_be_managed_by(request.user):
+        messages.error(request, 'No tenés permiso.')
+        return redirect('course_detail', course_id=course_id)
+    manage_url = reverse('quizzes:exam_manage', kwargs={
+        'course_id': course_id,
+        'unit_id': unit_id,
+        'tema_id': tema_id,
+        'exam_id': exam_id,
+    })
+    if exam_has_submitted_attempts(exam):
+        messages.error(request, 'No se pueden agregar preguntas: ya hay entregas de alumnos.')
+        return redirect(manage_url)
+
+    query = request.GET.get('q', '').strip()
+    tag = request.GET.get('tag', '').strip()
+    results = search_bank(query, parse_tag_names(tag))
+    sample_form = BankSampleForm(request.POST if 'sample' in request.POST else None)
+
+    if request.method == 'POST':
+        ids = None
+        if 'sample' in request.POST:
+            if sample_form.is_valid():
+                ids = sample_bank_question_ids(results, sample_form.cleaned_data['count'])
+        else:
+            ids = [int(x) for x in request.POST.getlist('question_ids') if x.isdigit()]
+        if ids is not None:
+            with transaction.atomic():
+                added = add_bank_questions_to_exam(exam, ids)
+            if added:
+                messages.success(request, f'Se agregaron {added} pregunta(s) del banco.')
+            else:
+                messages.info(request, 'No se agregaron preguntas (ninguna elegida o ya estaban en el examen).')
+            return redirect(manage_url)
+
+    return render(
+        request,
+        'quizzes/exam_add_from_bank.html',
+        {
+            'course': course,
+            'unit': unit,
+            'tema': tema,
+            'exam': exam,
+            'page': _bank_page(request, results),
+            'query': query,
+            'tag': tag,
+            'sample_form': sample_form,
+            'in_exam': set(
+                exam.questions.filter(bank_question__isnull=False).values_list('bank_question_id', flat=True)
+            ),
+        },
+    )
+
+
+@login_required
+def exam_statistics(request, course_id, unit_id, tema_id, exam_id):
+    """Análisis de ítems: dificultad, discriminación, distractores y distribución de notas."""
+    course, unit, tema, exam = _get_exam(course_id, unit_id, tema_id, exam_id)
+    if not exam.can_be_managed_by(request.user):
+        messages.error(request, 'No tenés permiso.')
+        return redirect('course_detail', course_id=course_id)
+
+    return render(
+        request,
+        'quizzes/exam_statistics.html',
+        {
+            'course': course,
+            'unit': unit,
+            'tema': tema,
+            'exam': exam,
+            'stats': get_item_analysis(exam),
+        },
+    )
+
+
 @login_required
 @require_http_methods(['GET', 'POST'])
 def question_create(request, course_id, unit_id, tema_id, exam_id):
@@ -438,29 +594,32 @@ def exam_import(request, course_id, unit_id, tema_id, exam_id):
         form = ExamImportForm(request.POST, request.FILES)
         if form.is_valid():
             replace = form.cleaned_data['replace_existing']
-            rows, errs = parse_excel_rows(form.cleaned_data['file'])
+            rows, errs = open_excel_rows(form.cleaned_data['file'])
+            imported = 0
+            failed = False
+            try:
+                with transaction.atomic():
+                    imported = import_questions_for_exam(exam, rows, replace_existing=replace)
+            except Exception as e:
+                failed = True
+                messages.error(request, f'Error al importar: {e}')
+            # Los errores por fila se completan a medida que se consume el iterador.
             if errs:
                 for e in errs[:20]:
                     messages.warning(request, e)
                 if len(errs) > 20:
                     messages.warning(request, f'…y {len(errs) - 20} errores más.')
-            if not rows and not errs:
+            if not failed and not imported and not errs:
                 messages.error(request, 'No se encontraron filas de datos.')
-            elif rows:
-                try:
-                    with transaction.atomic():
-                        import_questions_for_exam(exam, rows, replace_existing=replace)
-                except Exception as e:
-                    messages.error(request, f'Error al importar: {e}')
-                else:
-                    messages.success(request, f'Se importaron {len(rows)} pregunta(s).')
-                    return redirect(
-                        'quizzes:exam_manage',
-                        course_id=course_id,
-                        unit_id=unit_id,
-                        tema_id=tema_id,
-                        exam_id=exam_id,
-                    )
+            elif not failed and imported:
+                messages.success(request, f'Se importaron {imported} pregunta(s).')
+                return redirect(
+                    'quizzes:exam_manage',
+                    course_id=course_id,
+                    unit_id=unit_id,
+                    tema_id=tema_id,
+                    exam_id=exam_id,
+                )
     else:
         form = ExamImportForm()
     return render(
@@ -486,6 +645,16 @@ def exam_export(request, course_id, unit_id, tema_id, exam_id):
     return workbook_to_response(wb, f'examen_{safe}_{exam.pk}.xlsx')
 
 
+@login_required
+def exam_results_export(request, course_id, unit_id, tema_id, exam_id):
+    course, unit, tema, exam = _get_exam(course_id, unit_id, tema_id, exam_id)
+    if not exam.can_be_managed_by(request.user):
+        raise Http404()
+    wb = export_exam_results_workbook(exam)
+    safe = ''.join(c if c.isalnum() else '_' for c in exam.title[:40])
+    return workbook_to_response(wb, f'resultados_{safe}_{exam.pk}.xlsx')
+
+
 @login_required
 def exam_template_download(request, course_id, unit_id, tema_id, exam_id):
     course, unit, tema, exam = _get_exam(course_id, unit_id, tema_id, exam_id)
@@ -504,15 +673,21 @@ def record_focus_violation(request, course_id, unit_id, tema_id, exam_id):
     if not request.user.is_student():
         return JsonResponse({'error': 'forbidden'}, status=403)
     course, unit, tema, exam = _get_exam(course_id, unit_id, tema_id, exam_id)
-    attempt = get_object_or_404(ExamAttempt, exam=exam, student=request.user)
-    if attempt.is_submitted():
-        return JsonResponse({'already_submitted': True})
-    violation_type = request.POST.get('type', 'visibility')
-    log = list(attempt.focus_violation_log or [])
-    log.append({'ts': timezone.now().isoformat(), 'type': violation_type})
-    attempt.focus_violations = len(log)
-    attempt.focus_violation_log = log
-    attempt.save(update_fields=['focus_violations', 'focus_violation_log'])
+    with transaction.atomic():
+        # El bloqueo de fila serializa eventos seguidos: el contador devuelto es exacto.
+        attempt = get_object_or_404(
+            ExamAttempt.objects.select_for_update().only('id', 'submitted_at', 'focus_violations'),
+            exam=exam,
+            student=request.user,
+        )
+        if attempt.is_submitted():
+            return JsonResponse({'already_submitted': True})
+        ExamAttempt.objects.filter(pk=attempt.pk).update(focus_violations=F('focus_violations') + 1)
+        ExamFocusViolation.objects.create(
+            attempt_id=attempt.pk,
+            violation_type=(request.POST.get('type') or 'visibility')[:30],
+        )
+    attempt.focus_violations += 1
     limit = exam.max_focus_violations
     should_force = limit > 0 and attempt.focus_violations >= limit
     return JsonResponse({
@@ -522,6 +697,74 @@ def record_focus_violation(request, course_id, unit_id, tema_id, exam_id):
     })
 
 
+@login_required
+@require_http_methods(['POST'])
+def exam_answer_autosave(request, course_id, unit_id, tema_id, exam_id):
+    """
+    Guarda una respuesta del intento en curso (AJAX) y devuelve solo el progreso.
+    El intento ya pasó los controles de acceso en exam_take: acá se lee con una consulta
+    (join al examen) y la respuesta se escribe con un UPDATE por el índice (intento, pregunta).
+    """
+    if not request.user.is_student():
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    attempt = (
+        ExamAttempt.objects
+        .select_related('exam')
+        .filter(
+            exam_id=exam_id,
+            exam__course_id=course_id,
+            exam__tema_id=tema_id,
+            exam__tema__unit_id=unit_id,
+            student=request.user,
+        )
+        .first()
+    )
+    if attempt is None:
+        return JsonResponse({'error': 'not_found'}, status=404)
+    if attempt.is_submitted():
+        return JsonResponse({'already_submitted': True}, status=409)
+    if attempt.is_expired():
+        return JsonResponse({'expired': True}, status=409)
+    exam = attempt.exam
+    if not exam.is_published or not exam.is_available_now():
+        return JsonResponse({'error': 'El examen no está disponible en este momento.'}, status=403)
+
+    state = attempt.shuffle_state or {}
+    try:
+        question_id = int(request.POST.get('question', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Pregunta inválida.'}, status=400)
+    # El orden mezclado del intento lista las opciones válidas de cada pregunta.
+    allowed = state.get('options', {}).get(str(question_id))
+    if not allowed:
+        return JsonResponse({'error': 'Pregunta inválida.'}, status=400)
+
+    raw = request.POST.get('value', '')
+    if raw == DONT_KNOW_POST_VALUE:
+        values = {'selected_option_id': None, 'dont_know': True}
+    elif raw in allowed and raw not in (DONT_KNOW_SHUFFLE_TOKEN, 'dk'):
+        values = {'selected_option_id': int(raw), 'dont_know': False}
+    else:
+        return JsonResponse({'error': 'Opción inválida.'}, status=400)
+
+    updated = ExamAttemptAnswer.objects.filter(
+        attempt_id=attempt.pk,
+        question_id=question_id,
+    ).update(**values)
+    if not updated:
+        ExamAttemptAnswer.objects.update_or_create(
+            attempt_id=attempt.pk,
+            question_id=question_id,
+            defaults=values,
+        )
+
+    answered = ExamAttemptAnswer.objects.filter(attempt_id=attempt.pk).filter(
+        Q(selected_option_id__isnull=False) | Q(dont_know=True),
+    ).count()
+    total = len(state.get('question_ids') or [])
+    return JsonResponse({'answered': answered, 'total': total})
+
+
 @login_required
 @require_http_methods(['GET', 'POST'])
 def exam_take(request, course_id, unit_id, tema_id, exam_id):
@@ -545,7 +788,9 @@ def exam_take(request, course_id, unit_id, tema_id, exam_id):
     attempt, created = ExamAttempt.objects.get_or_create(
         exam=exam,
         student=request.user,
+        defaults={'deadline_at': exam.attempt_deadline(timezone.now())},
     )
+    attempt.exam = exam
 
     if attempt.is_submitted():
         return redirect(
@@ -556,16 +801,47 @@ def exam_take(request, course_id, unit_id, tema_id, exam_id):
             exam_id=exam_id,
         )
 
-    ensure_attempt_shuffle_and_answers(attempt)
-    attempt.refresh_from_db()
+    if attempt.is_prepared:
+        # Intento pre-generado: el inicio real es ahora (un solo UPDATE, sin inserts).
+        now = timezone.now()
+        ExamAttempt.objects.filter(pk=attempt.pk, is_prepared=True).update(
+            is_prepared=False,
+            started_at=now,
+            deadline_at=exam.attempt_deadline(now),
+        )
+        attempt.is_prepared = False
+        attempt.started_at = now
+        attempt.deadline_at = exam.attempt_deadline(now)
+    elif attempt.deadline_at is None:
+        attempt.deadline_at = exam.attempt_deadline(attempt.started_at)
+        ExamAttempt.objects.filter(pk=attempt.pk).update(deadline_at=attempt.deadline_at)
+
+    if attempt.is_expired():
+        # Venció sin enviarse (y el barrido todavía no pasó): se cierra con lo guardado.
+        with transaction.atomic():
+            score = submit_attempt(attempt, submitted_at=attempt.deadline_at)
+        msg = 'Se terminó el tiempo del examen y se envió con tus respuestas guardadas.'
+        if score is not None:
+            msg += f' Tu nota: {score:.2f} / 10,00.'
+        messages.info(request, msg)
+        return redirect(
+            'quizzes:exam_result',
+            course_id=course_id,
+            unit_id=unit_id,
+            tema_id=tema_id,
+            exam_id=exam_id,
+        )
+
+    # Cantidad fija de consultas sin importar el tamaño del examen:
+    # intento (arriba) + preguntas con opciones + respuestas del intento.
+    questions = load_exam_questions(exam)
+    answers = {} if created else {a.question_id: a for a in attempt.answers.all()}
+    answers = ensure_attempt_shuffle_and_answers(attempt, questions=questions, answers=answers)
 
-    questions_by_id = {
-        q.pk: q
-        for q in exam.questions.prefetch_related('answer_options')
-    }
+    questions_by_id = {q.pk: q for q in questions}
     options_by_id = {}
-    for q in questions_by_id.values():
-        for o in q.answer_options.all():
+    for q in questions:
+        for o in q.option_list:
             options_by_id[o.pk] = o
 
     state = attempt.shuffle_state or {}
@@ -594,7 +870,7 @@ def exam_take(request, course_id, unit_id, tema_id, exam_id):
         opt_count = sum(1 for x in options_display if x.get('kind') == 'option')
         if dk_count != 1 or opt_count != 3:
             continue
-        aa = ExamAttemptAnswer.objects.filter(attempt=attempt, question=q).first()
+        aa = answers.get(q.pk)
         selected_dk = bool(aa and aa.dont_know)
         selected_id = aa.selected_option_id if aa and not aa.dont_know else None
         display_questions.append(
@@ -635,7 +911,7 @@ def exam_take(request, course_id, unit_id, tema_id, exam_id):
         if not raw:
             return
         if raw == DONT_KNOW_POST_VALUE:
-            ExamAttemptAnswer.objects.update_or_create(
+            answers[dq['question'].pk], _ = ExamAttemptAnswer.objects.update_or_create(
                 attempt=attempt,
                 question=dq['question'],
                 defaults={
@@ -651,7 +927,7 @@ def exam_take(request, course_id, unit_id, tema_id, exam_id):
         opt = options_by_id.get(oid)
         if not opt or opt.question_id != dq['question'].pk:
             return
-        ExamAttemptAnswer.objects.update_or_create(
+        answers[dq['question'].pk], _ = ExamAttemptAnswer.objects.update_or_create(
             attempt=attempt,
             question=dq['question'],
             defaults={
@@ -701,10 +977,7 @@ def exam_take(request, course_id, unit_id, tema_id, exam_id):
             if not force_submit:
                 first_missing_idx = None
                 for idx, dq in enumerate(display_questions):
-                    aa = ExamAttemptAnswer.objects.filter(
-                        attempt=attempt,
-                        question_id=dq['question'].pk,
-                    ).first()
+                    aa = answers.get(dq['question'].pk)
                     if not aa or (not aa.selected_option_id and not aa.dont_know):
                         first_missing_idx = idx
                         break
@@ -717,28 +990,7 @@ def exam_take(request, course_id, unit_id, tema_id, exam_id):
                     return _redirect_take(first_missing_idx)
 
             with transaction.atomic():
-                answers = list(
-                    attempt.answers.select_related('selected_option', 'question')
-                )
-                total = len(answers)
-                correct = sum(
-                    1
-                    for a in answers
-                    if a.selected_option_id and a.selected_option.is_correct
-                )
-                score = ThemeExam.score_from_counts(correct, total)
-                attempt.correct_count = correct
-                attempt.total_questions = total
-                attempt.score = score
-                attempt.submitted_at = timezone.now()
-                attempt.save(
-                    update_fields=[
-                        'correct_count',
-                        'total_questions',
-                        'score',
-                        'submitted_at',
-                    ]
-                )
+                score = submit_attempt(attempt)
             messages.success(
                 request,
                 f'Examen enviado. Tu nota: {score:.2f} / 10,00.',
@@ -751,16 +1003,14 @@ def exam_take(request, course_id, unit_id, tema_id, exam_id):
                 exam_id=exam_id,
             )
 
-    current_dq = display_questions[step] if n else None
     answered_count = 0
     progress_percent = 0
     if n:
-        answered_count = ExamAttemptAnswer.objects.filter(
-            attempt=attempt,
-            question_id__in=[dq['question'].pk for dq in display_questions],
-        ).filter(
-            Q(selected_option_id__isnull=False) | Q(dont_know=True),
-        ).count()
+        answered_count = sum(
+            1
+            for dq in display_questions
+            if dq['selected_id'] is not None or dq['selected_dk']
+        )
         progress_percent = min(100, int(100 * (step + 1) / n))
 
     can_submit_exam = bool(n and answered_count == n)
@@ -777,12 +1027,15 @@ def exam_take(request, course_id, unit_id, tema_id, exam_id):
             'display_questions': display_questions,
             'step': step,
             'total_questions': n,
-            'current_dq': current_dq,
             'has_prev': n > 0 and step > 0,
             'has_next': n > 0 and step < n - 1,
             'answered_count': answered_count,
             'progress_percent': progress_percent,
             'can_submit_exam': can_submit_exam,
+            'seconds_left': (
+                max(0, int((attempt.deadline_at - timezone.now()).total_seconds()))
+                if attempt.deadline_at else None
+            ),
         },
     )
 
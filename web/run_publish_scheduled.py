@@ -3,6 +3,9 @@
 Wrapper para ejecutar publish_scheduled_content con el entorno del contenedor.
 Cron corre con un entorno mínimo; este script copia las variables de /proc/1/environ
 (proceso principal, p. ej. runserver) antes de llamar al management command.
+
+Opcionalmente recibe otro management command y sus argumentos:
+  python run_publish_scheduled.py reconcile_media_index
 """
 import os
 import subprocess
@@ -24,9 +27,10 @@ def main():
     except Exception as e:
         sys.stderr.write(f"run_publish_scheduled: error leyendo /proc/1/environ: {e}\n")
 
+    command = sys.argv[1:] or ["publish_scheduled_content"]
     os.chdir("/app")
     return subprocess.run(
-        [sys.executable, "manage.py", "publish_scheduled_content"],
+        [sys.executable, "manage.py", *command],
         cwd="/app",
     ).returncode
 
@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 class Unit(models.Model):
     title = models.CharField(max_length=200, verbose_name='Título')
@@ -65,11 +67,9 @@ class Unit(models.Model):
 
     def can_be_managed_by(self, user):
         """Check if user can manage this unit"""
-        return (
-            self.course.instructor == user or
-            user in self.course.collaborators.all() or
-            user.user_type == 'admin'
-        )
+        from courses.services.access import user_manages_course
+
+        return user.user_type == 'admin' or user_manages_course(user, self.course_id)
 
 
 class Tema(models.Model):
@@ -138,3 +138,23 @@ class Tema(models.Model):
     def can_be_managed_by(self, user):
         """Check if user can manage this theme."""
         return self.unit.can_be_managed_by(user)
+
+
+@receiver(post_save, sender=Unit)
+@receiver(post_delete, sender=Unit)
+def invalidate_outline_on_unit_change(sender, instance, **kwargs):
+    from units.services.outline import invalidate_course_outline
+
+    invalidate_course_outline(instance.course_id)
+
+
+@receiver(post_save, sender=Tema)
+@receiver(post_delete, sender=Tema)
+def invalidate_outline_on_tema_change(sender, instance, **kwargs):
+    from units.services.outline import invalidate_course_outline
+
+    if Tema.unit.is_cached(instance):
+        course_id = instance.unit.course_id
+    else:
+        course_id = Unit.objects.filter(pk=instance.unit_id).values_list('course_id', flat=True).first()
+    invalidate_course_outline(course_id)
@@ -0,0 +1 @@
+"""Servicios de unidades y temas."""
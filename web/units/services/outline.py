@@ -0,0 +1,107 @@
+"""
+Índice del curso en caché: unidades → temas → cantidad de materiales, tareas y exámenes.
+
+- Se arma con cinco consultas y se guardan dos variantes: la de docentes (todo) y la de
+  alumnos (solo unidades/temas sin pausa y contenido publicado, igual que tema_detail).
+- Las señales de Unit, Tema, Material, Assignment y ThemeExam borran las dos variantes
+  del curso al confirmarse la transacción; unit_list y unit_detail leen de acá.
+- La caché es la compartida de settings.CACHES: lo que invalida publish_scheduled_content
+  desde cron se ve enseguida en el servidor web.
+
+Cada unidad y tema es un dict (los templates acceden igual que a un modelo: unit.title).
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+OUTLINE_CACHE_TIMEOUT = 60 * 60
+STAFF, STUDENT = 'staff', 'student'
+
+
+def cache_key(course_id, variant):
+    return f'units:course_outline:{variant}:{course_id}'
+
+
+def build_course_outline(course_id):
+    """Devuelve {STAFF: [...], STUDENT: [...]} leyendo la base."""
+    from assignments.models import Assignment
+    from materials.models import Material
+    from quizzes.models import ThemeExam
+    from units.models import Tema, Unit
+
+    units = list(
+        Unit.objects.filter(course_id=course_id)
+        .order_by('order', 'created_at')
+        .values('id', 'title', 'order', 'is_paused', 'created_at')
+    )
+    temas = list(
+        Tema.objects.filter(unit__course_id=course_id)
+        .order_by('order', 'created_at')
+        .values('id', 'unit_id', 'title', 'description', 'order', 'is_paused', 'scheduled_publish_at')
+    )
+
+    def grouped(qs, visible):
+        return {
+            row['tema_id']: (row['total'], row['visible'])
+            for row in qs.filter(course_id=course_id, tema__isnull=False)
+            .values('tema_id')
+            .annotate(total=Count('id'), visible=Count('id', filter=visible))
+            .order_by()
+        }
+
+    counts = {
+        'material_count': grouped(
+            Material.objects.filter(assignment__isnull=True), Q(is_published=True)
+        ),
+        'assignment_count': grouped(
+            Assignment.objects.all(), Q(is_active=True, is_published=True)
+        ),
+        'exam_count': grouped(ThemeExam.objects.all(), Q(is_published=True)),
+    }
+
+    outline = {STAFF: [], STUDENT: []}
+    temas_by_unit = {}
+    for tema in temas:
+        temas_by_unit.setdefault(tema['unit_id'], []).append(tema)
+    for unit in units:
+        staff_temas, student_temas = [], []
+        for tema in temas_by_unit.get(unit['id'], []):
+            staff_tema, student_tema = dict(tema), dict(tema)
+            for field, by_tema in counts.items():
+                total, visible = by_tema.get(tema['id'], (0, 0))
+                staff_tema[field] = total
+                student_tema[field] = visible
+            staff_temas.append(staff_tema)
+            if not tema['is_paused']:
+                student_temas.append(student_tema)
+        outline[STAFF].append({**unit, 'temas': staff_temas, 'tema_count': len(staff_temas)})
+        if not unit['is_paused']:
+            outline[STUDENT].append({**unit, 'temas': student_temas, 'tema_count': len(student_temas)})
+    return outline
+
+
+def get_course_outline(course_id, staff=False):
+    """Lista de unidades (con sus temas) de la variante pedida; una lectura de caché."""
+    variant = STAFF if staff else STUDENT
+    outline = cache.get(cache_key(course_id, variant))
+    if outline is None:
+        built = build_course_outline(course_id)
+        cache.set_many(
+            {cache_key(course_id, v): built[v] for v in (STAFF, STUDENT)},
+            OUTLINE_CACHE_TIMEOUT,
+        )
+        outline = built[variant]
+    return outline
+
+
+def find_unit(outline, unit_id):
+    return next((u for u in outline if u['id'] == unit_id), None)
+
+
+def invalidate_course_outline(course_id):
+    """Borra las dos variantes ahora y otra vez al confirmar (evita recachear datos sin commit)."""
+    if not course_id:
+        return
+    keys = [cache_key(course_id, v) for v in (STAFF, STUDENT)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
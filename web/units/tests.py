@@ -1,3 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from courses.models import Course, Enrollment
+from materials.models import Material
+from units.models import Unit, Tema
+from units.services.outline import get_course_outline
+
+
+User = get_user_model()
+
+
+class CourseOutlineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(username='doc_indice', password='Pass1234!', user_type='teacher')
+        self.student = User.objects.create_user(username='alu_indice', password='Pass1234!', user_type='student')
+        self.course = Course.objects.create(title='Curso', description='Desc', instructor=self.teacher)
+        Enrollment.objects.create(student=self.student, course=self.course, status='approved')
+        self.unit = Unit.objects.create(title='Unidad 1', course=self.course, created_by=self.teacher, order=1)
+        Unit.objects.create(title='Unidad 2', course=self.course, created_by=self.teacher, order=2, is_paused=True)
+        self.tema = Tema.objects.create(
+            title='Tema abierto', description='Desc', unit=self.unit, created_by=self.teacher, order=1,
+            is_paused=False,
+        )
+        Tema.objects.create(
+            title='Tema en pausa', description='Desc', unit=self.unit, created_by=self.teacher, order=2,
+        )
+        self.draft = self._material('Borrador', is_published=False)
+        self._material('Publicado', is_published=True)
+
+    def _material(self, title, is_published):
+        return Material.objects.create(
+            title=title,
+            course=self.course,
+            tema=self.tema,
+            uploaded_by=self.teacher,
+            material_type='link',
+            link_url='https://example.com',
+            is_published=is_published,
+        )
+
+    def test_staff_and_student_variants_come_from_one_build(self):
+        with self.assertNumQueries(5):
+            staff = get_course_outline(self.course.id, staff=True)
+        with self.assertNumQueries(0):
+            student = get_course_outline(self.course.id)
+
+        self.assertEqual([u['tema_count'] for u in staff], [2, 0])
+        self.assertEqual(staff[0]['temas'][0]['material_count'], 2)
+        self.assertEqual([u['title'] for u in student], ['Unidad 1'])
+        self.assertEqual([t['title'] for t in student[0]['temas']], ['Tema abierto'])
+        self.assertEqual(student[0]['temas'][0]['material_count'], 1)
+
+    def test_content_change_invalidates_outline(self):
+        get_course_outline(self.course.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.is_published = True
+            self.draft.save()
+        self.assertEqual(get_course_outline(self.course.id)[0]['temas'][0]['material_count'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tema.objects.filter(title='Tema en pausa').get().delete()
+        self.assertEqual(get_course_outline(self.course.id, staff=True)[0]['tema_count'], 1)
+
+    def test_unit_detail_renders_student_outline(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('units:unit_detail', args=[self.course.id, self.unit.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['title'] for t in response.context['temas']], ['Tema abierto'])
+        self.assertContains(response, 'Tema abierto')
+        self.assertNotContains(response, 'Tema en pausa')
@@ -8,7 +8,9 @@ from django.utils import timezone
 import os
 from .models import Unit, Tema
 from .forms import UnitForm, TemaForm, MaterialUploadForm, MaterialEditForm
-from courses.models import Course, Enrollment
+from .services.outline import find_unit, get_course_outline
+from courses.models import Course
+from courses.services.access import user_enrolled_in_course
 from accounts.models import UserActivityLog
 from accounts.activity import log_user_activity
 
@@ -23,12 +25,7 @@ def unit_list(request, course_id):
         can_view = True
     elif request.user.is_student():
         # Check if student is enrolled and approved
-        enrollment = Enrollment.objects.filter(
-            student=request.user,
-            course=course,
-            status='approved'
-        ).first()
-        can_view = enrollment is not None
+        can_view = user_enrolled_in_course(request.user, course)
     
     if not can_view:
         messages.error(request, 'No tienes permiso para ver las unidades de este curso.')
@@ -37,16 +34,15 @@ def unit_list(request, course_id):
         else:
             return redirect('course_list_teacher')
     
-    # Get units - teachers see all, students only non-paused
-    if request.user.is_teacher() or request.user.user_type == 'admin':
-        units = Unit.objects.filter(course=course).order_by('order', 'created_at')
-    else:
-        units = Unit.objects.filter(course=course, is_paused=False).order_by('order', 'created_at')
+    # Get units from the cached outline - teachers see all, students only non-paused
+    units = get_course_outline(
+        course.id,
+        staff=request.user.is_teacher() or request.user.user_type == 'admin',
+    )
     
     # Check if user can manage units
     can_manage = (
-        course.instructor == request.user or
-        request.user in course.collaborators.all() or
+        course.is_instructor_or_collaborator(request.user) or
         request.user.user_type == 'admin'
     )
     
@@ -66,8 +62,7 @@ def unit_create(request, course_id):
     
     # Check permissions: instructor, collaborator, or admin
     can_manage = (
-        course.instructor == request.user or
-        request.user in course.collaborators.all() or
+        course.is_instructor_or_collaborator(request.user) or
         request.user.user_type == 'admin'
     )
     
@@ -202,12 +197,7 @@ def unit_detail(request, course_id, unit_id):
         can_view = True
     elif request.user.is_student():
         # Check if student is enrolled and approved, and unit is not paused
-        enrollment = Enrollment.objects.filter(
-            student=request.user,
-            course=course,
-            status='approved'
-        ).first()
-        can_view = enrollment is not None and unit.is_visible_to_students()
+        can_view = user_enrolled_in_course(request.user, course) and unit.is_visible_to_students()
     
     if not can_view:
         messages.error(request, 'No tienes permiso para ver esta unidad.')
@@ -218,10 +208,12 @@ def unit_detail(request, course_id, unit_id):
     
     # Get themes for this unit
     viewing_as_student = getattr(request, 'viewing_as_student', False)
-    if (request.user.is_teacher() or request.user.user_type == 'admin') and not viewing_as_student:
-        temas = Tema.objects.filter(unit=unit).order_by('order', 'created_at')
-    else:
-        temas = Tema.objects.filter(unit=unit, is_paused=False).order_by('order', 'created_at')
+    outline = get_course_outline(
+        course.id,
+        staff=(request.user.is_teacher() or request.user.user_type == 'admin') and not viewing_as_student,
+    )
+    outline_unit = find_unit(outline, unit.id)
+    temas = outline_unit['temas'] if outline_unit else []
 
     # Check if user can manage (disabled in student view mode)
     can_manage = unit.can_be_managed_by(request.user) and not viewing_as_student
@@ -247,12 +239,7 @@ def tema_detail(request, course_id, unit_id, tema_id):
     if request.user.is_teacher() or request.user.user_type == 'admin':
         can_view = True
     elif request.user.is_student():
-        enrollment = Enrollment.objects.filter(
-            student=request.user,
-            course=course,
-            status='approved'
-        ).first()
-        can_view = enrollment is not None and tema.is_visible_to_students()
+        can_view = user_enrolled_in_course(request.user, course) and tema.is_visible_to_students()
 
     if not can_view:
         messages.error(request, 'No tienes permiso para ver este tema.')
@@ -281,7 +268,7 @@ def tema_detail(request, course_id, unit_id, tema_id):
         ).order_by('due_date', 'created_at')
 
     from quizzes.models import ThemeExam
-    from quizzes.utils import resolve_student_exam_access
+    from quizzes.utils import resolve_student_exams_access
 
     if is_manager:
         theme_exams_qs = ThemeExam.objects.filter(tema=tema).order_by('available_from', 'pk')
@@ -297,16 +284,18 @@ def tema_detail(request, course_id, unit_id, tema_id):
             available_from__lte=now,
             available_until__gte=now,
         ).order_by('available_from', 'pk')
-        theme_exam_rows = []
-        for e in theme_exams_qs:
-            ok, msg = resolve_student_exam_access(request.user, course, tema, e)
-            theme_exam_rows.append(
-                {
-                    'exam': e,
-                    'can_take': ok,
-                    'block_message': (msg or ''),
-                }
-            )
+        theme_exams = list(theme_exams_qs)
+        for e in theme_exams:
+            e.tema = tema
+        access = resolve_student_exams_access(request.user, theme_exams)
+        theme_exam_rows = [
+            {
+                'exam': e,
+                'can_take': access[e.pk][0],
+                'block_message': access[e.pk][1] or '',
+            }
+            for e in theme_exams
+        ]
 
     context = {
         'course': course,
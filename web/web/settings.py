@@ -137,6 +137,17 @@ DATABASES = {
     }
 }
 
+# Caché compartida entre procesos: los comandos de cron (run_publish_scheduled.py) corren en
+# el mismo contenedor que el servidor y sus invalidaciones (índice del curso, análisis de
+# ítems, paneles del dashboard) tienen que verse en la web. LocMemCache es por proceso.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': env('DJANGO_CACHE_DIR', default='/tmp/web_lms_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
 # Configuraci?n de conexi?n a la base de datos
 DB_CONNECTION_TIMEOUT = 20
 DB_READ_TIMEOUT = 30
@@ -181,7 +192,8 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # CompressedManifestStaticFilesStorage = compresión gzip + nombres hasheados (cache-bust automático).
 STORAGES = {
     'default': {
-        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        # FileSystemStorage que además mantiene el índice core.MediaFile (reportes de huérfanos).
+        'BACKEND': 'core.services.media_index.IndexedFileSystemStorage',
     },
     'staticfiles': {
         'BACKEND': 'whitenoise.storage.CompressedStaticFilesStorage',
@@ -5,6 +5,7 @@ from django.conf.urls.static import static
 from django.views.generic.base import RedirectView
 from django.templatetags.static import static as static_file
 from accounts.views import dashboard
+from core import views as core_views
 from courses import views as course_views
 from forums import views as forum_views
 
@@ -19,6 +20,7 @@ urlpatterns = [
     path('units/', include('units.urls')), # Incluye las URLs de la aplicación 'units'
     path('', include('assignments.urls')), # Incluye las URLs de la aplicación 'assignments'
     path('', include('quizzes.urls')),
+    path('buscar/', core_views.search, name='search'),
     
     # Dashboard URLs for courses
     path('courses/', include([